@@ -0,0 +1,305 @@
+"""
+Benchmarki głównych funkcji eanalizera na syntetycznych danych
+wieloletnich (patrz benchmarks/synthetic_data.py).
+
+Dla każdego rozmiaru danych (liczba lat) i funkcji mierzony jest najlepszy
+czas z kilku powtórzeń oraz szczytowe zużycie pamięci (tracemalloc, w
+osobnym przebiegu, by nie zawyżać czasu). Wyniki można porównać z zapisanym
+punktem odniesienia (benchmarks/baseline.json) - przekroczenie tolerancji
+zgłaszane jest jako regresja, a z --sprawdz kończy program kodem 1.
+
+    python -m benchmarks.run_benchmarks --lata 1 5
+    python -m benchmarks.run_benchmarks --lata 1 5 --zapisz-baseline
+    python -m benchmarks.run_benchmarks --lata 1 --rozdzielczosc 15min --sprawdz
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from eanalizer.core import (
+    aggregate_daily_data,
+    calculate_optimal_capacity,
+    run_full_analysis,
+    run_tariff_comparison,
+)
+from eanalizer.data_loader import load_from_enea_files
+from eanalizer.price_fetcher import get_hourly_rce_prices
+from eanalizer.price_store import RcePriceStore
+from eanalizer.tariffs import TariffManager
+
+from .synthetic_data import RESOLUTIONS, default_years, generate_rce_days, write_dataset
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+TARIFFS_FILE = BENCHMARK_DIR.parent / "config" / "tariffs.csv"
+DEFAULT_YEARS = [1, 5]
+DEFAULT_REPEAT = 3
+# Dopuszczalny wzrost czasu względem punktu odniesienia (0.5 = o 50%).
+DEFAULT_TOLERANCE = 0.5
+# Pomiary krótsze niż ten próg nie są oceniane (szum pomiaru dominuje).
+MIN_COMPARED_SECONDS = 0.01
+
+BENCHMARK_TARIFF = "G12w"
+BENCHMARK_CAPACITY = 10.0
+BENCHMARK_EFFICIENCY = 0.9
+BENCHMARK_NET_METERING = 0.8
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Najlepszy czas z `repeat` wywołań i szczyt pamięci z osobnego wywołania."""
+    best = float("inf")
+    with redirect_stdout(StringIO()):
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"czas_s": best, "pamiec_mb": peak / 2**20}
+
+
+def _benchmarks(work_dir: Path, years: List[int], resolution: str):
+    """Przygotowuje dane i zwraca listę (nazwa funkcji, liczba rekordów, wywołanie)."""
+    data_dir = work_dir / "dane"
+    cache_dir = work_dir / "cache"
+    with redirect_stdout(StringIO()):
+        paths = [str(path) for path in write_dataset(data_dir, years, resolution)]
+        data = load_from_enea_files(paths, cache_dir=cache_dir)
+        first, last = data.time_range()
+        tariff_manager = TariffManager(
+            str(TARIFFS_FILE), years=range(first.year, last.year + 1)
+        )
+        daily = aggregate_daily_data(data)
+        with RcePriceStore(cache_dir) as store:
+            store.store_days(generate_rce_days(first.date(), last.date()))
+    records = len(data)
+
+    return [
+        (
+            "load_from_enea_csv",
+            records,
+            lambda: load_from_enea_files(paths),
+        ),
+        (
+            "load_from_enea_files (cache .npz)",
+            records,
+            lambda: load_from_enea_files(paths, cache_dir=cache_dir),
+        ),
+        (
+            "run_full_analysis",
+            records,
+            lambda: run_full_analysis(
+                data,
+                BENCHMARK_CAPACITY,
+                tariff_manager,
+                BENCHMARK_TARIFF,
+                net_metering_ratio=BENCHMARK_NET_METERING,
+                storage_efficiency=BENCHMARK_EFFICIENCY,
+            ),
+        ),
+        (
+            "run_tariff_comparison",
+            records,
+            lambda: run_tariff_comparison(
+                data,
+                tariff_manager,
+                BENCHMARK_CAPACITY,
+                BENCHMARK_NET_METERING,
+                BENCHMARK_EFFICIENCY,
+            ),
+        ),
+        (
+            "calculate_optimal_capacity",
+            records,
+            lambda: calculate_optimal_capacity(
+                data, daily, tariff_manager, BENCHMARK_TARIFF
+            ),
+        ),
+        (
+            "get_hourly_rce_prices (magazyn SQLite)",
+            records,
+            lambda: get_hourly_rce_prices(first, last, cache_dir=cache_dir),
+        ),
+    ]
+
+
+def run_benchmarks(
+    year_counts: List[int], resolution: str, repeat: int, only: List[str] = ()
+) -> List[Dict[str, Any]]:
+    results = []
+    for count in year_counts:
+        work_dir = Path(tempfile.mkdtemp(prefix="eanalizer-bench-"))
+        try:
+            print(
+                f"\nPrzygotowanie danych: {count} lat(a), rozdzielczość {resolution}..."
+            )
+            for name, records, func in _benchmarks(
+                work_dir, default_years(count), resolution
+            ):
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                result = {
+                    "funkcja": name,
+                    "lata": count,
+                    "rozdzielczosc": resolution,
+                    "rekordy": records,
+                    **measure(func, repeat),
+                }
+                print(
+                    f"  {name:<40} {result['czas_s']:>9.4f} s "
+                    f"{result['pamiec_mb']:>9.1f} MB"
+                )
+                results.append(result)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def _key(result: Dict[str, Any]) -> str:
+    return f"{result['funkcja']}|{result['lata']}|{result['rozdzielczosc']}"
+
+
+def compare_with_baseline(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Porównuje czasy z punktem odniesienia; zwraca opisy regresji."""
+    reference = {_key(entry): entry for entry in baseline.get("wyniki", [])}
+    regressions = []
+    print(f"\n--- Porównanie z punktem odniesienia (tolerancja {tolerance:.0%}) ---")
+    for result in results:
+        entry = reference.get(_key(result))
+        if entry is None:
+            continue
+        ratio = result["czas_s"] / entry["czas_s"] if entry["czas_s"] else float("inf")
+        status = "ok"
+        if (
+            ratio > 1 + tolerance
+            and result["czas_s"] - entry["czas_s"] > MIN_COMPARED_SECONDS
+        ):
+            status = "REGRESJA"
+            regressions.append(
+                f"{result['funkcja']} ({result['lata']} lat): "
+                f"{entry['czas_s']:.4f} s -> {result['czas_s']:.4f} s"
+            )
+        print(
+            f"  {result['funkcja']:<40} {result['lata']:>3} lat  "
+            f"x{ratio:>6.2f}  {status}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarki eanalizera na syntetycznych danych wieloletnich."
+    )
+    parser.add_argument(
+        "--lata",
+        type=int,
+        nargs="+",
+        default=DEFAULT_YEARS,
+        help="Rozmiary danych w latach (1-20, domyślnie: %(default)s).",
+    )
+    parser.add_argument(
+        "--rozdzielczosc",
+        choices=sorted(RESOLUTIONS),
+        default="1h",
+        help="Rozdzielczość generowanych danych (domyślnie: %(default)s).",
+    )
+    parser.add_argument(
+        "--powtorzenia",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Liczba powtórzeń pomiaru czasu (domyślnie: %(default)s).",
+    )
+    parser.add_argument(
+        "--tylko",
+        nargs="+",
+        default=[],
+        metavar="FRAGMENT",
+        help="Uruchamia tylko funkcje, których nazwa zawiera podany fragment.",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help="Plik z punktem odniesienia (domyślnie: benchmarks/baseline.json).",
+    )
+    parser.add_argument(
+        "--zapisz-baseline",
+        action="store_true",
+        help="Zapisuje wyniki jako nowy punkt odniesienia.",
+    )
+    parser.add_argument(
+        "--tolerancja",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Dopuszczalny wzrost czasu względem punktu odniesienia "
+        "(domyślnie: %(default)s, czyli 50%%).",
+    )
+    parser.add_argument(
+        "--sprawdz",
+        action="store_true",
+        help="Kończy program kodem 1, jeśli wykryto regresję.",
+    )
+    parser.add_argument(
+        "--wyniki", type=Path, help="Zapisuje wyniki pomiarów do pliku JSON."
+    )
+    args = parser.parse_args(argv)
+    if any(not 1 <= count <= 20 for count in args.lata):
+        parser.error("--lata: liczba lat musi być z zakresu 1-20.")
+
+    results = run_benchmarks(
+        args.lata, args.rozdzielczosc, args.powtorzenia, args.tylko
+    )
+    report = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platforma": platform.platform(),
+        "wyniki": results,
+    }
+    if args.wyniki:
+        args.wyniki.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.zapisz_baseline:
+        args.baseline.write_text(
+            json.dumps(report, indent=2, ensure_ascii=False) + "\n"
+        )
+        print(f"\nZapisano punkt odniesienia: {args.baseline}")
+        return 0
+    if not args.baseline.is_file():
+        print(f"\nBrak punktu odniesienia ({args.baseline}) - pominięto porównanie.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare_with_baseline(results, baseline, args.tolerancja)
+    if regressions:
+        print("\nWykryto regresje wydajności:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1 if args.sprawdz else 0
+    print("\nBrak regresji względem punktu odniesienia.")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
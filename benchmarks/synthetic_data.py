@@ -0,0 +1,205 @@
+"""
+Generator syntetycznych danych licznika w formacie plików CSV Enei.
+
+Dane są deterministyczne dla danego ziarna i odwzorowują to, co w
+prawdziwych plikach ma znaczenie dla wydajności i poprawności:
+
+- produkcja PV w kształcie dzwonu między wschodem a zachodem słońca, zależna
+  od pory roku i zachmurzenia danego dnia,
+- zużycie z porannym i wieczornym szczytem, wyższe zimą i w weekendy,
+- czas lokalny Europe/Warsaw: brak godziny przy przejściu na czas letni i
+  zdublowana godzina przy powrocie na czas zimowy,
+- bajty NUL między znakami (jak w plikach z portalu Enei) i opcjonalnie
+  wartości "---" dla godzin, których operator jeszcze nie rozliczył.
+
+Rozdzielczość godzinowa ("1h") albo kwadransowa ("15min"); znaczniki czasu
+oznaczają koniec okresu ("04:59", "04:14"), jak w plikach Enei.
+"""
+
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+HEADER = (
+    "Data;"
+    "Wolumen energii elektrycznej pobranej z sieci przed bilansowaniem godzinowym;"
+    "Wolumen energii elektrycznej oddanej do sieci przed bilansowaniem godzinowym;"
+    "Wolumen energii elektrycznej pobranej z sieci po bilansowaniu godzinowym;"
+    "Wolumen energii elektrycznej oddanej do sieci po bilansowaniu godzinowym"
+)
+RESOLUTIONS = {"1h": 60, "15min": 15}
+TIMEZONE = "Europe/Warsaw"
+DEFAULT_PV_KWP = 6.0
+DEFAULT_CUSTOMER_ID = "0000000"
+
+
+def _local_timestamps(year: int, minutes: int) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """
+    Początki okresów roku w czasie lokalnym (bez strefy) oraz przesunięcie
+    względem czasu zimowego w godzinach (1 w czasie letnim). Okresy
+    generowane są w UTC, więc godzina wiosenna znika, a jesienna się powtarza.
+    """
+    utc = pd.date_range(
+        start=pd.Timestamp(f"{year}-01-01", tz=TIMEZONE).tz_convert("UTC"),
+        end=pd.Timestamp(f"{year + 1}-01-01", tz=TIMEZONE).tz_convert("UTC"),
+        freq=f"{minutes}min",
+        inclusive="left",
+    )
+    local = utc.tz_convert(TIMEZONE)
+    dst_shift = (local.map(lambda ts: ts.dst().total_seconds()) / 3600).to_numpy()
+    return local.tz_localize(None), dst_shift
+
+
+def generate_profiles(
+    year: int,
+    resolution: str = "1h",
+    seed: int = 0,
+    pv_kwp: float = DEFAULT_PV_KWP,
+) -> Dict[str, np.ndarray]:
+    """
+    Syntetyczne przepływy energii (kWh na okres) dla jednego roku: kolumny
+    timestamp (początek okresu, czas lokalny) oraz pobor_przed, oddanie_przed,
+    pobor, oddanie - jak kolumny wczytywane przez data_loader.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Nieznana rozdzielczość '{resolution}'.")
+    minutes = RESOLUTIONS[resolution]
+    step_h = minutes / 60
+    rng = np.random.default_rng([seed, year])
+    starts, dst_shift = _local_timestamps(year, minutes)
+
+    day_of_year = starts.dayofyear.to_numpy()
+    hour = starts.hour.to_numpy() + starts.minute.to_numpy() / 60 + step_h / 2
+    day_index = (starts.normalize() - pd.Timestamp(f"{year}-01-01")).days.to_numpy()
+    season = np.sin(2 * np.pi * (day_of_year - 80) / 365.25)
+    weekend = starts.dayofweek.to_numpy() >= 5
+
+    # PV: dzwon między wschodem a zachodem, zachmurzenie losowane na dzień
+    day_length = 12.2 + 4.3 * season
+    solar_noon = 12.3 + dst_shift
+    sun = np.clip((hour - (solar_noon - day_length / 2)) / day_length, 0.0, 1.0)
+    shape = np.sin(np.pi * sun) ** 1.6
+    clouds = rng.beta(2.2, 1.4, size=day_index.max() + 1)[day_index]
+    pv_kw = pv_kwp * 0.78 * (0.55 + 0.45 * season) * shape * clouds
+
+    # Zużycie: podstawa, szczyt poranny i wieczorny, zima i weekendy wyżej
+    base_kw = 0.28 + 0.12 * (1 - season) / 2
+    morning = 0.55 * np.exp(-0.5 * ((hour - 7.0) / 1.1) ** 2)
+    evening = 1.05 * np.exp(-0.5 * ((hour - 19.0) / 1.8) ** 2)
+    daytime = np.where(weekend, 0.35, 0.1) * np.exp(-0.5 * ((hour - 13.0) / 3.0) ** 2)
+    load_kw = (base_kw + morning + evening + daytime) * rng.lognormal(
+        0.0, 0.25, size=len(starts)
+    )
+
+    load, pv = load_kw * step_h, pv_kw * step_h
+    # W ramach okresu pobór i oddanie mogą wystąpić jednocześnie
+    overlap = 0.12 * np.minimum(load, pv) * rng.random(len(starts))
+    pobor_przed = np.maximum(load - pv, 0.0) + overlap
+    oddanie_przed = np.maximum(pv - load, 0.0) + overlap
+    return {
+        "timestamp": starts.to_numpy(),
+        "pobor_przed": pobor_przed,
+        "oddanie_przed": oddanie_przed,
+        "pobor": np.maximum(pobor_przed - oddanie_przed, 0.0),
+        "oddanie": np.maximum(oddanie_przed - pobor_przed, 0.0),
+    }
+
+
+def _format_values(values: np.ndarray) -> np.ndarray:
+    return np.char.replace(np.char.mod("%.3f", np.round(values, 3)), ".", ",")
+
+
+def render_enea_csv(
+    profiles: Dict[str, np.ndarray],
+    resolution: str = "1h",
+    nul_bytes: bool = True,
+    unsettled_tail: int = 0,
+) -> bytes:
+    """
+    Zapisuje profile w formacie CSV Enei. unsettled_tail ostatnich okresów
+    dostaje wartości "---" (godziny jeszcze nierozliczone przez operatora).
+    """
+    minutes = RESOLUTIONS[resolution]
+    ends = pd.DatetimeIndex(profiles["timestamp"]) + pd.Timedelta(minutes=minutes - 1)
+    labels = ends.strftime('"=""%Y-%m-%d %H:%M"""').to_numpy(dtype=str)
+    columns = [
+        _format_values(profiles[name])
+        for name in ("pobor_przed", "oddanie_przed", "pobor", "oddanie")
+    ]
+    if unsettled_tail:
+        for column in columns:
+            column[-unsettled_tail:] = "---"
+    rows = labels
+    for column in columns:
+        rows = np.char.add(np.char.add(rows, ';"'), np.char.add(column, '"'))
+    text = HEADER + "\n" + "\n".join(rows.tolist()) + "\n"
+    raw = text.encode("ascii")
+    if not nul_bytes:
+        return raw
+    interleaved = np.zeros(2 * len(raw), dtype=np.uint8)
+    interleaved[0::2] = np.frombuffer(raw, dtype=np.uint8)
+    return interleaved.tobytes()
+
+
+def write_dataset(
+    directory: Path,
+    years: Sequence[int],
+    resolution: str = "1h",
+    seed: int = 0,
+    nul_bytes: bool = True,
+    customer_id: str = DEFAULT_CUSTOMER_ID,
+) -> List[Path]:
+    """Zapisuje po jednym pliku na rok, nazwanym jak pliki z enea-downloader."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for year in years:
+        path = directory / f"{customer_id}_dane_dobowo_godzinowe_{year}.csv"
+        path.write_bytes(
+            render_enea_csv(
+                generate_profiles(year, resolution, seed), resolution, nul_bytes
+            )
+        )
+        paths.append(path)
+    return paths
+
+
+def generate_rce_days(
+    start: date, end: date, seed: int = 0
+) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Syntetyczne rekordy API RCE (96 kwadransów na dzień, zł/MWh) dla dni od
+    start do end włącznie - w formacie przyjmowanym przez
+    RcePriceStore.store_days. Ceny są niskie w południe i wysokie wieczorem.
+    """
+    rng = np.random.default_rng(seed)
+    quarter_hours = np.arange(96) / 4
+    day = start
+    while day <= end:
+        prices = (
+            420
+            - 260 * np.exp(-0.5 * ((quarter_hours - 12.5) / 2.5) ** 2)
+            + 280 * np.exp(-0.5 * ((quarter_hours - 19.0) / 1.5) ** 2)
+            + rng.normal(0, 35, size=96)
+        )
+        base = np.datetime64(day.isoformat(), "m")
+        records = [
+            {
+                "dtime": str(base + np.timedelta64(15 * (i + 1), "m")).replace(
+                    "T", " "
+                ),
+                "rce_pln": round(float(price), 2),
+            }
+            for i, price in enumerate(prices)
+        ]
+        yield day.isoformat(), records
+        day += timedelta(days=1)
+
+
+def default_years(count: int, last_year: Optional[int] = None) -> List[int]:
+    """count kolejnych pełnych lat kończących się na last_year (domyślnie 2024)."""
+    last_year = last_year or 2024
+    return list(range(last_year - count + 1, last_year + 1))
@@ -1,56 +1,240 @@
 import argparse
+import functools
 import glob
 import gettext
+import importlib
 import locale
 import os
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from . import profiling
+from .periods import PREDEFINED_PERIODS
+
+if TYPE_CHECKING:  # bound lazily at runtime, see _LAZY_IMPORTS
+    from .config import load_config
+    from .core import (
+        aggregate_daily_data,
+        analyze_daily_trends,
+        calculate_optimal_capacity,
+        compare_tariffs,
+        export_to_csv,
+        filter_data_by_date,
+        find_missing_hours,
+        print_analysis_summary,
+        print_capacity_sweep,
+        resolve_predefined_period,
+        run_capacity_sweep,
+        run_full_analysis,
+        run_rce_analysis,
+        run_tariff_comparison,
+    )
+    from .data_loader import load_from_enea_files
+    from .grid import evaluate_cost_grid, export_grid
+    from .price_fetcher import get_hourly_rce_price_arrays
+    from .result_cache import ResultCache, open_result_cache
+    from .scenarios import (
+        export_scenario_results,
+        load_scenarios,
+        print_scenario_results,
+        run_scenarios,
+    )
+    from .sensitivity import (
+        PriceSensitivity,
+        load_price_candidates,
+        parse_price_changes,
+        print_price_sensitivity,
+        run_price_sensitivity,
+    )
+    from .server import run_analysis_server
+    from .settlement import print_monthly_statement, run_monthly_settlement
+    from .sizing import optimize_storage_capacity, print_sizing_result
+    from .tariffs import TariffManager
+
+# Analysis modules pull in pandas, numpy, holidays and requests, so they are
+# imported only once arguments are parsed (see _import_analysis_modules) -
+# `--help` and argument errors do not pay for them. Attribute access on this
+# module (e.g. unittest.mock.patch("eanalizer.cli.load_config")) still works
+# through the module-level __getattr__ below.
+_LAZY_IMPORTS = {
+    "load_config": ".config",
+    "aggregate_daily_data": ".core",
+    "analyze_daily_trends": ".core",
+    "calculate_optimal_capacity": ".core",
+    "compare_tariffs": ".core",
+    "export_to_csv": ".core",
+    "filter_data_by_date": ".core",
+    "find_missing_hours": ".core",
+    "print_analysis_summary": ".core",
+    "print_capacity_sweep": ".core",
+    "resolve_predefined_period": ".core",
+    "run_capacity_sweep": ".core",
+    "run_full_analysis": ".core",
+    "run_rce_analysis": ".core",
+    "run_tariff_comparison": ".core",
+    "load_from_enea_files": ".data_loader",
+    "evaluate_cost_grid": ".grid",
+    "export_grid": ".grid",
+    "get_hourly_rce_price_arrays": ".price_fetcher",
+    "ResultCache": ".result_cache",
+    "open_result_cache": ".result_cache",
+    "export_scenario_results": ".scenarios",
+    "load_scenarios": ".scenarios",
+    "print_scenario_results": ".scenarios",
+    "run_scenarios": ".scenarios",
+    "PriceSensitivity": ".sensitivity",
+    "load_price_candidates": ".sensitivity",
+    "parse_price_changes": ".sensitivity",
+    "print_price_sensitivity": ".sensitivity",
+    "run_price_sensitivity": ".sensitivity",
+    "run_analysis_server": ".server",
+    "print_monthly_statement": ".settlement",
+    "run_monthly_settlement": ".settlement",
+    "optimize_storage_capacity": ".sizing",
+    "print_sizing_result": ".sizing",
+    "TariffManager": ".tariffs",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __package__), name)
+    globals()[name] = value
+    return value
+
+
+def _import_analysis_modules():
+    """Binds all lazily imported names that are not bound (or patched) yet."""
+    for name in _LAZY_IMPORTS:
+        if name not in globals():
+            __getattr__(name)
 
-from .config import load_config
-from .core import (
-    PREDEFINED_PERIODS,
-    aggregate_daily_data,
-    analyze_daily_trends,
-    calculate_optimal_capacity,
-    export_to_csv,
-    filter_data_by_date,
-    find_missing_hours,
-    print_analysis_summary,
-    resolve_predefined_period,
-    run_full_analysis,
-    run_rce_analysis,
-    run_tariff_comparison,
-)
-from .data_loader import load_from_enea_csv
-from .price_fetcher import get_hourly_rce_prices
-from .tariffs import TariffManager
 
 # --- i18n setup ---
 APP_NAME = "eanalizer"
 LOCALE_DIR = Path(__file__).resolve().parent.parent / "locales"
 
-_ = gettext.gettext
-
-try:
-    # Attempt to set the locale from the user's environment
-    locale.setlocale(locale.LC_ALL, "")
-    # Get the language code
-    lang_code = locale.getlocale()[0]
-    if lang_code:
-        # e.g., 'en_US' -> 'en'
-        language = lang_code.split("_")[0]
-        # Find the .mo file
-        translation = gettext.translation(
-            APP_NAME, localedir=LOCALE_DIR, languages=[language]
-        )
-        _ = translation.gettext
-except (FileNotFoundError, locale.Error, IndexError):
-    # Fallback if the .mo file is not found, locale is not supported, or lang_code is empty
-    pass
+
+@functools.lru_cache(maxsize=None)
+def _translation():
+    """Sets up the locale and loads the translation on first use."""
+    try:
+        # Attempt to set the locale from the user's environment
+        locale.setlocale(locale.LC_ALL, "")
+        # Get the language code
+        lang_code = locale.getlocale()[0]
+        if lang_code:
+            # e.g., 'en_US' -> 'en'
+            language = lang_code.split("_")[0]
+            # Find the .mo file
+            return gettext.translation(
+                APP_NAME, localedir=LOCALE_DIR, languages=[language]
+            )
+    except (FileNotFoundError, locale.Error, IndexError):
+        # Fallback if the .mo file is not found, locale is not supported, or lang_code is empty
+        pass
+    return gettext.NullTranslations()
+
+
+def _(message: str) -> str:
+    return _translation().gettext(message)
 
 
 # --- end i18n setup ---
 
 
+def _capacity_range(value: str):
+    """Parses a START:STOP:STEP capacity range (in kWh, STOP inclusive)."""
+    try:
+        start, stop, step = (float(part) for part in value.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            _("Invalid capacity range '{}', expected START:STOP:STEP.").format(value)
+        )
+    if start < 0 or stop < start or step <= 0:
+        raise argparse.ArgumentTypeError(
+            _(
+                "Invalid capacity range '{}': requires 0 <= START <= STOP and STEP > 0."
+            ).format(value)
+        )
+    count = int((stop - start) / step + 1e-9) + 1
+    return [round(start + i * step, 6) for i in range(count)]
+
+
+def _cached(result_cache, kind, data, tariffs_file, compute, **params):
+    """Returns the stored result for these inputs, or computes and stores it."""
+    if result_cache is None:
+        return compute()
+    key = ResultCache.make_key(kind, data, tariffs_file, **params)
+    result = result_cache.get(key)
+    if result is None:
+        result = compute()
+        result_cache.put(key, result)
+    else:
+        print(_("(wynik z pamięci podręcznej, --bez-cache wymusza ponowne obliczenie)"))
+    return result
+
+
+def run_scenario_file(path, all_energy_data, app_cfg, args):
+    """Runs the --scenariusze file against the already loaded data."""
+    try:
+        scenarios = load_scenarios(path)
+    except (OSError, ValueError) as e:
+        print(_("Błąd pliku scenariuszy: {}").format(e))
+        return
+    if not len(all_energy_data):
+        print(_("No data in the given date range for further analysis."))
+        return
+    min_timestamp, max_timestamp = all_energy_data.time_range()
+    with profiling.stage("taryfy (TariffManager)"):
+        tariff_manager = TariffManager(
+            str(app_cfg.tariffs_file),
+            years=range(min_timestamp.year, max_timestamp.year + 1),
+        )
+    try:
+        with profiling.stage("scenariusze", records=len(scenarios)):
+            results = run_scenarios(all_energy_data, tariff_manager, scenarios)
+    except ValueError as e:
+        print(_("Błąd pliku scenariuszy: {}").format(e))
+        return
+    print_scenario_results(results)
+    if args.eksport_scenariuszy:
+        with profiling.stage("eksport", records=len(results)):
+            export_scenario_results(results, args.eksport_scenariuszy)
+
+
+def run_price_sensitivity_mode(
+    data, tariff_manager, args, capacity, net_metering_ratio, storage_efficiency
+):
+    """Prices the --zmiany-cen/--ceny-kandydujace scenarios on one simulation."""
+    with profiling.stage("symulacja", records=len(data)):
+        sensitivity = PriceSensitivity(
+            data,
+            tariff_manager,
+            args.taryfa,
+            capacity=capacity,
+            net_metering_ratio=net_metering_ratio,
+            storage_efficiency=storage_efficiency,
+        )
+    try:
+        if args.ceny_kandydujace:
+            scenarios = load_price_candidates(args.ceny_kandydujace, sensitivity)
+        else:
+            scenarios = parse_price_changes(args.zmiany_cen, sensitivity)
+    except (OSError, ValueError) as e:
+        print(_("Błąd scenariuszy cen: {}").format(e))
+        return
+    with profiling.stage("wrazliwosc cen", records=len(scenarios.names)):
+        results = run_price_sensitivity(sensitivity, scenarios)
+    print_price_sensitivity(results, args.taryfa, capacity, net_metering_ratio)
+    if args.eksport_wrazliwosci:
+        with profiling.stage("eksport", records=len(results)):
+            export_to_csv(results, args.eksport_wrazliwosci)
+
+
 def main():
     """Glowna funkcja uruchomieniowa dla CLI."""
     parser = argparse.ArgumentParser(description=_("Energy data analyzer."))
@@ -104,6 +288,128 @@ def main():
         type=float,
         help=_("Capacity of the physical storage in kWh (e.g., 10.0)."),
     )
+    parser.add_argument(
+        "--magazyn-zakres",
+        type=_capacity_range,
+        metavar="START:STOP:KROK",
+        help=_(
+            "Simulates a whole range of storage capacities in kWh in one pass "
+            "(e.g., 0:20:0.5) and prints a cost/savings table per capacity."
+        ),
+    )
+    parser.add_argument(
+        "--eksport-zakresu",
+        help=_(
+            "Path to the CSV file with the cost/savings table of --magazyn-zakres "
+            "(or the capacities evaluated by --optymalizuj-magazyn)."
+        ),
+    )
+    parser.add_argument(
+        "--siatka-kosztow",
+        metavar="PLIK",
+        help=_(
+            "Evaluates the cost grid: capacities from --magazyn-zakres x "
+            "--sprawnosci x --taryfy x --wspolczynniki-netmetering, in parallel "
+            "processes, and saves it as one long table (.parquet or CSV)."
+        ),
+    )
+    parser.add_argument(
+        "--sprawnosci",
+        type=float,
+        nargs="+",
+        metavar="SPRAWNOSC",
+        help=_(
+            "Storage efficiencies for --siatka-kosztow (default: "
+            "--sprawnosc-magazynu)."
+        ),
+    )
+    parser.add_argument(
+        "--taryfy",
+        nargs="+",
+        metavar="TARYFA",
+        help=_("Tariffs for --siatka-kosztow (default: all available tariffs)."),
+    )
+    parser.add_argument(
+        "--wspolczynniki-netmetering",
+        type=float,
+        nargs="+",
+        metavar="WSPOLCZYNNIK",
+        help=_(
+            "Net-metering ratios for --siatka-kosztow; 0 means no net-metering "
+            "(default: 0, or --wspolczynnik-netmetering with --z-netmetering)."
+        ),
+    )
+    parser.add_argument(
+        "--procesy",
+        type=int,
+        metavar="N",
+        help=_("Number of worker processes for --siatka-kosztow (default: all cores)."),
+    )
+    parser.add_argument(
+        "--optymalizuj-magazyn",
+        action="store_true",
+        help=_(
+            "Searches the storage capacity by simulation: minimizes the total cost "
+            "including the storage price (--cena-magazynu) or finds the smallest "
+            "capacity reaching --cel-samowystarczalnosci."
+        ),
+    )
+    parser.add_argument(
+        "--cena-magazynu",
+        type=float,
+        metavar="ZL",
+        help=_(
+            "Annualized storage price in PLN per kWh of capacity per year, "
+            "used by --optymalizuj-magazyn (default: 0)."
+        ),
+    )
+    parser.add_argument(
+        "--cel-samowystarczalnosci",
+        type=float,
+        metavar="PROCENT",
+        help=_(
+            "Target self-sufficiency in percent for --optymalizuj-magazyn: the "
+            "share of the pre-balancing grid consumption covered by balancing "
+            "and the storage."
+        ),
+    )
+    parser.add_argument(
+        "--magazyn-max",
+        type=float,
+        metavar="KWH",
+        help=_(
+            "Upper bound of the --optymalizuj-magazyn search in kWh (default: "
+            "the largest daily grid consumption)."
+        ),
+    )
+    parser.add_argument(
+        "--zmiany-cen",
+        nargs="+",
+        metavar="SCENARIUSZ",
+        help=_(
+            "Price what-if scenarios for --taryfa, evaluated on a single "
+            "simulation, e.g. 'szczytowa=+15%%' or "
+            "'*.dystrybucja=-5%%,oplata=60' (ZONE[.energia|.dystrybucja] or "
+            "'oplata' = percent change or new price)."
+        ),
+    )
+    parser.add_argument(
+        "--ceny-kandydujace",
+        metavar="PLIK",
+        help=_(
+            "CSV file with candidate prices for --taryfa (columns scenariusz, "
+            "zone_name, energy_price, dist_price, optional dist_fee), all "
+            "evaluated on a single simulation."
+        ),
+    )
+    parser.add_argument(
+        "--eksport-wrazliwosci",
+        metavar="PLIK",
+        help=_(
+            "Path to the CSV file with the cost table of --zmiany-cen/"
+            "--ceny-kandydujace."
+        ),
+    )
     parser.add_argument(
         "--sprawnosc-magazynu",
         type=float,
@@ -142,11 +448,82 @@ def main():
         choices=[0.7, 0.8],
         help=_("Coefficient for energy returned in net-metering (default: 0.8)."),
     )
+    parser.add_argument(
+        "--rozliczenie-miesieczne",
+        action="store_true",
+        help=_(
+            "Prints a month-by-month statement of the single analysis: each "
+            "month is settled separately and net-metering credit is used "
+            "oldest first and expires after 12 months."
+        ),
+    )
+    parser.add_argument(
+        "--eksport-rozliczenia",
+        metavar="PLIK",
+        help=_("Path to the CSV file with the --rozliczenie-miesieczne statement."),
+    )
     parser.add_argument(
         "--porownaj-taryfy",
         action="store_true",
         help=_("Runs a comparison of all available tariffs for the given period."),
     )
+    parser.add_argument(
+        "--bez-cache",
+        action="store_true",
+        help=_(
+            "Always recomputes the analysis instead of reusing a stored result "
+            "for the same data, tariffs file and parameters."
+        ),
+    )
+    parser.add_argument(
+        "--scenariusze",
+        metavar="PLIK",
+        help=_(
+            "Runs all scenarios (tariff, date range, capacity, efficiency, "
+            "net-metering) from a JSON or YAML file against a single load of "
+            "the data and prints one result table."
+        ),
+    )
+    parser.add_argument(
+        "--eksport-scenariuszy",
+        metavar="PLIK",
+        help=_(
+            "Path to the file with the --scenariusze result table "
+            "(.json for JSON, CSV otherwise)."
+        ),
+    )
+    parser.add_argument(
+        "--serwer",
+        action="store_true",
+        help=_(
+            "Starts a long-running server on 127.0.0.1 that keeps the data and "
+            "tariffs in memory and answers JSON analysis requests "
+            "(GET /status, POST /analiza)."
+        ),
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help=_("Port of the --serwer mode (default: 8765)."),
+    )
+    parser.add_argument(
+        "--profil",
+        nargs="?",
+        const="-",
+        metavar="PLIK.json",
+        help=_(
+            "Measures the time and records per second of each stage (file "
+            "loading, sorting, filtering, simulation, export, ...) and prints "
+            "the report to stderr, or saves it as JSON to the given file. Can "
+            "also be enabled with the EANALIZER_PROFIL environment variable."
+        ),
+    )
+    parser.add_argument(
+        "--profil-cprofile",
+        metavar="PLIK.prof",
+        help=_("Saves cProfile statistics of the whole run to the given file."),
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -169,9 +546,141 @@ def main():
         )
     if args.ostatnie_dni is not None and args.ostatnie_dni <= 0:
         parser.error(_("--ostatnie-dni musi być liczbą całkowitą dodatnią."))
+    if args.magazyn_zakres is not None and args.magazyn_fizyczny is not None:
+        parser.error(
+            _("Nie można jednocześnie użyć --magazyn-zakres i --magazyn-fizyczny.")
+        )
+
+    if args.optymalizuj_magazyn and (
+        args.magazyn_zakres is not None or args.magazyn_fizyczny is not None
+    ):
+        parser.error(
+            _(
+                "Nie można jednocześnie użyć --optymalizuj-magazyn i "
+                "--magazyn-fizyczny/--magazyn-zakres."
+            )
+        )
+    if not args.optymalizuj_magazyn and (
+        args.cena_magazynu is not None
+        or args.cel_samowystarczalnosci is not None
+        or args.magazyn_max is not None
+    ):
+        parser.error(
+            _(
+                "Flagi --cena-magazynu/--cel-samowystarczalnosci/--magazyn-max "
+                "wymagają --optymalizuj-magazyn."
+            )
+        )
+    if args.cena_magazynu is not None and args.cena_magazynu < 0:
+        parser.error(_("--cena-magazynu nie może być ujemna."))
+    if args.cel_samowystarczalnosci is not None and not (
+        0 < args.cel_samowystarczalnosci <= 100
+    ):
+        parser.error(_("--cel-samowystarczalnosci musi być z zakresu (0, 100]."))
+    if args.magazyn_max is not None and args.magazyn_max <= 0:
+        parser.error(_("--magazyn-max musi być liczbą dodatnią."))
+
+    if args.siatka_kosztow is not None:
+        if args.magazyn_zakres is None:
+            parser.error(_("--siatka-kosztow wymaga podania --magazyn-zakres."))
+        if args.optymalizuj_magazyn:
+            parser.error(
+                _(
+                    "Nie można jednocześnie użyć --siatka-kosztow i --optymalizuj-magazyn."
+                )
+            )
+    elif (
+        args.sprawnosci is not None
+        or args.taryfy is not None
+        or args.wspolczynniki_netmetering is not None
+        or args.procesy is not None
+    ):
+        parser.error(
+            _(
+                "Flagi --sprawnosci/--taryfy/--wspolczynniki-netmetering/--procesy "
+                "wymagają --siatka-kosztow."
+            )
+        )
+    if args.procesy is not None and args.procesy <= 0:
+        parser.error(_("--procesy musi być liczbą całkowitą dodatnią."))
+
+    price_sensitivity = args.zmiany_cen is not None or args.ceny_kandydujace
+    if price_sensitivity and (
+        args.magazyn_zakres is not None or args.optymalizuj_magazyn
+    ):
+        parser.error(
+            _(
+                "Nie można jednocześnie użyć --zmiany-cen/--ceny-kandydujace i "
+                "--magazyn-zakres/--optymalizuj-magazyn."
+            )
+        )
+    if args.zmiany_cen is not None and args.ceny_kandydujace:
+        parser.error(
+            _("Nie można jednocześnie użyć --zmiany-cen i --ceny-kandydujace.")
+        )
+    if args.eksport_wrazliwosci and not price_sensitivity:
+        parser.error(
+            _("--eksport-wrazliwosci wymaga --zmiany-cen lub --ceny-kandydujace.")
+        )
+
+    if args.eksport_rozliczenia and not args.rozliczenie_miesieczne:
+        parser.error(_("--eksport-rozliczenia wymaga --rozliczenie-miesieczne."))
+    if args.rozliczenie_miesieczne and (
+        args.z_cenami_rce
+        or args.porownaj_taryfy
+        or args.magazyn_zakres is not None
+        or args.optymalizuj_magazyn
+        or price_sensitivity
+    ):
+        parser.error(
+            _(
+                "--rozliczenie-miesieczne działa tylko z pojedynczą analizą (bez "
+                "--z-cenami-rce/--porownaj-taryfy/--magazyn-zakres/"
+                "--optymalizuj-magazyn/--zmiany-cen/--ceny-kandydujace)."
+            )
+        )
+
+    if args.scenariusze and args.serwer:
+        parser.error(_("Nie można jednocześnie użyć --scenariusze i --serwer."))
+
+    _import_analysis_modules()
+    target = profiling.profile_target(args.profil)
+    profiler = profiling.enable() if target is not None else None
+    cprofile = None
+    if args.profil_cprofile:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    try:
+        _run(args)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(args.profil_cprofile)
+            print(
+                _("cProfile statistics saved to: {}").format(args.profil_cprofile),
+                file=sys.stderr,
+            )
+        if profiler is not None:
+            profiling.disable()
+            profiler.emit(target)
 
+
+def _run(args):
+    """Runs the analysis selected by the parsed command-line arguments."""
     app_cfg = load_config()
 
+    if args.serwer:
+        run_analysis_server(
+            args.pliki
+            or (args.katalog if args.katalog is not None else app_cfg.data_dir),
+            app_cfg.tariffs_file,
+            cache_dir=app_cfg.cache_dir,
+            port=args.port,
+        )
+        return
+
     # Data loading
     files_to_process = []
     if args.pliki:
@@ -187,12 +696,15 @@ def main():
         return
 
     print(_("Found {} files to process:").format(len(files_to_process)))
-    all_energy_data = []
-    for file_path in files_to_process:
-        all_energy_data.extend(load_from_enea_csv(file_path))
-    all_energy_data.sort(key=lambda x: x.timestamp)
+    all_energy_data = load_from_enea_files(
+        files_to_process, cache_dir=app_cfg.cache_dir
+    )
     print(_("\nTotal loaded {} records.").format(len(all_energy_data)))
 
+    if args.scenariusze:
+        run_scenario_file(args.scenariusze, all_energy_data, app_cfg, args)
+        return
+
     if args.okres or args.ostatnie_dni is not None:
         try:
             args.data_start, args.data_koniec = resolve_predefined_period(
@@ -208,20 +720,23 @@ def main():
         )
 
     # Data filtering
-    filtered_data = filter_data_by_date(
-        all_energy_data, args.data_start, args.data_koniec
-    )
-    if not filtered_data:
+    with profiling.stage("filtrowanie", records=len(all_energy_data)):
+        filtered_data = filter_data_by_date(
+            all_energy_data, args.data_start, args.data_koniec
+        )
+    if not len(filtered_data):
         print(_("No data in the given date range for further analysis."))
         return
     if args.data_start or args.data_koniec:
-        find_missing_hours(filtered_data, args.data_start, args.data_koniec)
+        with profiling.stage("brakujace godziny", records=len(filtered_data)):
+            find_missing_hours(filtered_data, args.data_start, args.data_koniec)
 
-    min_year = min(d.timestamp.year for d in filtered_data)
-    max_year = max(d.timestamp.year for d in filtered_data)
-    tariff_manager = TariffManager(
-        str(app_cfg.tariffs_file), years=range(min_year, max_year + 1)
-    )
+    min_timestamp, max_timestamp = filtered_data.time_range()
+    min_year, max_year = min_timestamp.year, max_timestamp.year
+    with profiling.stage("taryfy (TariffManager)"):
+        tariff_manager = TariffManager(
+            str(app_cfg.tariffs_file), years=range(min_year, max_year + 1)
+        )
 
     # Determine analysis parameters
     net_metering_ratio = args.wspolczynnik_netmetering if args.z_netmetering else None
@@ -232,6 +747,8 @@ def main():
     )
     storage_efficiency = args.sprawnosc_magazynu
 
+    result_cache = None if args.bez_cache else open_result_cache(app_cfg.cache_dir)
+
     # --- Main analysis logic ---
     if args.z_cenami_rce:
         if capacity > 0 or net_metering_ratio is not None:
@@ -253,12 +770,13 @@ def main():
                     "obliczania optymalnego magazynu; te opcje zostaną zignorowane."
                 )
             )
-        start_date = filtered_data[0].timestamp
-        end_date = filtered_data[-1].timestamp
-        hourly_prices = get_hourly_rce_prices(
-            start_date, end_date, cache_dir=app_cfg.cache_dir
-        )
-        run_rce_analysis(filtered_data, hourly_prices)
+        start_date, end_date = min_timestamp, max_timestamp
+        with profiling.stage("ceny RCE"):
+            hourly_prices = get_hourly_rce_price_arrays(
+                start_date, end_date, cache_dir=app_cfg.cache_dir
+            )
+        with profiling.stage("analiza RCE", records=len(filtered_data)):
+            run_rce_analysis(filtered_data, hourly_prices)
     elif args.porownaj_taryfy:
         if (
             args.oblicz_optymalny_magazyn
@@ -271,6 +789,27 @@ def main():
                     "obliczania optymalnego magazynu; te opcje zostaną zignorowane."
                 )
             )
+
+        def compute_comparison():
+            with profiling.stage("symulacja", records=len(filtered_data)):
+                return compare_tariffs(
+                    filtered_data,
+                    tariff_manager,
+                    capacity,
+                    net_metering_ratio,
+                    storage_efficiency,
+                )
+
+        summaries = _cached(
+            result_cache,
+            "porownanie",
+            filtered_data,
+            app_cfg.tariffs_file,
+            compute_comparison,
+            capacity=capacity,
+            net_metering_ratio=net_metering_ratio,
+            storage_efficiency=storage_efficiency,
+        )
         run_tariff_comparison(
             data=filtered_data,
             tariff_manager=tariff_manager,
@@ -278,34 +817,198 @@ def main():
             net_metering_ratio=net_metering_ratio,
             storage_efficiency=storage_efficiency,
             verbose=args.verbose,
+            summaries=summaries,
+        )
+    elif args.siatka_kosztow is not None:
+        if (
+            args.oblicz_optymalny_magazyn
+            or args.eksport_dzienny
+            or args.eksport_symulacji
+        ):
+            print(
+                _(
+                    "Uwaga: tryb --siatka-kosztow nie obsługuje eksportu danych "
+                    "godzinowych/dziennych ani obliczania optymalnego magazynu; te "
+                    "opcje zostaną zignorowane."
+                )
+            )
+        efficiencies = args.sprawnosci or [storage_efficiency]
+        tariffs = args.taryfy or tariff_manager.get_all_tariffs()
+        if args.wspolczynniki_netmetering is not None:
+            ratios = [r if r > 0 else None for r in args.wspolczynniki_netmetering]
+        else:
+            ratios = [net_metering_ratio]
+        with profiling.stage(
+            "symulacja",
+            records=len(filtered_data) * len(args.magazyn_zakres) * len(efficiencies),
+        ):
+            grid_df = evaluate_cost_grid(
+                filtered_data,
+                tariff_manager,
+                capacities=args.magazyn_zakres,
+                efficiencies=efficiencies,
+                tariffs=tariffs,
+                net_metering_ratios=ratios,
+                workers=args.procesy,
+            )
+        with profiling.stage("eksport", records=len(grid_df)):
+            export_grid(grid_df, args.siatka_kosztow)
+    elif args.magazyn_zakres is not None:
+        if (
+            args.oblicz_optymalny_magazyn
+            or args.eksport_dzienny
+            or args.eksport_symulacji
+        ):
+            print(
+                _(
+                    "Uwaga: tryb --magazyn-zakres nie obsługuje eksportu danych "
+                    "godzinowych/dziennych ani obliczania optymalnego magazynu; te "
+                    "opcje zostaną zignorowane."
+                )
+            )
+        with profiling.stage(
+            "symulacja", records=len(filtered_data) * len(args.magazyn_zakres)
+        ):
+            sweep_df = run_capacity_sweep(
+                data=filtered_data,
+                capacities=args.magazyn_zakres,
+                tariff_manager=tariff_manager,
+                tariff=args.taryfa,
+                net_metering_ratio=net_metering_ratio,
+                storage_efficiency=storage_efficiency,
+            )
+        print_capacity_sweep(
+            sweep_df, args.taryfa, storage_efficiency, net_metering_ratio
+        )
+        if args.eksport_zakresu:
+            with profiling.stage("eksport", records=len(sweep_df)):
+                export_to_csv(sweep_df, args.eksport_zakresu)
+    elif args.optymalizuj_magazyn:
+        if (
+            args.oblicz_optymalny_magazyn
+            or args.eksport_dzienny
+            or args.eksport_symulacji
+        ):
+            print(
+                _(
+                    "Uwaga: tryb --optymalizuj-magazyn nie obsługuje eksportu danych "
+                    "godzinowych/dziennych ani obliczania optymalnego magazynu; te "
+                    "opcje zostaną zignorowane."
+                )
+            )
+        storage_price = args.cena_magazynu or 0.0
+        with profiling.stage("symulacja", records=len(filtered_data)):
+            sizing = optimize_storage_capacity(
+                filtered_data,
+                tariff_manager,
+                args.taryfa,
+                net_metering_ratio=net_metering_ratio,
+                storage_efficiency=storage_efficiency,
+                storage_price=storage_price,
+                target_self_sufficiency=args.cel_samowystarczalnosci,
+                max_capacity=args.magazyn_max,
+            )
+        print_sizing_result(
+            sizing,
+            args.taryfa,
+            storage_efficiency,
+            net_metering_ratio,
+            storage_price=storage_price,
+            target_self_sufficiency=args.cel_samowystarczalnosci,
+        )
+        if args.eksport_zakresu and sizing is not None:
+            with profiling.stage("eksport", records=len(sizing.punkty)):
+                export_to_csv(sizing.punkty, args.eksport_zakresu)
+    elif args.zmiany_cen is not None or args.ceny_kandydujace:
+        if (
+            args.oblicz_optymalny_magazyn
+            or args.eksport_dzienny
+            or args.eksport_symulacji
+        ):
+            print(
+                _(
+                    "Uwaga: tryb --zmiany-cen/--ceny-kandydujace nie obsługuje "
+                    "eksportu danych godzinowych/dziennych ani obliczania "
+                    "optymalnego magazynu; te opcje zostaną zignorowane."
+                )
+            )
+        run_price_sensitivity_mode(
+            filtered_data,
+            tariff_manager,
+            args,
+            capacity,
+            net_metering_ratio,
+            storage_efficiency,
         )
     else:
         # Single analysis run
-        summary, simulation_df = run_full_analysis(
-            data=filtered_data,
-            capacity=capacity,
-            tariff_manager=tariff_manager,
+        simulation_df = None
+
+        def compute_summary():
+            nonlocal simulation_df
+            with profiling.stage("symulacja", records=len(filtered_data)):
+                summary, simulation_df = run_full_analysis(
+                    data=filtered_data,
+                    capacity=capacity,
+                    tariff_manager=tariff_manager,
+                    tariff=args.taryfa,
+                    net_metering_ratio=net_metering_ratio,
+                    storage_efficiency=storage_efficiency,
+                )
+            return summary
+
+        # The hourly simulation export needs the full run, not just the summary
+        summary = _cached(
+            None if args.eksport_symulacji else result_cache,
+            "analiza",
+            filtered_data,
+            app_cfg.tariffs_file,
+            compute_summary,
             tariff=args.taryfa,
+            capacity=capacity,
             net_metering_ratio=net_metering_ratio,
             storage_efficiency=storage_efficiency,
         )
         print_analysis_summary(summary, capacity, args.taryfa, net_metering_ratio)
 
         # Post-analysis actions for single run
-        daily_data_df = aggregate_daily_data(filtered_data)
-        analyze_daily_trends(daily_data_df)
+        with profiling.stage("agregacja dzienna", records=len(filtered_data)):
+            daily_data_df = aggregate_daily_data(filtered_data)
+            analyze_daily_trends(daily_data_df)
+
+        if args.rozliczenie_miesieczne:
+            with profiling.stage("rozliczenie miesieczne", records=len(filtered_data)):
+                statement = run_monthly_settlement(
+                    filtered_data,
+                    capacity,
+                    tariff_manager,
+                    args.taryfa,
+                    net_metering_ratio=net_metering_ratio,
+                    storage_efficiency=storage_efficiency,
+                )
+            print_monthly_statement(statement, args.taryfa, net_metering_ratio)
+            if args.eksport_rozliczenia:
+                with profiling.stage("eksport", records=len(statement)):
+                    export_to_csv(statement, args.eksport_rozliczenia)
 
         if args.oblicz_optymalny_magazyn:
-            calculate_optimal_capacity(
-                filtered_data, daily_data_df, tariff_manager, args.taryfa
-            )
+            with profiling.stage("optymalny magazyn", records=len(filtered_data)):
+                calculate_optimal_capacity(
+                    filtered_data, daily_data_df, tariff_manager, args.taryfa
+                )
 
         if args.eksport_dzienny:
-            export_to_csv(daily_data_df, args.eksport_dzienny)
+            with profiling.stage("eksport", records=len(daily_data_df)):
+                export_to_csv(daily_data_df, args.eksport_dzienny)
 
         if args.eksport_symulacji and simulation_df is not None:
-            export_to_csv(simulation_df, args.eksport_symulacji)
+            with profiling.stage("eksport", records=len(simulation_df)):
+                export_to_csv(simulation_df, args.eksport_symulacji)
 
 
 if __name__ == "__main__":
+    # Import dopiero tutaj, by nie spowalniać importu eanalizer.cli
+    import multiprocessing
+
+    multiprocessing.freeze_support()
     main()
@@ -7,7 +7,6 @@ from pathlib import Path
 from typing import Optional
 
 import platformdirs
-import requests
 
 from . import enea_auth
 
@@ -70,6 +69,16 @@ class AppConfig:
             parser.write(f)
 
 
+def __getattr__(name):
+    # `requests` is imported only when credentials are verified; this keeps
+    # eanalizer.config.requests (used e.g. by tests patching Session) valid.
+    if name == "requests":
+        import requests
+
+        return requests
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _get_dev_root() -> Optional[Path]:
     """
     Returns the repository root if this package is running from an
@@ -146,6 +155,8 @@ def _prompt_for_paths(config_file_path: Path) -> dict:
 
 def _prompt_for_enea_credentials() -> dict:
     """Interactively prompts the user for Enea credentials and verifies them."""
+    import requests
+
     print("\nProsze podac swoje dane logowania do https://ebok.enea.pl/logowanie")
     email = input("Email: ")
     password = getpass.getpass("Haslo: ")
@@ -1,112 +1,79 @@
-from typing import List, Optional, Dict, Tuple, Any
+from typing import List, Optional, Dict, Tuple, Any, Union
 from datetime import datetime, date, timedelta
-from .models import EnergyData, SimulationResult
-from .tariffs import TariffManager
+from .models import EnergyData, EnergySeries
+from .periods import PREDEFINED_PERIODS  # noqa: F401 - re-eksport
+from .simulation import simulate_storage, simulate_storage_sweep
+from .tariffs import NO_ZONE, NUM_DAY_HOUR_BINS, CompiledTariff, TariffManager
+import numpy as np
 import pandas as pd
 
+# Core functions accept the columnar EnergySeries; a plain List[EnergyData]
+# is still accepted for backward compatibility and converted on entry.
+EnergyDataLike = Union[EnergySeries, List[EnergyData]]
 
-def run_full_analysis(
-    data: List[EnergyData],
-    capacity: float,
+
+def _num_months(data: EnergySeries) -> int:
+    first, last = data[0].timestamp, data[-1].timestamp
+    return (last.year - first.year) * 12 + (last.month - first.month) + 1
+
+
+def _zone_stats_from_bins(
+    compiled: CompiledTariff,
+    pobor_bins: np.ndarray,
+    oddanie_bins: np.ndarray,
+    first_hour_of_bin: np.ndarray,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Builds per-zone statistics from grid flows summed per (day_type, hour) bin
+    (see TariffManager.day_hour_bins). Each bin has a single price within a
+    tariff, so the zone cost is exact. Zones are ordered by their first
+    appearance in the data (first_hour_of_bin holds the index of the first
+    hour falling into each bin, or -1 for empty bins) and the zone price is
+    the price of its first hour.
+    """
+    zone_of_bin = compiled.zone_table.ravel()
+    price_of_bin = (compiled.energy_table + compiled.dist_table).ravel()
+    used = (zone_of_bin != NO_ZONE) & (first_hour_of_bin >= 0)
+
+    first_bin_of_zone: Dict[int, int] = {}
+    for b in np.flatnonzero(used)[np.argsort(first_hour_of_bin[used], kind="stable")]:
+        first_bin_of_zone.setdefault(int(zone_of_bin[b]), int(b))
+
+    strefy = {}
+    for zone_id, first_bin in first_bin_of_zone.items():
+        zone_bins = used & (zone_of_bin == zone_id)
+        strefy[compiled.zone_names[zone_id]] = {
+            "pobor_z_sieci": float(pobor_bins[zone_bins].sum()),
+            "oddanie_do_sieci": float(oddanie_bins[zone_bins].sum()),
+            "koszt_poboru": float(
+                (pobor_bins[zone_bins] * price_of_bin[zone_bins]).sum()
+            ),
+            "price": float(price_of_bin[first_bin]),
+        }
+    return strefy
+
+
+def _first_hour_of_bins(bins: np.ndarray) -> np.ndarray:
+    """Index of the first hour in each (day_type, hour) bin, -1 for empty bins."""
+    first_hour = np.full(NUM_DAY_HOUR_BINS, -1, dtype=np.intp)
+    present, first_index = np.unique(bins, return_index=True)
+    first_hour[present] = first_index
+    return first_hour
+
+
+def _settle_summary(
+    strefy: Dict[str, Dict[str, float]],
     tariff_manager: TariffManager,
     tariff: str,
-    net_metering_ratio: Optional[float] = None,
-    storage_efficiency: float = 1.0,
-) -> Tuple[Dict[str, Any], Optional[pd.DataFrame]]:
+    num_months: int,
+    oryginalny_pobor: float,
+    net_metering_ratio: Optional[float],
+) -> Dict[str, Any]:
     """
-    Runs a universal analysis, simulating a physical storage of a given
-    capacity with a given efficiency.
-    A capacity of 0 means a standard analysis without storage.
-    Efficiency is applied during charging.
-    Returns a summary dictionary and an optional DataFrame with hourly results.
+    Settles the per-zone grid flows into a summary: net-metering credit
+    cascade (if enabled), fixed fees and the energy saved by the storage.
     """
-    if not data:
-        return {}, None
-
-    num_months = (
-        (data[-1].timestamp.year - data[0].timestamp.year) * 12
-        + (data[-1].timestamp.month - data[0].timestamp.month)
-        + 1
-    )
-
-    stan_magazynu = 0.0
-    wyniki_symulacji = []
-    stats: Dict[str, Any] = {"strefy": {}}
-
-    # Hourly simulation
-    for rekord in data:
-        pobor_z_magazynu, oddanie_do_magazynu, pobor_z_sieci, oddanie_do_sieci = (
-            0.0,
-            0.0,
-            0.0,
-            0.0,
-        )
-
-        # Bilansowanie godzinowe
-        if rekord.oddanie_przed > rekord.pobor_przed:
-            nadwyzka = rekord.oddanie_przed - rekord.pobor_przed
-
-            # Apply efficiency on charging
-            wolne_miejsce_netto = capacity - stan_magazynu
-            potrzebna_nadwyzka_brutto = (
-                wolne_miejsce_netto / storage_efficiency
-                if storage_efficiency > 0
-                else float("inf")
-            )
-
-            realna_nadwyzka_do_ladowania = min(nadwyzka, potrzebna_nadwyzka_brutto)
-            przyrost_stanu_magazynu = realna_nadwyzka_do_ladowania * storage_efficiency
-
-            stan_magazynu += przyrost_stanu_magazynu
-            oddanie_do_magazynu = realna_nadwyzka_do_ladowania
-            oddanie_do_sieci = nadwyzka - oddanie_do_magazynu
-
-            pobor_z_magazynu = 0.0
-            pobor_z_sieci = 0.0
-
-        elif rekord.pobor_przed > rekord.oddanie_przed:
-            niedobor = rekord.pobor_przed - rekord.oddanie_przed
-
-            # Discharging is 1:1
-            pobor_z_magazynu = min(niedobor, stan_magazynu)
-            stan_magazynu -= pobor_z_magazynu
-
-            oddanie_do_magazynu = 0.0
-            oddanie_do_sieci = 0.0
-            pobor_z_sieci = niedobor - pobor_z_magazynu
-
-        else:  # ideal self-consumption
-            pobor_z_sieci = 0.0
-            oddanie_do_sieci = 0.0
-            pobor_z_magazynu = 0.0
-            oddanie_do_magazynu = 0.0
-
-        zone, energy_price, dist_price = tariff_manager.get_zone_and_price(
-            rekord.timestamp, tariff
-        )
-        if zone:
-            price = energy_price + dist_price
-            if zone not in stats["strefy"]:
-                stats["strefy"][zone] = {
-                    "pobor_z_sieci": 0,
-                    "oddanie_do_sieci": 0,
-                    "koszt_poboru": 0,
-                    "price": price,
-                }
-            stats["strefy"][zone]["pobor_z_sieci"] += pobor_z_sieci
-            stats["strefy"][zone]["oddanie_do_sieci"] += oddanie_do_sieci
-            stats["strefy"][zone]["koszt_poboru"] += pobor_z_sieci * price
-
-        wyniki_symulacji.append(
-            SimulationResult(
-                timestamp=rekord.timestamp,
-                pobor_z_sieci=pobor_z_sieci,
-                oddanie_do_sieci=oddanie_do_sieci,
-                pobor_z_magazynu=pobor_z_magazynu,
-                oddanie_do_magazynu=oddanie_do_magazynu,
-                stan_magazynu=stan_magazynu,
-            )
-        )
+    stats: Dict[str, Any] = {"strefy": strefy}
 
     # Cost calculation based on aggregated zone data
     if net_metering_ratio is not None:
@@ -143,13 +110,164 @@ def run_full_analysis(
     if "calkowity_koszt" in stats:
         stats["calkowity_koszt"] += fixed_fee
 
-    oryginalny_pobor = sum(d.pobor_przed for d in data)
     calkowity_pobor_z_sieci = sum(
         zone_stats["pobor_z_sieci"] for zone_stats in stats["strefy"].values()
     )
     stats["oszczednosc"] = oryginalny_pobor - calkowity_pobor_z_sieci
+    return stats
+
+
+def run_full_analysis(
+    data: EnergyDataLike,
+    capacity: float,
+    tariff_manager: TariffManager,
+    tariff: str,
+    net_metering_ratio: Optional[float] = None,
+    storage_efficiency: float = 1.0,
+) -> Tuple[Dict[str, Any], Optional[pd.DataFrame]]:
+    """
+    Runs a universal analysis, simulating a physical storage of a given
+    capacity with a given efficiency.
+    A capacity of 0 means a standard analysis without storage.
+    Efficiency is applied during charging.
+    Returns a summary dictionary and an optional DataFrame with hourly results.
+    """
+    data = EnergySeries.from_data(data)
+    if not len(data):
+        return {}, None
+
+    # Hourly simulation on arrays (see eanalizer.simulation)
+    flows = simulate_storage(
+        data.pobor_przed, data.oddanie_przed, capacity, storage_efficiency
+    )
 
-    return stats, pd.DataFrame(wyniki_symulacji)
+    # Grid flows summed per (day_type, hour) bin, priced with the compiled tariff
+    bins = tariff_manager.day_hour_bins(data.timestamp)
+    strefy = _zone_stats_from_bins(
+        tariff_manager.compile_tariff(tariff),
+        np.bincount(bins, weights=flows.pobor_z_sieci, minlength=NUM_DAY_HOUR_BINS),
+        np.bincount(bins, weights=flows.oddanie_do_sieci, minlength=NUM_DAY_HOUR_BINS),
+        _first_hour_of_bins(bins),
+    )
+    stats = _settle_summary(
+        strefy,
+        tariff_manager,
+        tariff,
+        _num_months(data),
+        float(data.pobor_przed.sum()),
+        net_metering_ratio,
+    )
+
+    simulation_df = pd.DataFrame(
+        {
+            "timestamp": data.timestamp,
+            "pobor_z_sieci": flows.pobor_z_sieci,
+            "oddanie_do_sieci": flows.oddanie_do_sieci,
+            "pobor_z_magazynu": flows.pobor_z_magazynu,
+            "oddanie_do_magazynu": flows.oddanie_do_magazynu,
+            "stan_magazynu": flows.stan_magazynu,
+        }
+    )
+    return stats, simulation_df
+
+
+def run_capacity_sweep(
+    data: EnergyDataLike,
+    capacities,
+    tariff_manager: TariffManager,
+    tariff: str,
+    net_metering_ratio: Optional[float] = None,
+    storage_efficiency: float = 1.0,
+) -> pd.DataFrame:
+    """
+    Simulates the physical storage for a whole vector of capacities in a
+    single pass over the data (see simulate_storage_sweep) and returns a
+    cost/savings table with one row per capacity. Savings are relative to
+    the same analysis without storage.
+    """
+    data = EnergySeries.from_data(data)
+    capacities = np.asarray(capacities, dtype=np.float64)
+    if not len(data) or not len(capacities):
+        return pd.DataFrame()
+
+    bins = tariff_manager.day_hour_bins(data.timestamp)
+    # Capacity 0 is always simulated as the reference for the savings
+    sweep = simulate_storage_sweep(
+        data.pobor_przed,
+        data.oddanie_przed,
+        np.concatenate(([0.0], capacities)),
+        storage_efficiency,
+        bins=bins,
+        num_bins=NUM_DAY_HOUR_BINS,
+    )
+    compiled = tariff_manager.compile_tariff(tariff)
+    first_hour_of_bin = _first_hour_of_bins(bins)
+    num_months = _num_months(data)
+    oryginalny_pobor = float(data.pobor_przed.sum())
+
+    summaries = [
+        _settle_summary(
+            _zone_stats_from_bins(
+                compiled,
+                sweep.pobor_z_sieci[:, k],
+                sweep.oddanie_do_sieci[:, k],
+                first_hour_of_bin,
+            ),
+            tariff_manager,
+            tariff,
+            num_months,
+            oryginalny_pobor,
+            net_metering_ratio,
+        )
+        for k in range(len(sweep.capacities))
+    ]
+    reference_cost = summaries[0]["calkowity_koszt"]
+    rows = []
+    for capacity, summary in zip(capacities.tolist(), summaries[1:]):
+        strefy = summary["strefy"].values()
+        rows.append(
+            {
+                "pojemnosc_kwh": capacity,
+                "pobor_z_sieci_kwh": sum(z["pobor_z_sieci"] for z in strefy),
+                "oddanie_do_sieci_kwh": sum(z["oddanie_do_sieci"] for z in strefy),
+                "calkowity_koszt_zl": summary["calkowity_koszt"],
+                "oszczednosc_energii_kwh": summary["oszczednosc"],
+                "oszczednosc_zl": reference_cost - summary["calkowity_koszt"],
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def print_capacity_sweep(
+    sweep_df: pd.DataFrame,
+    tariff: str,
+    storage_efficiency: float,
+    net_metering_ratio: Optional[float],
+):
+    """Prints the cost/savings curve produced by run_capacity_sweep."""
+    if sweep_df.empty:
+        print("Brak wyników symulacji dla zakresu pojemności.")
+        return
+    print(
+        f"\n--- Koszt i oszczędności w zależności od pojemności magazynu "
+        f"(taryfa {tariff.upper()}, sprawność {int(storage_efficiency * 100)}%) ---"
+    )
+    if net_metering_ratio is not None:
+        print(f"Uwzględniono net-metering ze współczynnikiem {net_metering_ratio}")
+    print(
+        f"{'Pojemność':>10} {'Pobór z sieci':>14} {'Oddanie':>12} "
+        f"{'Koszt':>12} {'Oszczędność':>12} {'Oszczędność':>12}"
+    )
+    print(
+        f"{'[kWh]':>10} {'[kWh]':>14} {'[kWh]':>12} {'[zł]':>12} {'[kWh]':>12} {'[zł]':>12}"
+    )
+    for row in sweep_df.itertuples():
+        print(
+            f"{row.pojemnosc_kwh:>10.2f} {row.pobor_z_sieci_kwh:>14.3f} "
+            f"{row.oddanie_do_sieci_kwh:>12.3f} {row.calkowity_koszt_zl:>12.2f} "
+            f"{row.oszczednosc_energii_kwh:>12.3f} {row.oszczednosc_zl:>12.2f}"
+        )
+    print("---------------------------------------------")
 
 
 def print_analysis_summary(
@@ -212,19 +330,73 @@ def print_analysis_summary(
     print("---------------------------------------------")
 
 
+def compare_tariffs(
+    data: EnergyDataLike,
+    tariff_manager: TariffManager,
+    capacity: float,
+    net_metering_ratio: Optional[float] = None,
+    storage_efficiency: float = 1.0,
+    tariffs: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the run_full_analysis summary for each tariff (all available
+    tariffs by default). The storage flows do not depend on the tariff, so
+    they are simulated once and summed per (day_type, hour) bin; each tariff
+    is then priced from these 48 bins only.
+    """
+    data = EnergySeries.from_data(data)
+    if tariffs is None:
+        tariffs = tariff_manager.get_all_tariffs()
+    if not len(data):
+        return {tariff: {} for tariff in tariffs}
+
+    flows = simulate_storage(
+        data.pobor_przed, data.oddanie_przed, capacity, storage_efficiency
+    )
+    bins = tariff_manager.day_hour_bins(data.timestamp)
+    pobor_bins = np.bincount(
+        bins, weights=flows.pobor_z_sieci, minlength=NUM_DAY_HOUR_BINS
+    )
+    oddanie_bins = np.bincount(
+        bins, weights=flows.oddanie_do_sieci, minlength=NUM_DAY_HOUR_BINS
+    )
+    first_hour_of_bin = _first_hour_of_bins(bins)
+    num_months = _num_months(data)
+    oryginalny_pobor = float(data.pobor_przed.sum())
+
+    return {
+        tariff: _settle_summary(
+            _zone_stats_from_bins(
+                tariff_manager.compile_tariff(tariff),
+                pobor_bins,
+                oddanie_bins,
+                first_hour_of_bin,
+            ),
+            tariff_manager,
+            tariff,
+            num_months,
+            oryginalny_pobor,
+            net_metering_ratio,
+        )
+        for tariff in tariffs
+    }
+
+
 def run_tariff_comparison(
-    data: List[EnergyData],
+    data: EnergyDataLike,
     tariff_manager: TariffManager,
     capacity: float,
     net_metering_ratio: Optional[float],
     storage_efficiency: float,
     verbose: bool = False,
+    summaries: Optional[Dict[str, Dict[str, Any]]] = None,
 ):
     """
     Calculates and prints the cost for all available tariffs, with or without
-    a physical storage simulation.
+    a physical storage simulation. Precomputed compare_tariffs results (e.g.
+    from the result cache) can be passed as summaries.
     """
-    all_tariffs = tariff_manager.get_all_tariffs()
+    data = EnergySeries.from_data(data)
     results = {}
     breakdown = {}
     header = "--- Porównanie taryf ---"
@@ -237,15 +409,11 @@ def run_tariff_comparison(
             "Tryb szczegółowy włączony. Pokazywanie pełnej analizy dla każdej taryfy."
         )
 
-    for tariff in all_tariffs:
-        summary, _ = run_full_analysis(
-            data,
-            capacity,
-            tariff_manager,
-            tariff,
-            net_metering_ratio,
-            storage_efficiency,
+    if summaries is None:
+        summaries = compare_tariffs(
+            data, tariff_manager, capacity, net_metering_ratio, storage_efficiency
         )
+    for tariff, summary in summaries.items():
         if verbose:
             print_analysis_summary(summary, capacity, tariff, net_metering_ratio)
 
@@ -288,38 +456,162 @@ def run_tariff_comparison(
     return results
 
 
-def run_rce_analysis(data: List[EnergyData], hourly_prices: Dict[datetime, float]):
-    if not data or not hourly_prices:
+# Ceny RCE: słownik {godzina: cena} albo para tablic (godziny datetime64[h], ceny)
+# zwracana przez price_fetcher.get_hourly_rce_price_arrays.
+RcePrices = Union[Dict[datetime, float], Tuple[np.ndarray, np.ndarray]]
+
+# Ile okresów bez cen RCE wypisywać w ostrzeżeniu, zanim lista zostanie skrócona.
+MAX_REPORTED_RCE_GAPS = 10
+
+
+def _rce_price_arrays(hourly_prices: RcePrices) -> Tuple[np.ndarray, np.ndarray]:
+    """Sprowadza ceny RCE do posortowanych tablic (indeks godziny int64, cena)."""
+    if isinstance(hourly_prices, dict):
+        hours = np.array(list(hourly_prices), dtype="datetime64[h]")
+        prices = np.fromiter(hourly_prices.values(), np.float64, len(hourly_prices))
+    else:
+        hours, prices = hourly_prices
+        hours = np.asarray(hours, dtype="datetime64[h]")
+        prices = np.asarray(prices, dtype=np.float64)
+    order = np.argsort(hours, kind="stable")
+    return hours[order].astype(np.int64), prices[order]
+
+
+def _hour_intervals(hours: np.ndarray) -> List[Tuple[datetime, datetime]]:
+    """Zamienia rosnące, unikalne indeksy godzin na listę ciągłych przedziałów."""
+    if not len(hours):
+        return []
+    breaks = np.flatnonzero(np.diff(hours) != 1) + 1
+    starts = np.concatenate(([hours[0]], hours[breaks]))
+    ends = np.concatenate((hours[breaks - 1], [hours[-1]]))
+    starts = starts.astype("datetime64[h]").astype("datetime64[us]").tolist()
+    ends = ends.astype("datetime64[h]").astype("datetime64[us]").tolist()
+    return list(zip(starts, ends))
+
+
+def _rce_breakdown(periods, index, pobor, oddanie, koszt, przychod, label):
+    count = len(periods)
+    return pd.DataFrame(
+        {
+            label: periods,
+            "pobor_kwh": np.bincount(index, weights=pobor, minlength=count),
+            "oddanie_kwh": np.bincount(index, weights=oddanie, minlength=count),
+            "koszt_zl": np.bincount(index, weights=koszt, minlength=count),
+            "przychod_zl": np.bincount(index, weights=przychod, minlength=count),
+        }
+    ).assign(bilans_zl=lambda df: df["przychod_zl"] - df["koszt_zl"])
+
+
+def calculate_rce_costs(
+    data: EnergyDataLike, hourly_prices: RcePrices
+) -> Optional[Dict[str, Any]]:
+    """
+    Wylicza koszt poboru i przychód z oddania energii po cenach RCE.
+
+    Pomiary i ceny łączone są na wspólnym indeksie całkowitym godzin
+    (datetime64[h]), a koszty liczone iloczynami tablic. Zwraca słownik z
+    sumami, listą przedziałów godzin bez ceny (brakujace_okresy) oraz
+    rozbiciem dziennym (dzienne) i miesięcznym (miesieczne); None, gdy brak
+    danych lub cen.
+    """
+    data = EnergySeries.from_data(data)
+    price_hours, prices = _rce_price_arrays(hourly_prices)
+    if not len(data) or not len(price_hours):
+        return None
+
+    hours = data.timestamp.astype("datetime64[h]").astype(np.int64)
+    position = np.minimum(np.searchsorted(price_hours, hours), len(price_hours) - 1)
+    aligned_prices = prices[position]
+    has_price = (price_hours[position] == hours) & ~np.isnan(aligned_prices)
+    aligned_prices = np.where(has_price, aligned_prices, 0.0)
+
+    koszt = data.pobor * aligned_prices
+    przychod = data.oddanie * aligned_prices
+
+    days, day_index = np.unique(
+        data.timestamp.astype("datetime64[D]"), return_inverse=True
+    )
+    months, month_index = np.unique(
+        data.timestamp.astype("datetime64[M]"), return_inverse=True
+    )
+    total_cost, total_income = float(koszt.sum()), float(przychod.sum())
+    return {
+        "calkowity_koszt": total_cost,
+        "calkowity_przychod": total_income,
+        "bilans": total_income - total_cost,
+        "godziny_bez_ceny": int(np.count_nonzero(~has_price)),
+        "brakujace_okresy": _hour_intervals(np.unique(hours[~has_price])),
+        "dzienne": _rce_breakdown(
+            days.astype(object),
+            day_index,
+            data.pobor,
+            data.oddanie,
+            koszt,
+            przychod,
+            "data",
+        ),
+        "miesieczne": _rce_breakdown(
+            months.astype(str),
+            month_index,
+            data.pobor,
+            data.oddanie,
+            koszt,
+            przychod,
+            "miesiac",
+        ),
+    }
+
+
+def run_rce_analysis(
+    data: EnergyDataLike, hourly_prices: RcePrices
+) -> Optional[Dict[str, Any]]:
+    """Wylicza (calculate_rce_costs) i wypisuje analizę finansową po cenach RCE."""
+    result = calculate_rce_costs(data, hourly_prices)
+    if result is None:
         print("Brak danych lub cen RCE do przeprowadzenia analizy.")
-        return
-    total_cost, total_income = 0.0, 0.0
-    for record in data:
-        price = hourly_prices.get(record.timestamp)
-        if price is not None and not pd.isna(price):
-            total_cost += record.pobor * price
-            total_income += record.oddanie * price
-        else:
-            print(f"Ostrzeżenie: Brak ceny RCE dla godziny {record.timestamp}.")
-    print("\n--- Analiza finansowa (ceny RCE) ---")
-    print(f"SUMARYCZNY KOSZT energii pobranej: {total_cost:.2f} zł")
-    print(f"SUMARYCZNY PRZYCHÓD z energii oddanej: {total_income:.2f} zł")
-    print(f"BILANS FINANSOWY (przychód - koszt): {total_income - total_cost:.2f} zł")
-    print("----------------------------------------")
+        return None
 
+    gaps = result["brakujace_okresy"]
+    if gaps:
+        print(
+            f"Ostrzeżenie: Brak cen RCE dla {result['godziny_bez_ceny']} godzin "
+            f"({len(gaps)} okresów) - pominięto je w obliczeniach:"
+        )
+        for start, end in gaps[:MAX_REPORTED_RCE_GAPS]:
+            hours_count = int((end - start).total_seconds() // 3600) + 1
+            if start == end:
+                print(f"  - {start:%Y-%m-%d %H:%M}")
+            else:
+                print(
+                    f"  - od {start:%Y-%m-%d %H:%M} do {end:%Y-%m-%d %H:%M} "
+                    f"({hours_count} godz.)"
+                )
+        if len(gaps) > MAX_REPORTED_RCE_GAPS:
+            print(f"  ... oraz {len(gaps) - MAX_REPORTED_RCE_GAPS} kolejnych okresów.")
 
-PREDEFINED_PERIODS = [
-    "ostatnie-30-dni",
-    "ostatnie-90-dni",
-    "ostatnie-365-dni",
-    "biezacy-miesiac",
-    "poprzedni-miesiac",
-    "biezacy-rok",
-    "poprzedni-rok",
-]
+    print("\n--- Analiza finansowa (ceny RCE) ---")
+    monthly = result["miesieczne"]
+    if len(monthly) > 1:
+        print(
+            f"{'Miesiąc':<8} {'Koszt [zł]':>12} {'Przychód [zł]':>14} {'Bilans [zł]':>12}"
+        )
+        for row in monthly.itertuples():
+            print(
+                f"{row.miesiac:<8} {row.koszt_zl:>12.2f} {row.przychod_zl:>14.2f} "
+                f"{row.bilans_zl:>12.2f}"
+            )
+        print("----------------------------------------")
+    print(f"SUMARYCZNY KOSZT energii pobranej: {result['calkowity_koszt']:.2f} zł")
+    print(
+        f"SUMARYCZNY PRZYCHÓD z energii oddanej: {result['calkowity_przychod']:.2f} zł"
+    )
+    print(f"BILANS FINANSOWY (przychód - koszt): {result['bilans']:.2f} zł")
+    print("----------------------------------------")
+    return result
 
 
 def resolve_predefined_period(
-    data: List[EnergyData],
+    data: EnergyDataLike,
     okres: Optional[str] = None,
     ostatnie_dni: Optional[int] = None,
 ) -> Tuple[str, str]:
@@ -334,10 +626,12 @@ def resolve_predefined_period(
     "ostatnie 365 dni" przy krótszej historii danych zgłaszałoby tysiące
     pozornie "brakujących" godzin sprzed zakresu, jaki użytkownik w ogóle ma.
     """
-    if not data:
+    data = EnergySeries.from_data(data)
+    if not len(data):
         raise ValueError("Brak danych do wyznaczenia okresu.")
-    end_ref = max(d.timestamp for d in data).date()
-    earliest = min(d.timestamp for d in data).date()
+    earliest_ts, end_ts = data.time_range()
+    end_ref = end_ts.date()
+    earliest = earliest_ts.date()
 
     def _clamp(start: date) -> str:
         return max(start, earliest).isoformat()
@@ -375,9 +669,10 @@ def resolve_predefined_period(
 
 
 def filter_data_by_date(
-    data: List[EnergyData], start_date_str: Optional[str], end_date_str: Optional[str]
-) -> List[EnergyData]:
-    if not data or not (start_date_str or end_date_str):
+    data: EnergyDataLike, start_date_str: Optional[str], end_date_str: Optional[str]
+) -> EnergySeries:
+    data = EnergySeries.from_data(data)
+    if not len(data) or not (start_date_str or end_date_str):
         return data
     try:
         start_date = (
@@ -392,38 +687,54 @@ def filter_data_by_date(
         )
     except ValueError:
         print("Błąd: Niepoprawny format daty. Użyj formatu RRRR-MM-DD.")
-        return []
+        return EnergySeries.empty()
     if start_date and end_date and start_date > end_date:
         print("Błąd: Data początkowa nie może być późniejsza niż data końcowa.")
-        return []
+        return EnergySeries.empty()
     print(
         f"\nFiltrowanie danych w zakresie od {start_date_str or 'początku'} do {end_date_str or 'końca'}..."
     )
-    filtered_list = [
-        d
-        for d in data
-        if (not start_date or d.timestamp >= start_date)
-        and (not end_date or d.timestamp <= end_date)
-    ]
-    print(f"Po filtrowaniu pozostało {len(filtered_list)} rekordów.")
-    return filtered_list
+    filtered = data.between(
+        np.datetime64(start_date, "ns") if start_date else None,
+        np.datetime64(end_date + timedelta(seconds=1), "ns") if end_date else None,
+    )
+    print(f"Po filtrowaniu pozostało {len(filtered)} rekordów.")
+    return filtered
 
 
-def aggregate_daily_data(data: List[EnergyData]) -> pd.DataFrame:
-    if not data:
+def select_date_range(
+    data: EnergySeries, data_start: Optional[str], data_koniec: Optional[str]
+) -> EnergySeries:
+    """
+    Wycinek szeregu z dni [data_start, data_koniec] (RRRR-MM-DD, oba
+    włącznie, każdy opcjonalny) wyznaczony przez searchsorted - bez maski po
+    wszystkich rekordach i bez komunikatów na stdout.
+    """
+    try:
+        start = date.fromisoformat(data_start) if data_start else None
+        end = date.fromisoformat(data_koniec) if data_koniec else None
+    except (TypeError, ValueError):
+        raise ValueError("Niepoprawny format daty. Użyj formatu RRRR-MM-DD.")
+    if start and end and start > end:
+        raise ValueError("Data początkowa nie może być późniejsza niż data końcowa.")
+    return data.between(
+        np.datetime64(start, "ns") if start else None,
+        np.datetime64(end + timedelta(days=1), "ns") if end else None,
+    )
+
+
+def aggregate_daily_data(data: EnergyDataLike) -> pd.DataFrame:
+    data = EnergySeries.from_data(data)
+    if not len(data):
         return pd.DataFrame()
-    df = pd.DataFrame(data)
-    df["date"] = df["timestamp"].dt.date
-    daily_df = (
-        df.groupby("date")
-        .agg(
-            pobor_przed=("pobor_przed", "sum"),
-            oddanie_przed=("oddanie_przed", "sum"),
-            pobor=("pobor", "sum"),
-            oddanie=("oddanie", "sum"),
-        )
-        .reset_index()
+    days, day_index = np.unique(
+        data.timestamp.astype("datetime64[D]"), return_inverse=True
     )
+    daily_df = pd.DataFrame({"date": days.astype(object)})
+    for column in ["pobor_przed", "oddanie_przed", "pobor", "oddanie"]:
+        daily_df[column] = np.bincount(
+            day_index, weights=getattr(data, column), minlength=len(days)
+        )
     return daily_df
 
 
@@ -438,58 +749,85 @@ def export_to_csv(df: pd.DataFrame, file_path: str):
         print(f"\nBłąd podczas eksportowania pliku CSV: {e}")
 
 
+# Percentyle dziennego zapotrzebowania raportowane przez calculate_optimal_capacity.
+CAPACITY_PERCENTILES = (50, 90, 100)
+
+
+def _percentile_sizes(daily_requirements: np.ndarray) -> Dict[str, float]:
+    """Percentyle CAPACITY_PERCENTILES dziennego zapotrzebowania (zera bez dni)."""
+    if not len(daily_requirements):
+        return {f"p{q}": 0.0 for q in CAPACITY_PERCENTILES}
+    values = np.percentile(daily_requirements, CAPACITY_PERCENTILES)
+    return {f"p{q}": float(v) for q, v in zip(CAPACITY_PERCENTILES, values)}
+
+
 def calculate_optimal_capacity(
-    hourly_data: List[EnergyData],
+    hourly_data: EnergyDataLike,
     daily_data: pd.DataFrame,
     tariff_manager: TariffManager,
     tariff: str,
-):
-    if daily_data.empty or not hourly_data:
-        return
-    hourly_df = pd.DataFrame(hourly_data)
-    hourly_df["date"] = hourly_df["timestamp"].dt.date
-    net_export_days = daily_data[daily_data["oddanie"] > daily_data["pobor"]]
-    capacity_for_export_days = 0
-    if not net_export_days.empty:
-        required_capacities = [
-            hourly_df[hourly_df["date"] == day]["pobor"].sum()
-            for day in net_export_days["date"]
-        ]
-        capacity_for_export_days = (
-            max(required_capacities) if required_capacities else 0
-        )
-    capacity_for_import_days = 0
-    expensive_zone_name = None  # Initialize to None
+) -> Optional[Dict[str, Any]]:
+    """
+    Pojemność magazynu dla dni z nadprodukcją (dzienny pobór w dniach, w
+    których oddanie przewyższa pobór) i dla arbitrażu taryfowego (dzienny
+    pobór w najdroższej strefie taryfy). Dzienne sumy liczone są jednym
+    przebiegiem np.bincount po indeksach dni, a strefy przypisywane
+    wektorowo; obok maksimum (P100) raportowane są P50 i P90.
+    """
+    hourly_data = EnergySeries.from_data(hourly_data)
+    if daily_data.empty or not len(hourly_data):
+        return None
+    days, day_index = np.unique(
+        hourly_data.timestamp.astype("datetime64[D]"), return_inverse=True
+    )
+    num_days = len(days)
 
+    export_days = np.array(
+        list(daily_data.loc[daily_data["oddanie"] > daily_data["pobor"], "date"]),
+        dtype="datetime64[D]",
+    )
+    pobor_per_day = np.bincount(
+        day_index, weights=hourly_data.pobor, minlength=num_days
+    )
+    export_requirements = pobor_per_day[np.isin(days, export_days)]
+
+    arbitrage_requirements = np.empty(0)
     # Dynamically find the name of the most expensive zone for the given tariff
     tariff_rules = tariff_manager.tariffs_df[
         tariff_manager.tariffs_df["tariff"].str.lower() == tariff.lower()
-    ].copy()
+    ]
     if not tariff_rules.empty:
-        tariff_rules["total_price"] = (
-            tariff_rules["energy_price"] + tariff_rules["dist_price"]
+        total_price = tariff_rules["energy_price"] + tariff_rules["dist_price"]
+        expensive_zone_name = tariff_rules.loc[total_price.idxmax(), "zone_name"]
+        zone_names = tariff_manager.compile_tariff(tariff).zone_names
+        zone_ids, _, _ = tariff_manager.get_zones_and_prices(
+            hourly_data.timestamp, tariff
         )
-        expensive_zone_name = tariff_rules.loc[tariff_rules["total_price"].idxmax()][
-            "zone_name"
-        ]
-
-        if expensive_zone_name:
-            hourly_df["zone"] = hourly_df["timestamp"].apply(
-                lambda ts: tariff_manager.get_zone_and_price(ts, tariff)[0]
-                or "poza strefa"
-            )
-            # Arbitrage capacity is the max consumption in the high zone on any given day
-            pobor_w_strefie_wysokiej = (
-                hourly_df[hourly_df["zone"] == expensive_zone_name]
-                .groupby("date")["pobor_przed"]
-                .sum()
-            )
-            capacity_for_import_days = (
-                pobor_w_strefie_wysokiej.max()
-                if not pobor_w_strefie_wysokiej.empty
-                else 0
-            )
-    optimal_capacity = max(capacity_for_export_days, capacity_for_import_days)
+        # Strefa bez żadnej godziny w tablicy taryfy nie trafia do zone_names
+        expensive_zone_id = (
+            zone_names.index(expensive_zone_name)
+            if expensive_zone_name in zone_names
+            else NO_ZONE - 1
+        )
+        in_expensive_zone = zone_ids == expensive_zone_id
+        # Arbitrage capacity is the consumption in the high zone on a given day
+        high_zone_per_day = np.bincount(
+            day_index,
+            weights=np.where(in_expensive_zone, hourly_data.pobor_przed, 0.0),
+            minlength=num_days,
+        )
+        days_with_zone = np.bincount(day_index[in_expensive_zone], minlength=num_days)
+        arbitrage_requirements = high_zone_per_day[days_with_zone > 0]
+
+    export_sizes = _percentile_sizes(export_requirements)
+    arbitrage_sizes = _percentile_sizes(arbitrage_requirements)
+    optimal_sizes = {
+        key: max(export_sizes[key], arbitrage_sizes[key]) for key in export_sizes
+    }
+    capacity_for_export_days = export_sizes["p100"]
+    capacity_for_import_days = arbitrage_sizes["p100"]
+    optimal_capacity = optimal_sizes["p100"]
+
     print("\n--- Kalkulacja optymalnej pojemności magazynu ---")
     print(
         f"Pojemność wymagana dla dni z nadprodukcją: {capacity_for_export_days:.3f} kWh"
@@ -499,7 +837,24 @@ def calculate_optimal_capacity(
     )
     print("Optymalna pojemność (większa z powyższych):")
     print(f"Wynik: {optimal_capacity:.3f} kWh")
+    print("\nRozkład dziennego zapotrzebowania (kWh):")
+    print(f"{'':<28} {'dni':>5} {'P50':>9} {'P90':>9} {'P100':>9}")
+    for label, count, sizes in (
+        ("Dni z nadprodukcją", len(export_requirements), export_sizes),
+        ("Arbitraż taryfowy", len(arbitrage_requirements), arbitrage_sizes),
+        ("Pojemność (większa)", None, optimal_sizes),
+    ):
+        count_str = "" if count is None else str(count)
+        print(
+            f"{label:<28} {count_str:>5} {sizes['p50']:>9.3f} "
+            f"{sizes['p90']:>9.3f} {sizes['p100']:>9.3f}"
+        )
     print("--------------------------------------------------")
+    return {
+        "nadprodukcja": {"dni": len(export_requirements), **export_sizes},
+        "arbitraz": {"dni": len(arbitrage_requirements), **arbitrage_sizes},
+        "optymalna": optimal_sizes,
+    }
 
 
 def analyze_daily_trends(daily_df: pd.DataFrame):
@@ -532,19 +887,20 @@ def _is_probable_dst_spring_gap(ts: pd.Timestamp) -> bool:
 
 
 def find_missing_hours(
-    data: List[EnergyData], start_date_str: Optional[str], end_date_str: Optional[str]
+    data: EnergyDataLike, start_date_str: Optional[str], end_date_str: Optional[str]
 ):
-    if not data or not (start_date_str or end_date_str):
+    data = EnergySeries.from_data(data)
+    if not len(data) or not (start_date_str or end_date_str):
         return
-    df = pd.DataFrame(data).set_index("timestamp")
-    start_time = pd.to_datetime(start_date_str) if start_date_str else df.index.min()
+    index = pd.DatetimeIndex(data.timestamp)
+    start_time = pd.to_datetime(start_date_str) if start_date_str else index.min()
     end_time = (
         pd.to_datetime(end_date_str).replace(hour=23, minute=59)
         if end_date_str
-        else df.index.max()
+        else index.max()
     )
     expected_range = pd.date_range(start=start_time, end=end_time, freq="h")
-    missing_timestamps = expected_range.difference(df.index)
+    missing_timestamps = expected_range.difference(index)
     if not missing_timestamps.empty:
         print("\n--- UWAGA: Wykryto brakujące godziny w danych ---")
         if len(missing_timestamps) > 24:
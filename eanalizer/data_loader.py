@@ -1,86 +1,223 @@
+import hashlib
+import json
+import os
 import pandas as pd
-from typing import List
-from .models import EnergyData
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from . import profiling
+from .models import EnergySeries
 import io
 
+# Podkatalog cache_dir z binarną (kolumnową) kopią sparsowanych plików Enei.
+CSV_CACHE_SUBDIR = "enea_csv"
+# Zwiększane przy każdej zmianie sposobu parsowania - unieważnia stary cache.
+CSV_CACHE_VERSION = 1
 
-def load_from_enea_csv(file_path: str) -> List[EnergyData]:
-    """Wczytuje i parsuje dane z pliku CSV od Enei, uprzednio czyszcząc go z bajtów zerowych."""
+ENERGY_COLUMNS = ["pobor_przed", "oddanie_przed", "pobor", "oddanie"]
+
+
+def _cache_file_for(cache_dir: Path, file_path: str) -> Path:
+    """Ścieżka pliku .npz w cache, wyznaczana z absolutnej ścieżki pliku źródłowego."""
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+    return Path(cache_dir) / CSV_CACHE_SUBDIR / f"{key}.npz"
+
+
+def _content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _read_cached_columns(
+    cache_file: Path, file_path: str, stat: os.stat_result
+) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Zwraca kolumny z cache, jeśli wpis odpowiada bieżącej wersji pliku.
+    Zgodność rozmiaru i czasu modyfikacji wystarcza; gdy zmienił się tylko
+    czas modyfikacji (np. ponowne pobranie identycznego pliku), porównywany
+    jest skrót zawartości, a metadane wpisu są odświeżane.
+    """
+    if not cache_file.is_file():
+        return None
     try:
-        with open(file_path, "r", encoding="utf-8-sig") as f:
-            file_content = f.read()
+        with np.load(cache_file, allow_pickle=False) as npz:
+            meta = json.loads(str(npz["meta"]))
+            columns = {name: npz[name] for name in ["timestamp"] + ENERGY_COLUMNS}
+    except (OSError, ValueError, KeyError):
+        return None
 
-        cleaned_content = file_content.replace("\0", "")
-        file_like_object = io.StringIO(cleaned_content)
+    if (
+        meta.get("version") != CSV_CACHE_VERSION
+        or meta.get("path") != os.path.abspath(file_path)
+        or meta.get("size") != stat.st_size
+    ):
+        return None
+    if meta.get("mtime_ns") != stat.st_mtime_ns:
+        with open(file_path, "rb") as f:
+            if _content_hash(f.read()) != meta.get("sha256"):
+                return None
+        _write_cached_columns(cache_file, file_path, stat, meta["sha256"], columns)
+    return columns
 
-        # Definiujemy nazwy wszystkich interesujących nas kolumn
-        pobor_przed_col = "Wolumen energii elektrycznej pobranej z sieci przed bilansowaniem godzinowym"
-        oddanie_przed_col = "Wolumen energii elektrycznej oddanej do sieci przed bilansowaniem godzinowym"
-        pobor_po_col = (
-            "Wolumen energii elektrycznej pobranej z sieci po bilansowaniu godzinowym"
-        )
-        oddanie_po_col = (
-            "Wolumen energii elektrycznej oddanej do sieci po bilansowaniu godzinowym"
-        )
 
-        df = pd.read_csv(
-            file_like_object,
-            delimiter=";",
-            dtype={
-                "Data": str,
-                pobor_przed_col: str,
-                oddanie_przed_col: str,
-                pobor_po_col: str,
-                oddanie_po_col: str,
-            },
+def _write_cached_columns(
+    cache_file: Path,
+    file_path: str,
+    stat: os.stat_result,
+    content_hash: str,
+    columns: Dict[str, np.ndarray],
+):
+    """Zapisuje kolumny do cache atomowo (plik tymczasowy + os.replace)."""
+    meta = {
+        "version": CSV_CACHE_VERSION,
+        "path": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": content_hash,
+    }
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp_file, meta=np.array(json.dumps(meta)), **columns)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(
+            f"Ostrzeżenie: Nie udało się zapisać pamięci podręcznej dla {file_path}: {e}"
         )
 
-        if "Data" not in df.columns:
-            print(f"Pominięto plik (nieprawidłowy format Enea CSV): {file_path}")
-            return []
-
-        df.rename(
-            columns={
-                "Data": "timestamp",
-                pobor_przed_col: "pobor_przed",
-                oddanie_przed_col: "oddanie_przed",
-                pobor_po_col: "pobor",
-                oddanie_po_col: "oddanie",
-            },
-            inplace=True,
-        )
 
-        # --- Ręczne czyszczenie i konwersja ---
-        df["timestamp"] = df["timestamp"].str.replace("=", "").str.replace('"', "")
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce").dt.floor("h")
+def _parse_enea_csv(raw: bytes, file_path: str) -> Optional[Dict[str, np.ndarray]]:
+    """Parsuje zawartość pliku CSV Enei do słownika kolumn (None dla złego formatu)."""
+    cleaned_content = raw.replace(b"\0", b"").decode("utf-8-sig")
+    file_like_object = io.StringIO(cleaned_content)
 
-        for col in ["pobor_przed", "oddanie_przed", "pobor", "oddanie"]:
-            df[col] = pd.to_numeric(df[col].str.replace(",", "."), errors="coerce")
+    # Definiujemy nazwy wszystkich interesujących nas kolumn
+    pobor_przed_col = (
+        "Wolumen energii elektrycznej pobranej z sieci przed bilansowaniem godzinowym"
+    )
+    oddanie_przed_col = (
+        "Wolumen energii elektrycznej oddanej do sieci przed bilansowaniem godzinowym"
+    )
+    pobor_po_col = (
+        "Wolumen energii elektrycznej pobranej z sieci po bilansowaniu godzinowym"
+    )
+    oddanie_po_col = (
+        "Wolumen energii elektrycznej oddanej do sieci po bilansowaniu godzinowym"
+    )
 
-        df.dropna(
-            subset=["timestamp", "pobor_przed", "oddanie_przed", "pobor", "oddanie"],
-            inplace=True,
-        )
+    df = pd.read_csv(
+        file_like_object,
+        delimiter=";",
+        dtype={
+            "Data": str,
+            pobor_przed_col: str,
+            oddanie_przed_col: str,
+            pobor_po_col: str,
+            oddanie_po_col: str,
+        },
+    )
+
+    if "Data" not in df.columns:
+        print(f"Pominięto plik (nieprawidłowy format Enea CSV): {file_path}")
+        return None
+
+    df.rename(
+        columns={
+            "Data": "timestamp",
+            pobor_przed_col: "pobor_przed",
+            oddanie_przed_col: "oddanie_przed",
+            pobor_po_col: "pobor",
+            oddanie_po_col: "oddanie",
+        },
+        inplace=True,
+    )
 
-        energy_data_list = [
-            EnergyData(
-                timestamp=row.timestamp,
-                pobor_przed=row.pobor_przed,
-                oddanie_przed=row.oddanie_przed,
-                pobor=row.pobor,
-                oddanie=row.oddanie,
-            )
-            for row in df.itertuples()
-        ]
+    # --- Ręczne czyszczenie i konwersja ---
+    df["timestamp"] = df["timestamp"].str.replace("=", "").str.replace('"', "")
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce").dt.floor("h")
 
+    for col in ENERGY_COLUMNS:
+        df[col] = pd.to_numeric(df[col].str.replace(",", "."), errors="coerce")
+
+    df.dropna(
+        subset=["timestamp"] + ENERGY_COLUMNS,
+        inplace=True,
+    )
+
+    columns = {"timestamp": df["timestamp"].to_numpy(dtype="datetime64[ns]")}
+    for col in ENERGY_COLUMNS:
+        columns[col] = df[col].to_numpy(dtype=np.float64)
+    return columns
+
+
+def load_from_enea_csv(
+    file_path: str, cache_dir: Optional[Path] = None
+) -> EnergySeries:
+    """
+    Wczytuje i parsuje dane z pliku CSV od Enei, uprzednio czyszcząc go z bajtów zerowych.
+    Zwraca kolumnowy EnergySeries (pusty dla błędnego lub brakującego pliku).
+
+    Jeśli podano cache_dir, sparsowane kolumny są zapisywane w binarnym
+    pliku .npz (klucz: ścieżka, rozmiar, czas modyfikacji i skrót zawartości),
+    a kolejne wczytania niezmienionego pliku pomijają parsowanie CSV.
+    """
+    try:
+        stat = os.stat(file_path)
+        columns = None
+        from_cache = False
+        cache_file = _cache_file_for(cache_dir, file_path) if cache_dir else None
+        if cache_file is not None:
+            columns = _read_cached_columns(cache_file, file_path, stat)
+            from_cache = columns is not None
+
+        if columns is None:
+            with open(file_path, "rb") as f:
+                raw = f.read()
+            columns = _parse_enea_csv(raw, file_path)
+            if columns is None:
+                return EnergySeries.empty()
+            if cache_file is not None:
+                _write_cached_columns(
+                    cache_file, file_path, stat, _content_hash(raw), columns
+                )
+
+        series = EnergySeries(
+            columns["timestamp"], *(columns[col] for col in ENERGY_COLUMNS)
+        )
+
+        source_info = " (z pamięci podręcznej)" if from_cache else ""
         print(
-            f"Pomyślnie wczytano {len(energy_data_list)} rekordów z pliku: {file_path}"
+            f"Pomyślnie wczytano {len(series)} rekordów z pliku: {file_path}{source_info}"
         )
-        return energy_data_list
+        return series
 
     except FileNotFoundError:
         print(f"Błąd: Plik nie został znaleziony: {file_path}")
-        return []
+        return EnergySeries.empty()
     except Exception as e:
         print(f"Wystąpił nieoczekiwany błąd podczas wczytywania pliku: {e}")
-        return []
+        return EnergySeries.empty()
+
+
+def load_from_enea_files(
+    file_paths: Iterable[str], cache_dir: Optional[Path] = None
+) -> EnergySeries:
+    """
+    Wczytuje wiele plików CSV Enei i łączy je w jeden szereg posortowany po
+    czasie. Godziny obecne w kilku plikach (np. plik roczny i pobrany później
+    plik miesięczny) brane są z pliku późniejszego na liście.
+    """
+    loaded = []
+    for file_path in file_paths:
+        with profiling.stage(f"wczytywanie: {os.path.basename(file_path)}") as stage:
+            series = load_from_enea_csv(file_path, cache_dir=cache_dir)
+            stage.records = len(series)
+        loaded.append(series)
+    with profiling.stage("sortowanie") as stage:
+        series = EnergySeries.merge(loaded)
+        stage.records = len(series)
+    duplicates = sum(len(s) for s in loaded) - len(series)
+    if duplicates:
+        print(
+            f"Pominięto {duplicates} rekordów zdublowanych w nakładających się plikach."
+        )
+    return series
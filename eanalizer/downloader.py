@@ -2,13 +2,34 @@
 
 import http.cookiejar
 import json
+import os
 import re
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from . import enea_auth
+from . import enea_auth, http_utils
 from .config import AppConfig
+from .manifest import DataManifest, row_key
+
+# Domyślna liczba lat pobieranych równolegle.
+DEFAULT_DOWNLOAD_WORKERS = 3
+# Limit zapytań o pliki CSV do eBOK: średnio REQUESTS_PER_SECOND na sekundę,
+# z krótką serią do REQUEST_BURST zapytań naraz.
+REQUESTS_PER_SECOND = 1.0
+REQUEST_BURST = 2
+DOWNLOAD_RETRIES = 3
+RETRY_BACKOFF = 2.0
+
+# Tryb przyrostowy: przy krótszej luce pobierane są pojedyncze dni, przy
+# dłuższej - całe miesiące. Format parametru "date" dla mniejszych okresów.
+INCREMENTAL_MAX_DAYS = 3
+PERIOD_DATE_FORMATS = {"month": "%Y-%m", "day": "%Y-%m-%d"}
 
 
 class EneaDownloader:
@@ -18,12 +39,18 @@ class EneaDownloader:
         force: bool = False,
         report_only: bool = False,
         debug: bool = False,
+        workers: int = DEFAULT_DOWNLOAD_WORKERS,
+        incremental: bool = False,
     ):
         """Initializes the downloader with a complete application configuration."""
         self.config = config
         self.force = force
         self.report_only = report_only
         self.debug = debug
+        self.workers = max(1, workers)
+        self.incremental = incremental
+        self.manifest = DataManifest(config.data_dir)
+        self._rate_limiter = http_utils.TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
 
     def download_data(self):
         """
@@ -54,18 +81,12 @@ class EneaDownloader:
                     print(
                         f"Plik {filename} jest nowszy niż 1 godzina. Użyj --force aby wymusić pobranie."
                     )
+                elif self.manifest.ensure(filename)["valid"]:
+                    print(
+                        f"Plik {filename} już istnieje i jest prawidłowy. Użyj --force aby wymusić pobranie."
+                    )
                 else:
-                    with open(filename, "r", encoding="utf-8") as f:
-                        try:
-                            content = f.read()
-                            if "---" not in content:
-                                print(
-                                    f"Plik {filename} już istnieje i jest prawidłowy. Użyj --force aby wymusić pobranie."
-                                )
-                            else:
-                                self._run_download_process()
-                        except UnicodeDecodeError:
-                            self._run_download_process()
+                    self._run_download_process()
             else:
                 self._run_download_process()
 
@@ -240,16 +261,55 @@ class EneaDownloader:
             except (requests.exceptions.RequestException, ValueError) as e:
                 raise ConnectionError(f"Błąd podczas pobierania metadanych: {e}") from e
 
-            # Download CSV for each year
-            for year in range(min_year, max_year + 1):
-                self._download_year_csv(
-                    session, year, point_of_delivery_id, summary_balancing_chart_url
+            # Download CSV for each year - concurrently over the shared,
+            # authenticated session, throttled by self._rate_limiter.
+            years = list(range(min_year, max_year + 1))
+            workers = min(self.workers, len(years))
+            session.mount("https://", HTTPAdapter(pool_maxsize=max(workers, 10)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(
+                    executor.map(
+                        lambda year: self._download_year(
+                            session,
+                            year,
+                            point_of_delivery_id,
+                            summary_balancing_chart_url,
+                        ),
+                        years,
+                    )
+                )
+
+    def _post_with_retry(self, session, csv_data, referer_url):
+        """
+        Wysyła zapytanie o plik CSV z zachowaniem limitu tempa zapytań.
+        Błędy przejściowe (połączenie, limit czasu, 429/5xx) są ponawiane
+        z wykładniczo rosnącym odstępem; pozostałe przekazywane wyżej.
+        """
+        # Use specific headers for this request, session will handle User-Agent and cookies
+        headers = {"Referer": referer_url, "X-Requested-With": "XMLHttpRequest"}
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            self._rate_limiter.acquire()
+            try:
+                csv_response = session.post(
+                    "https://ebok.enea.pl/meter/summaryBalancingChart/csv",
+                    data=csv_data,
+                    headers=headers,
                 )
+                csv_response.raise_for_status()
+                return csv_response
+            except requests.exceptions.RequestException as e:
+                if attempt == DOWNLOAD_RETRIES or not http_utils.is_retryable(e):
+                    raise
+                delay = RETRY_BACKOFF * 2**attempt
+                print(
+                    f"Błąd przejściowy podczas pobierania ({e}); "
+                    f"ponowienie za {delay:.0f} s..."
+                )
+                time.sleep(delay)
 
     def _report_data_ranges(self):
         """Lists all downloaded files and their data ranges."""
         print("\nRaport zakresu danych na dysku:")
-        from .data_loader import load_from_enea_csv
 
         # Find all Enea CSV files
         files = list(self.config.data_dir.glob("*_dane_dobowo_godzinowe_*.csv"))
@@ -260,10 +320,10 @@ class EneaDownloader:
             return
 
         for filename in files:
-            data = load_from_enea_csv(str(filename))
-            if data:
-                min_date = min(data, key=lambda x: x.timestamp).timestamp
-                max_date = max(data, key=lambda x: x.timestamp).timestamp
+            entry = self.manifest.ensure(filename)
+            if entry["rows"]:
+                min_date = datetime.fromisoformat(entry["first"])
+                max_date = datetime.fromisoformat(entry["last"])
                 print(
                     f"- {filename.name}: {min_date.strftime('%Y-%m-%d %H:%M')} do {max_date.strftime('%Y-%m-%d %H:%M')}"
                 )
@@ -271,10 +331,7 @@ class EneaDownloader:
                 print(f"- {filename.name}: Błąd wczytywania lub brak rekordów.")
 
     def _download_year_csv(self, session, year, point_of_delivery_id, referer_url):
-        filename = (
-            self.config.data_dir
-            / f"{self.config.customer_id}_dane_dobowo_godzinowe_{year}.csv"
-        )
+        filename = self._year_file(year)
 
         # Skip if file is recent (only for current year) or valid, unless force is used
         if not self.force and filename.is_file():
@@ -284,10 +341,9 @@ class EneaDownloader:
                 ) < timedelta(hours=1):
                     print(f"Plik {filename} jest nowszy niż 1 godzina. Pomijanie.")
                     return
-            with open(filename, "r", encoding="utf-8") as f:
-                if "---" not in f.read():
-                    print(f"Plik {filename} już istnieje i jest prawidłowy. Pomijanie.")
-                    return
+            if self.manifest.ensure(filename)["valid"]:
+                print(f"Plik {filename} już istnieje i jest prawidłowy. Pomijanie.")
+                return
 
         csv_data = {
             "duration": "year",
@@ -295,53 +351,172 @@ class EneaDownloader:
             "pointOfDeliveryId": point_of_delivery_id,
         }
         try:
-            import time
-
-            time.sleep(1)  # Small delay to ensure session is ready
             print(f"Pobieranie CSV za rok {year}...")
+            csv_content = self._request_csv(
+                session, csv_data, referer_url, f"roku {year}"
+            )
+            if csv_content is None:
+                return
 
-            # Use specific headers for this request, session will handle User-Agent and cookies
-            headers = {"Referer": referer_url, "X-Requested-With": "XMLHttpRequest"}
+            _write_atomically(filename, csv_content)
+            self.manifest.update(filename, csv_content)
+            print(f"Pomyślnie zapisano {filename}")
 
-            csv_response = session.post(
-                "https://ebok.enea.pl/meter/summaryBalancingChart/csv",
-                data=csv_data,
-                headers=headers,
-            )
-            csv_response.raise_for_status()
+        except (
+            requests.exceptions.RequestException,
+            KeyError,
+        ) as e:
+            print(f"Błąd podczas pobierania lub zapisywania danych za rok {year}: {e}")
 
-            try:
-                json_data = csv_response.json()
-            except json.JSONDecodeError:
-                print(
-                    f"Błąd: Serwer nie zwrócił poprawnego JSON dla roku {year}. Prawdopodobne wygaśnięcie sesji."
-                )
-                if "<html" in csv_response.text.lower():
-                    print(
-                        "Otrzymano stronę HTML zamiast danych. Próba ponownego logowania może być wymagana."
-                    )
-                return
+    def _request_csv(self, session, csv_data, referer_url, label):
+        """
+        Pobiera plik CSV dla podanych parametrów (duration/date) i zwraca jego
+        treść albo None, gdy serwer zwrócił niepoprawną lub pustą odpowiedź.
+        """
+        csv_response = self._post_with_retry(session, csv_data, referer_url)
 
-            if "data" not in json_data:
+        try:
+            json_data = csv_response.json()
+        except json.JSONDecodeError:
+            print(
+                f"Błąd: Serwer nie zwrócił poprawnego JSON dla {label}. Prawdopodobne wygaśnięcie sesji."
+            )
+            if "<html" in csv_response.text.lower():
                 print(
-                    f"Błąd: Brak klucza 'data' w odpowiedzi dla roku {year}. Odpowiedź: {json_data}"
+                    "Otrzymano stronę HTML zamiast danych. Próba ponownego logowania może być wymagana."
                 )
+            return None
+
+        if "data" not in json_data:
+            print(
+                f"Błąd: Brak klucza 'data' w odpowiedzi dla {label}. Odpowiedź: {json_data}"
+            )
+            return None
+
+        csv_content = json_data["data"]
+
+        if not csv_content or len(csv_content.strip()) < 10:
+            print(f"Ostrzeżenie: Pobrane dane dla {label} są puste lub zbyt krótkie.")
+            return None
+        return csv_content
+
+    def _download_year(self, session, year, point_of_delivery_id, referer_url):
+        """
+        Pobiera dane za rok: w trybie przyrostowym dla bieżącego roku tylko
+        najnowsze dni/miesiące (z powrotem do pełnego pliku, gdy się nie uda).
+        """
+        if self.incremental and not self.force and year == datetime.now().year:
+            if self._download_incremental(
+                session, year, point_of_delivery_id, referer_url
+            ):
                 return
+        self._download_year_csv(session, year, point_of_delivery_id, referer_url)
 
-            csv_content = json_data["data"]
+    def _download_incremental(self, session, year, point_of_delivery_id, referer_url):
+        """
+        Dociąga do pliku bieżącego roku tylko okres od ostatniej pełnej godziny
+        na dysku: pojedyncze dni, gdy brakuje najwyżej INCREMENTAL_MAX_DAYS
+        dni, a w przeciwnym razie kolejne miesiące. Zwraca False, gdy trzeba
+        pobrać cały rok (brak pliku, brak pełnych godzin lub błąd serwera).
+        """
+        filename = self._year_file(year)
+        if not filename.is_file():
+            return False
+        existing = filename.read_text(encoding="utf-8")
+        last_hour = _last_complete_hour(existing)
+        if last_hour is None or last_hour.year != year:
+            return False
 
-            if not csv_content or len(csv_content.strip()) < 10:
-                print(
-                    f"Ostrzeżenie: Pobrane dane dla roku {year} są puste lub zbyt krótkie."
+        today = datetime.now().date()
+        periods = _incremental_periods(last_hour.date(), today)
+        print(
+            f"Tryb przyrostowy: ostatnia pełna godzina w {filename.name} to "
+            f"{last_hour:%Y-%m-%d %H:%M}; pobieranie {len(periods)} okresów."
+        )
+        merged = existing
+        try:
+            for duration, period_date in periods:
+                csv_data = {
+                    "duration": duration,
+                    "date": period_date,
+                    "pointOfDeliveryId": point_of_delivery_id,
+                }
+                csv_content = self._request_csv(
+                    session, csv_data, referer_url, f"okresu {period_date}"
                 )
-                return
+                if csv_content is None:
+                    return False
+                merged = _merge_csv_rows(merged, csv_content)
+        except requests.exceptions.RequestException as e:
+            print(
+                f"Błąd podczas przyrostowego pobierania ({e}); pobieranie całego roku."
+            )
+            return False
 
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(csv_content)
-            print(f"Pomyślnie zapisano {filename}")
+        _write_atomically(filename, merged)
+        self.manifest.update(filename, merged)
+        print(f"Pomyślnie zaktualizowano {filename}")
+        return True
 
-        except (
-            requests.exceptions.RequestException,
-            KeyError,
-        ) as e:
-            print(f"Błąd podczas pobierania lub zapisywania danych za rok {year}: {e}")
+    def _year_file(self, year):
+        return (
+            self.config.data_dir
+            / f"{self.config.customer_id}_dane_dobowo_godzinowe_{year}.csv"
+        )
+
+
+def _last_complete_hour(csv_text: str) -> Optional[datetime]:
+    """Najpóźniejsza godzina w pliku, dla której są już wartości (bez '---')."""
+    for line in reversed(csv_text.replace("\0", "").splitlines()[1:]):
+        if line.strip() and "---" not in line:
+            try:
+                return datetime.strptime(row_key(line), "%Y-%m-%d %H:%M")
+            except ValueError:
+                continue
+    return None
+
+
+def _incremental_periods(last_day: date, today: date) -> List[Tuple[str, str]]:
+    """
+    Okresy (duration, date) do pobrania od dnia last_day do today: kolejne
+    dni, gdy to najwyżej INCREMENTAL_MAX_DAYS dni, w przeciwnym razie
+    kolejne miesiące (nigdy wcześniej niż początek roku last_day).
+    """
+    if (today - last_day).days < INCREMENTAL_MAX_DAYS:
+        days = [
+            last_day + timedelta(days=i) for i in range((today - last_day).days + 1)
+        ]
+        return [("day", day.strftime(PERIOD_DATE_FORMATS["day"])) for day in days]
+    months = []
+    month = last_day.replace(day=1)
+    while month <= today and month.year == last_day.year:
+        months.append(("month", month.strftime(PERIOD_DATE_FORMATS["month"])))
+        month = (month + timedelta(days=32)).replace(day=1)
+    return months
+
+
+def _merge_csv_rows(existing_text: str, new_text: str) -> str:
+    """
+    Scala nowy fragment CSV z plikiem: wiersze z zakresu czasu objętego
+    nowym fragmentem są zastępowane, starsze i późniejsze - zachowywane.
+    Bajty NUL z plików Enei są usuwane z obu tekstów, a wynik zapisywany
+    jest jako czysty tekst.
+    """
+    existing_text = existing_text.replace("\0", "")
+    new_text = new_text.replace("\0", "")
+    existing_lines = existing_text.splitlines()
+    new_rows = [line for line in new_text.splitlines()[1:] if line.strip()]
+    if not new_rows:
+        return existing_text
+    first_key, last_key = row_key(new_rows[0]), row_key(new_rows[-1])
+    header, rows = existing_lines[0], existing_lines[1:]
+    before = [line for line in rows if line.strip() and row_key(line) < first_key]
+    after = [line for line in rows if line.strip() and row_key(line) > last_key]
+    return "\n".join([header] + before + new_rows + after) + "\n"
+
+
+def _write_atomically(path: Path, content: str):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -1,8 +1,10 @@
 # eanalizer/downloader_cli.py
 
 import argparse
+import multiprocessing
+
 from .config import load_config
-from .downloader import EneaDownloader
+from .downloader import DEFAULT_DOWNLOAD_WORKERS, EneaDownloader
 
 
 def main():
@@ -32,7 +34,26 @@ def main():
         "zrzut ciasteczek sesji (nazwa/domena/wygaśnięcie) do katalogu cache.",
     )
 
+    parser.add_argument(
+        "--watki",
+        type=int,
+        default=DEFAULT_DOWNLOAD_WORKERS,
+        metavar="N",
+        help="Liczba lat pobieranych równolegle (domyślnie: %(default)s). "
+        "Tempo zapytań i tak ogranicza wspólny limit zapytań na sekundę.",
+    )
+
+    parser.add_argument(
+        "-i",
+        "--przyrostowo",
+        action="store_true",
+        help="Dla bieżącego roku pobiera tylko dni/miesiące od ostatniej pełnej "
+        "godziny na dysku i dopisuje je do pliku, zamiast pobierać cały rok.",
+    )
+
     args = parser.parse_args()
+    if args.watki < 1:
+        parser.error("--watki musi być liczbą dodatnią.")
 
     try:
         # Load configuration. Credentials are required only if we are not in report-only mode.
@@ -40,7 +61,12 @@ def main():
 
         # Instantiate the downloader with the loaded config and run it.
         downloader = EneaDownloader(
-            app_cfg, force=args.force, report_only=args.report, debug=args.debug
+            app_cfg,
+            force=args.force,
+            report_only=args.report,
+            debug=args.debug,
+            workers=args.watki,
+            incremental=args.przyrostowo,
         )
         downloader.download_data()
 
@@ -52,4 +78,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,265 @@
+# eanalizer/grid.py
+"""
+Siatka kosztów: pojemność x sprawność magazynu x taryfa x współczynnik
+net-meteringu (--siatka-kosztow), liczona równolegle na puli procesów.
+
+Kosztowna jest tylko symulacja magazynu, a ona nie zależy od taryfy ani
+net-meteringu: dla każdej sprawności i grupy pojemności wystarczy jeden
+przebieg simulate_storage_sweep, którego wynikiem są sumy poboru/oddania w
+48 koszykach (typ dnia, godzina). Te przebiegi rozdzielane są między
+procesy ProcessPoolExecutor; rozliczenie każdej komórki (taryfa,
+net-metering) na sumach z koszyków odbywa się już w procesie głównym.
+
+Bez numba przebieg to pętla po godzinach, której koszt prawie nie zależy
+od liczby pojemności - zadaniem jest więc cała sprawność (podział
+pojemności tylko dokładałby przebiegów). Pojemności dzielone są na grupy,
+najwyżej jedna na proces, tylko z jądrem numba, gdzie czas przebiegu
+rośnie z liczbą pojemności. Gdy jest tylko jedno zadanie, wszystko
+liczone jest w bieżącym procesie.
+
+Tablice wejściowe (pobór, oddanie, koszyki) trafiają do procesów przez
+multiprocessing.shared_memory - każdy proces podłącza się do nich raz, w
+inicjalizatorze, zamiast dostawać kopię w każdym zadaniu. Wynik to jedna
+tabela w formacie długim (wiersz = komórka siatki), zapisywana do CSV albo
+Parquet (wymaga `pip install eanalizer[parquet]`).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .core import (
+    EnergyDataLike,
+    _first_hour_of_bins,
+    _num_months,
+    _settle_summary,
+    _zone_stats_from_bins,
+)
+from .models import EnergySeries
+from .simulation import _jit_sweep_kernel, simulate_storage, simulate_storage_sweep
+from .tariffs import NUM_DAY_HOUR_BINS, TariffManager
+
+GRID_COLUMNS = [
+    "taryfa",
+    "netmetering",
+    "sprawnosc",
+    "pojemnosc_kwh",
+    "pobor_z_sieci_kwh",
+    "oddanie_do_sieci_kwh",
+    "calkowity_koszt_zl",
+    "oszczednosc_energii_kwh",
+    "oszczednosc_zl",
+]
+# Widoki tablic współdzielonych w procesie roboczym (ustawiane przez _attach_shared).
+_shared_arrays: Dict[str, np.ndarray] = {}
+_shared_segments: List[shared_memory.SharedMemory] = []
+
+ArraySpec = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+
+def _share_arrays(
+    arrays: Dict[str, np.ndarray],
+) -> Tuple[List[shared_memory.SharedMemory], ArraySpec]:
+    """Kopiuje tablice do bloków pamięci współdzielonej; zwraca bloki i ich opis."""
+    segments, spec = [], {}
+    try:
+        for name, array in arrays.items():
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            segments.append(segment)
+            np.ndarray(array.shape, array.dtype, buffer=segment.buf)[:] = array
+            spec[name] = (segment.name, array.shape, array.dtype.str)
+    except BaseException:
+        _release(segments)
+        raise
+    return segments, spec
+
+
+def _release(segments: List[shared_memory.SharedMemory]):
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+
+
+def _attach_shared(spec: ArraySpec):
+    """Inicjalizator procesu roboczego: podłącza tablice współdzielone."""
+    for name, (segment_name, shape, dtype) in spec.items():
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _shared_segments.append(segment)
+        _shared_arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=segment.buf)
+
+
+def _sweep_task(
+    efficiency: float, capacities: List[float]
+) -> Tuple[float, List[float], np.ndarray, np.ndarray]:
+    """Jeden przebieg symulacji dla sprawności i grupy pojemności."""
+    sweep = simulate_storage_sweep(
+        _shared_arrays["pobor_przed"],
+        _shared_arrays["oddanie_przed"],
+        capacities,
+        efficiency,
+        bins=_shared_arrays["bins"],
+        num_bins=NUM_DAY_HOUR_BINS,
+    )
+    return efficiency, capacities, sweep.pobor_z_sieci, sweep.oddanie_do_sieci
+
+
+def _split_tasks(
+    capacities: List[float],
+    efficiencies: List[float],
+    workers: int,
+    split_capacities: bool = _jit_sweep_kernel is not None,
+) -> List[Tuple[float, List[float]]]:
+    """
+    Jedno zadanie (przebieg po godzinach) na sprawność; z split_capacities
+    (jądro numba) pojemności dzielone są dodatkowo na grupy tak, by zadań
+    było najwyżej tyle, ile procesów.
+    """
+    chunks = 1
+    if split_capacities:
+        chunks = min(len(capacities), max(1, workers // len(efficiencies)))
+    return [
+        (efficiency, chunk.tolist())
+        for efficiency in efficiencies
+        for chunk in np.array_split(np.asarray(capacities), chunks)
+        if len(chunk)
+    ]
+
+
+def evaluate_cost_grid(
+    data: EnergyDataLike,
+    tariff_manager: TariffManager,
+    capacities: Sequence[float],
+    efficiencies: Sequence[float],
+    tariffs: Sequence[str],
+    net_metering_ratios: Sequence[Optional[float]] = (None,),
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Tabela (GRID_COLUMNS) dla wszystkich kombinacji pojemności, sprawności,
+    taryf i współczynników net-meteringu (None - bez net-meteringu).
+    Oszczędności liczone są względem tej samej taryfy i net-meteringu bez
+    magazynu. workers=1 liczy wszystko w bieżącym procesie; domyślnie
+    używane są wszystkie rdzenie.
+    """
+    data = EnergySeries.from_data(data)
+    capacities = [float(c) for c in capacities]
+    efficiencies = [float(e) for e in efficiencies]
+    if not len(data) or not capacities or not efficiencies or not tariffs:
+        return pd.DataFrame(columns=GRID_COLUMNS)
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    bins = tariff_manager.day_hour_bins(data.timestamp).astype(np.intp)
+    arrays = {
+        "pobor_przed": data.pobor_przed,
+        "oddanie_przed": data.oddanie_przed,
+        "bins": bins,
+    }
+    tasks = _split_tasks(capacities, efficiencies, workers)
+    if workers == 1 or len(tasks) == 1:
+        _shared_arrays.update(arrays)
+        try:
+            results = [_sweep_task(*task) for task in tasks]
+        finally:
+            _shared_arrays.clear()
+    else:
+        segments, spec = _share_arrays(arrays)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(tasks)),
+                initializer=_attach_shared,
+                initargs=(spec,),
+            ) as executor:
+                results = list(executor.map(_sweep_task, *zip(*tasks)))
+        finally:
+            _release(segments)
+
+    first_hour_of_bin = _first_hour_of_bins(bins)
+    num_months = _num_months(data)
+    oryginalny_pobor = float(data.pobor_przed.sum())
+    compiled = {tariff: tariff_manager.compile_tariff(tariff) for tariff in tariffs}
+
+    def settle(tariff, ratio, pobor_bins, oddanie_bins):
+        return _settle_summary(
+            _zone_stats_from_bins(
+                compiled[tariff], pobor_bins, oddanie_bins, first_hour_of_bin
+            ),
+            tariff_manager,
+            tariff,
+            num_months,
+            oryginalny_pobor,
+            ratio,
+        )
+
+    # Odniesienie: bez magazynu (niezależne od sprawności)
+    reference = simulate_storage(data.pobor_przed, data.oddanie_przed, 0.0)
+    reference_pobor = np.bincount(
+        bins, weights=reference.pobor_z_sieci, minlength=NUM_DAY_HOUR_BINS
+    )
+    reference_oddanie = np.bincount(
+        bins, weights=reference.oddanie_do_sieci, minlength=NUM_DAY_HOUR_BINS
+    )
+    reference_cost = {
+        (tariff, ratio): settle(tariff, ratio, reference_pobor, reference_oddanie)[
+            "calkowity_koszt"
+        ]
+        for tariff in tariffs
+        for ratio in net_metering_ratios
+    }
+
+    rows = []
+    for efficiency, chunk, pobor_z_sieci, oddanie_do_sieci in results:
+        for k, capacity in enumerate(chunk):
+            pobor_bins, oddanie_bins = pobor_z_sieci[:, k], oddanie_do_sieci[:, k]
+            for tariff in tariffs:
+                for ratio in net_metering_ratios:
+                    summary = settle(tariff, ratio, pobor_bins, oddanie_bins)
+                    rows.append(
+                        {
+                            "taryfa": tariff,
+                            "netmetering": ratio,
+                            "sprawnosc": efficiency,
+                            "pojemnosc_kwh": capacity,
+                            "pobor_z_sieci_kwh": float(pobor_bins.sum()),
+                            "oddanie_do_sieci_kwh": float(oddanie_bins.sum()),
+                            "calkowity_koszt_zl": summary["calkowity_koszt"],
+                            "oszczednosc_energii_kwh": summary["oszczednosc"],
+                            "oszczednosc_zl": reference_cost[(tariff, ratio)]
+                            - summary["calkowity_koszt"],
+                        }
+                    )
+    order = {tariff: i for i, tariff in enumerate(tariffs)}
+    df = pd.DataFrame(rows, columns=GRID_COLUMNS)
+    df["_order"] = df["taryfa"].map(order)
+    return (
+        df.sort_values(
+            ["_order", "netmetering", "sprawnosc", "pojemnosc_kwh"],
+            na_position="first",
+            kind="stable",
+        )
+        .drop(columns="_order")
+        .reset_index(drop=True)
+    )
+
+
+def export_grid(df: pd.DataFrame, file_path: str):
+    """Zapisuje siatkę do pliku Parquet (.parquet) albo CSV (każde inne rozszerzenie)."""
+    try:
+        if Path(file_path).suffix.lower() == ".parquet":
+            df.to_parquet(file_path, index=False)
+        else:
+            df.to_csv(file_path, index=False, decimal=",", sep=";", float_format="%.3f")
+        print(
+            f"\nPomyślnie wyeksportowano siatkę kosztów ({len(df)} wierszy) do pliku: {file_path}"
+        )
+    except ImportError:
+        print(
+            "\nBłąd: zapis do Parquet wymaga biblioteki pyarrow "
+            "(pip install eanalizer[parquet])."
+        )
+    except Exception as e:
+        print(f"\nBłąd podczas eksportowania siatki kosztów: {e}")
@@ -0,0 +1,116 @@
+# eanalizer/http_utils.py
+"""
+Wspólne narzędzia HTTP: sesja requests z pulą połączeń keep-alive,
+zapytania GET z limitem czasu i ponawianiem z wykładniczym odstępem oraz
+ogranicznik liczby zapytań (token bucket) współdzielony przez wątki.
+"""
+
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+# Statusy, przy których ponowienie zapytania ma sens (przeciążenie, błąd serwera).
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Ogranicznik tempa zapytań: wiadro mieści `capacity` żetonów i odnawia
+    się w tempie `rate` żetonów na sekundę. acquire() zabiera jeden żeton,
+    czekając, aż będzie dostępny - dzięki temu wiele wątków razem nie
+    przekracza limitu serwera, a pierwsze `capacity` zapytań idzie od razu.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("Tempo odnawiania żetonów musi być dodatnie.")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Czy błąd requests jest przejściowy (połączenie, limit czasu, 429/5xx)."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in RETRYABLE_STATUSES
+
+
+class HttpError(Exception):
+    """Zapytanie nie powiodło się (także po wyczerpaniu ponowień)."""
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    Tworzy sesję, której pula połączeń mieści pool_size jednoczesnych
+    połączeń do jednego hosta - tak, by wątki nie zamykały sobie nawzajem
+    połączeń keep-alive.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_json(
+    session: requests.Session,
+    url: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    params: Optional[dict] = None,
+) -> Any:
+    """
+    Wykonuje GET i zwraca zdekodowany JSON. Błędy połączenia, przekroczenie
+    czasu oraz statusy z RETRYABLE_STATUSES są ponawiane do `retries` razy,
+    z odstępem backoff * 2**próba sekund. Pozostałe statusy i błędy requests
+    (np. ChunkedEncodingError, TooManyRedirects) oraz wyczerpanie ponowień
+    kończą się wyjątkiem HttpError.
+    """
+    last_error: Optional[str] = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            last_error = str(e)
+            continue
+        except requests.RequestException as e:
+            raise HttpError(str(e)) from e
+        if response.status_code in RETRYABLE_STATUSES:
+            last_error = f"status {response.status_code}"
+            continue
+        if response.status_code != 200:
+            raise HttpError(f"status {response.status_code}")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise HttpError(f"niepoprawna odpowiedź JSON: {e}") from e
+    raise HttpError(f"{last_error} (po {retries + 1} próbach)")
@@ -0,0 +1,138 @@
+# eanalizer/manifest.py
+"""
+Manifest plików danych w katalogu danych (manifest.json).
+
+Dla każdego pliku CSV Enei przechowuje rozmiar, czas modyfikacji, skrót
+zawartości, liczbę pełnych rekordów, pierwszą i ostatnią godzinę z danymi
+oraz informację, czy plik jest kompletny (nie zawiera wartości "---").
+Dzięki temu raport zakresu danych i decyzje o pominięciu pobierania nie
+wymagają czytania ani parsowania plików - wystarczy jedno wywołanie stat().
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def row_key(line: str) -> str:
+    """Znacznik czasu wiersza CSV Enei (pierwsza kolumna) bez cudzysłowów i '='."""
+    return line.split(";", 1)[0].replace("=", "").replace('"', "").strip()
+
+
+def _parse_row_hour(line: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(row_key(line)).replace(minute=0, second=0)
+    except ValueError:
+        return None
+
+
+def describe_csv(content: str) -> Dict[str, Any]:
+    """
+    Wylicza metadane treści pliku CSV: liczbę pełnych rekordów (bez "---"),
+    pierwszą i ostatnią godzinę z danymi (ISO, obcięte do pełnej godziny,
+    jak w data_loader) i kompletność pliku. Bajty NUL, którymi Enea przeplata
+    tekst, są pomijane jak w data_loader.
+    """
+    content = content.replace("\0", "")
+    rows, first, last = 0, None, None
+    for line in content.splitlines()[1:]:
+        if not line.strip() or "---" in line:
+            continue
+        hour = _parse_row_hour(line)
+        if hour is None:
+            continue
+        rows += 1
+        first = hour if first is None or hour < first else first
+        last = hour if last is None or hour > last else last
+    return {
+        "rows": rows,
+        "first": first.isoformat() if first else None,
+        "last": last.isoformat() if last else None,
+        "valid": "---" not in content,
+    }
+
+
+class DataManifest:
+    """
+    Manifest katalogu danych. Metody są bezpieczne dla wątków (pobieranie
+    lat odbywa się równolegle); zapis na dysk jest atomowy.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / MANIFEST_FILE_NAME
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("version") == MANIFEST_VERSION:
+                self._files = stored.get("files", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def get(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Wpis pliku, jeśli zgadza się z jego bieżącym rozmiarem i czasem modyfikacji."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._files.get(Path(file_path).name)
+        if (
+            entry is not None
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return entry
+        return None
+
+    def update(self, file_path: Path, content: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Przelicza wpis pliku (z podanej treści albo czytając plik) i zapisuje
+        manifest. Wywoływane po każdym zapisie pobranego pliku.
+        """
+        file_path = Path(file_path)
+        if content is None:
+            content = file_path.read_text(encoding="utf-8", errors="replace")
+        stat = os.stat(file_path)
+        entry = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+            **describe_csv(content),
+        }
+        with self._lock:
+            self._files[file_path.name] = entry
+            self._save_locked()
+        return entry
+
+    def ensure(self, file_path: Path) -> Dict[str, Any]:
+        """Aktualny wpis pliku - z manifestu albo, gdy go brak lub jest nieaktualny, przeliczony."""
+        return self.get(file_path) or self.update(file_path)
+
+    def _save_locked(self):
+        self._files = {
+            name: entry
+            for name, entry in self._files.items()
+            if (self.data_dir / name).is_file()
+        }
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": MANIFEST_VERSION, "files": self._files},
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Ostrzeżenie: Nie udało się zapisać manifestu {self.path}: {e}")
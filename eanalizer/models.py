@@ -1,5 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 
 @dataclass
@@ -19,3 +22,212 @@ class SimulationResult:
     pobor_z_magazynu: float
     oddanie_do_magazynu: float
     stan_magazynu: float
+
+
+ENERGY_FIELDS = ("pobor_przed", "oddanie_przed", "pobor", "oddanie")
+
+
+def _to_datetime(value: np.datetime64) -> datetime:
+    return value.astype("datetime64[us]").item()
+
+
+class EnergySeries:
+    """
+    Kolumnowy szereg czasowy danych pomiarowych: ciągłe tablice NumPy
+    timestamp (datetime64[ns]) oraz pobor_przed/oddanie_przed/pobor/oddanie
+    (float64), zamiast listy obiektów EnergyData.
+
+    Dla zgodności wstecznej szereg zachowuje się jak sekwencja EnergyData:
+    obsługuje len(), iterację, indeksowanie (series[0].timestamp) i
+    porównanie z listą; to_list() zwraca dawną List[EnergyData].
+
+    Szereg pamięta, czy jest posortowany po czasie (is_sorted). Dla
+    posortowanego szeregu time_range() czyta końce tablicy w O(1), a
+    between() wycina zakres dat przez searchsorted jako widok tablic (bez
+    kopiowania); wycinki posortowanego szeregu też są oznaczone jako
+    posortowane.
+    """
+
+    def __init__(self, timestamp, pobor_przed, oddanie_przed, pobor, oddanie):
+        self.timestamp = np.ascontiguousarray(timestamp, dtype="datetime64[ns]")
+        self.pobor_przed = np.ascontiguousarray(pobor_przed, dtype=np.float64)
+        self.oddanie_przed = np.ascontiguousarray(oddanie_przed, dtype=np.float64)
+        self.pobor = np.ascontiguousarray(pobor, dtype=np.float64)
+        self.oddanie = np.ascontiguousarray(oddanie, dtype=np.float64)
+        # None = jeszcze nie sprawdzono; wyznaczane leniwie przez is_sorted.
+        self._sorted: Optional[bool] = None
+
+    @classmethod
+    def empty(cls) -> "EnergySeries":
+        return cls(np.empty(0, dtype="datetime64[ns]"), *([np.empty(0)] * 4))
+
+    @classmethod
+    def from_records(cls, records: Iterable[EnergyData]) -> "EnergySeries":
+        """Buduje szereg z listy (lub dowolnej sekwencji) obiektów EnergyData."""
+        records = list(records)
+        if not records:
+            return cls.empty()
+        return cls(
+            np.array([r.timestamp for r in records], dtype="datetime64[ns]"),
+            *(
+                np.fromiter(
+                    (getattr(r, field) for r in records), np.float64, len(records)
+                )
+                for field in ENERGY_FIELDS
+            ),
+        )
+
+    @classmethod
+    def from_data(
+        cls, data: Union["EnergySeries", Sequence[EnergyData], None]
+    ) -> "EnergySeries":
+        """Zwraca data bez zmian, jeśli już jest szeregiem, a w przeciwnym razie go buduje."""
+        if isinstance(data, cls):
+            return data
+        return cls.from_records(data or [])
+
+    @classmethod
+    def concat(cls, series_list: Iterable["EnergySeries"]) -> "EnergySeries":
+        series_list = [s for s in series_list if len(s)]
+        if not series_list:
+            return cls.empty()
+        if len(series_list) == 1:
+            return series_list[0]
+        return cls(
+            np.concatenate([s.timestamp for s in series_list]),
+            *(
+                np.concatenate([getattr(s, field) for s in series_list])
+                for field in ENERGY_FIELDS
+            ),
+        )
+
+    @classmethod
+    def merge(cls, series_list: Iterable["EnergySeries"]) -> "EnergySeries":
+        """
+        Łączy szeregi (np. z nakładających się plików) w jeden posortowany
+        szereg bez zdublowanych godzin: znacznik czasu obecny w kilku
+        szeregach bierzemy tylko z ostatniego z nich. Powtórzenia w obrębie
+        jednego szeregu (kwadranse tej samej godziny, godzina powtórzona przy
+        zmianie czasu) pozostają bez zmian.
+        """
+        series_list = [s for s in series_list if len(s)]
+        if len(series_list) <= 1:
+            return (series_list[0] if series_list else cls.empty()).sorted()
+        merged = cls.concat(series_list)
+        # Typowy przypadek: posortowane pliki kolejnych lat, bez nakładania się
+        if all(s.is_sorted for s in series_list) and all(
+            a.timestamp[-1] < b.timestamp[0]
+            for a, b in zip(series_list, series_list[1:])
+        ):
+            merged._sorted = True
+            return merged
+        source = np.repeat(np.arange(len(series_list)), [len(s) for s in series_list])
+        # Sortowanie po czasie, a w obrębie znacznika po numerze szeregu (stabilne)
+        order = np.lexsort((source, merged.timestamp))
+        timestamps, sources = merged.timestamp[order], source[order]
+        group_starts = np.flatnonzero(
+            np.concatenate(([True], timestamps[1:] != timestamps[:-1]))
+        )
+        latest = np.maximum.reduceat(sources, group_starts)
+        group_sizes = np.diff(np.append(group_starts, len(order)))
+        result = merged[order[sources == np.repeat(latest, group_sizes)]]
+        result._sorted = True
+        return result
+
+    @property
+    def is_sorted(self) -> bool:
+        """Czy znaczniki czasu są niemalejące (sprawdzane raz, potem zapamiętane)."""
+        if self._sorted is None:
+            self._sorted = len(self) < 2 or bool(
+                np.all(self.timestamp[1:] >= self.timestamp[:-1])
+            )
+        return self._sorted
+
+    def sorted(self) -> "EnergySeries":
+        """Zwraca szereg posortowany (stabilnie) po znaczniku czasu."""
+        if self.is_sorted:
+            return self
+        result = self[np.argsort(self.timestamp, kind="stable")]
+        result._sorted = True
+        return result
+
+    def between(
+        self, start: Optional[np.datetime64], end: Optional[np.datetime64]
+    ) -> "EnergySeries":
+        """
+        Rekordy z przedziału [start, end) - wycinek posortowanego szeregu
+        wyznaczony przez searchsorted w O(log n), współdzielący tablice z
+        szeregiem źródłowym. Brak granicy (None) oznacza początek/koniec danych.
+        """
+        data = self.sorted()
+        lo = 0 if start is None else np.searchsorted(data.timestamp, start, "left")
+        hi = len(data) if end is None else np.searchsorted(data.timestamp, end, "left")
+        return data[lo : max(lo, hi)]
+
+    def time_range(self) -> Tuple[datetime, datetime]:
+        """Najwcześniejszy i najpóźniejszy znacznik czasu w szeregu."""
+        if not len(self):
+            raise ValueError("Pusty szereg nie ma zakresu czasu.")
+        if self.is_sorted:
+            return _to_datetime(self.timestamp[0]), _to_datetime(self.timestamp[-1])
+        return _to_datetime(self.timestamp.min()), _to_datetime(self.timestamp.max())
+
+    def to_list(self) -> List[EnergyData]:
+        """Konwersja do dawnej reprezentacji List[EnergyData]."""
+        return list(self)
+
+    def to_frame(self):
+        """Zwraca DataFrame z kolumnami timestamp/pobor_przed/oddanie_przed/pobor/oddanie."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "timestamp": self.timestamp,
+                **{field: getattr(self, field) for field in ENERGY_FIELDS},
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __iter__(self) -> Iterator[EnergyData]:
+        columns = [getattr(self, field).tolist() for field in ENERGY_FIELDS]
+        for timestamp, *values in zip(
+            self.timestamp.astype("datetime64[us]").tolist(), *columns
+        ):
+            yield EnergyData(timestamp, *values)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return EnergyData(
+                _to_datetime(self.timestamp[key]),
+                *(float(getattr(self, field)[key]) for field in ENERGY_FIELDS),
+            )
+        result = EnergySeries(
+            self.timestamp[key], *(getattr(self, field)[key] for field in ENERGY_FIELDS)
+        )
+        # Wycinek o dodatnim kroku i maska logiczna zachowują kolejność rekordów
+        keeps_order = (isinstance(key, slice) and (key.step or 1) > 0) or (
+            isinstance(key, np.ndarray) and key.dtype == bool
+        )
+        if keeps_order and self._sorted:
+            result._sorted = True
+        return result
+
+    def __eq__(self, other):
+        if isinstance(other, EnergySeries):
+            return len(self) == len(other) and all(
+                np.array_equal(getattr(self, f), getattr(other, f))
+                for f in ("timestamp",) + ENERGY_FIELDS
+            )
+        if isinstance(other, (list, tuple)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "EnergySeries(0 rekordów)"
+        start, end = self.time_range()
+        return f"EnergySeries({len(self)} rekordów, {start} - {end})"
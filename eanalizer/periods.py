@@ -0,0 +1,15 @@
+# eanalizer/periods.py
+"""
+Nazwy predefiniowanych okresów analizy (--okres). Osobny, lekki moduł, by
+budowa parsera argumentów CLI nie wymagała importu pandas/numpy z core.
+"""
+
+PREDEFINED_PERIODS = [
+    "ostatnie-30-dni",
+    "ostatnie-90-dni",
+    "ostatnie-365-dni",
+    "biezacy-miesiac",
+    "poprzedni-miesiac",
+    "biezacy-rok",
+    "poprzedni-rok",
+]
@@ -1,74 +1,168 @@
-import json
-from datetime import datetime, timedelta
-from typing import Dict, Optional, List
-import pandas as pd
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, List, Tuple
 from pathlib import Path  # Import Path
+from urllib.parse import urljoin
 
-API_URL_TEMPLATE = "https://api.raporty.pse.pl/api/rce-pln?$filter=business_date+eq+'{date_str}'&$orderby=business_date+asc&$first=20000"
+import numpy as np
+
+from . import http_utils
+from .price_store import RcePriceStore
+
+API_BASE_URL = "https://api.raporty.pse.pl/api/rce-pln"
+API_RANGE_URL_TEMPLATE = "{base_url}?$filter=business_date+ge+'{start_str}'+and+business_date+le+'{end_str}'&$orderby=business_date+asc&$first=20000"
 DATA_START_DATE = datetime(2024, 7, 1)
 
+# Maksymalna liczba jednoczesnych zapytań do API PSE.
+DEFAULT_MAX_WORKERS = 8
+REQUEST_TIMEOUT = 30.0
+REQUEST_RETRIES = 3
+RETRY_BACKOFF = 0.5
+# Najdłuższy zakres dni w jednym zapytaniu (ok. 90 x 96 rekordów kwadransowych,
+# czyli poniżej limitu $first); dłuższe luki dzielone są na kilka zakresów.
+RANGE_MAX_DAYS = 90
+
+
+def _group_into_ranges(date_strs: List[str], max_days: int) -> List[List[str]]:
+    """Dzieli posortowaną listę dni na ciągłe zakresy o długości co najwyżej max_days."""
+    ranges: List[List[str]] = []
+    previous = None
+    for date_str in date_strs:
+        day = datetime.strptime(date_str, "%Y-%m-%d")
+        if (
+            previous is None
+            or day - previous != timedelta(days=1)
+            or len(ranges[-1]) >= max_days
+        ):
+            ranges.append([])
+        ranges[-1].append(date_str)
+        previous = day
+    return ranges
+
 
-def _fetch_daily_rce_from_api(date_str: str) -> Optional[List[Dict]]:
-    """Pobiera dane RCE dla jednego dnia z API PSE używając standardowych bibliotek."""
-    url = API_URL_TEMPLATE.format(date_str=date_str)
-    print(f"Pobieranie danych RCE dla {date_str} z API PSE...")
+def _fetch_range_rce_from_api(
+    session, date_strs: List[str], base_url: str = API_BASE_URL
+) -> Optional[Dict[str, List[Dict]]]:
+    """
+    Pobiera dane RCE dla ciągłego zakresu dni jednym zapytaniem (filtry ge/le),
+    podążając za stronicowaniem (nextLink), i dzieli wynik z powrotem na dni
+    według business_date. Dni bez rekordów dostają pustą listę; None oznacza
+    błąd sieci/API dla całego zakresu.
+    """
+    start_str, end_str = date_strs[0], date_strs[-1]
+    url = API_RANGE_URL_TEMPLATE.format(
+        base_url=base_url, start_str=start_str, end_str=end_str
+    )
+    by_day: Dict[str, List[Dict]] = {date_str: [] for date_str in date_strs}
     try:
-        with urllib.request.urlopen(url) as response:
-            if response.status == 200:
-                data = response.read()
-                json_data = json.loads(data)
-                return json_data.get("value", [])
-            else:
-                print(
-                    f"Błąd: API zwróciło status {response.status} dla daty {date_str}"
-                )
-                return None
-    except Exception as e:
-        print(f"Błąd podczas połączenia z API dla {date_str}: {e}")
+        while url:
+            json_data = http_utils.get_json(
+                session,
+                url,
+                timeout=REQUEST_TIMEOUT,
+                retries=REQUEST_RETRIES,
+                backoff=RETRY_BACKOFF,
+            )
+            for record in json_data.get("value", []):
+                day = record.get("business_date") or str(record.get("dtime", ""))[:10]
+                if day in by_day:
+                    by_day[day].append(record)
+            next_url = json_data.get("nextLink") or json_data.get("@odata.nextLink")
+            url = urljoin(url, next_url) if next_url and next_url != url else None
+    except (http_utils.HttpError, AttributeError) as e:
+        print(f"Błąd podczas połączenia z API dla {start_str} - {end_str}: {e}")
         return None
+    return by_day
 
 
-def get_hourly_rce_prices(
-    start_date: datetime, end_date: datetime, cache_dir: Path
-) -> Dict[datetime, float]:
-    """Pobiera, cachuje i przetwarza ceny RCE, zwracając słownik cen godzinowych."""
-    cache_dir.mkdir(parents=True, exist_ok=True)  # Use the passed cache_dir
-    all_prices: Dict[datetime, float] = {}
-    current_date = start_date
-
-    while current_date <= end_date:
-        date_str = current_date.strftime("%Y-%m-%d")
-        cache_path = cache_dir / f"{date_str}.json"  # Use the passed cache_dir
-
-        daily_data = None
-        if cache_path.is_file():  # Use Path.is_file()
-            with open(cache_path, "r") as f:
-                daily_data = json.load(f)
-        elif current_date >= DATA_START_DATE:
-            daily_data = _fetch_daily_rce_from_api(date_str)
+def _fetch_days_concurrently(
+    date_strs: List[str], base_url: str, max_workers: int
+) -> Dict[str, Optional[List[Dict]]]:
+    """
+    Pobiera brakujące dni zakresami (patrz _fetch_range_rce_from_api): pula
+    co najwyżej max_workers wątków korzysta ze wspólnej sesji z połączeniami
+    keep-alive. Dni z zakresu, którego nie udało się pobrać, mają wartość None.
+    """
+    if not date_strs:
+        return {}
+    ranges = _group_into_ranges(date_strs, RANGE_MAX_DAYS)
+    max_workers = max(1, min(max_workers, len(ranges)))
+    print(
+        f"Pobieranie danych RCE dla {len(date_strs)} dni z API PSE "
+        f"({len(ranges)} zapytań, do {max_workers} równolegle)..."
+    )
+    fetched: Dict[str, Optional[List[Dict]]] = {}
+    with http_utils.create_session(pool_size=max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda days: _fetch_range_rce_from_api(session, days, base_url),
+                ranges,
+            )
+            for days, by_day in zip(ranges, results):
+                for date_str in days:
+                    fetched[date_str] = None if by_day is None else by_day[date_str]
+    return fetched
+
+
+def get_hourly_rce_price_arrays(
+    start_date: datetime,
+    end_date: datetime,
+    cache_dir: Path,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    base_url: str = API_BASE_URL,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Zwraca ceny RCE dla dni od start_date do end_date (włącznie) jako dwie
+    tablice: godziny (datetime64[h], rosnąco) i ceny w zł/kWh.
+
+    Ceny przechowywane są w magazynie SQLite w cache_dir (patrz
+    eanalizer.price_store). Dni brakujące w magazynie pobierane są zakresami
+    dat (kilka zapytań zamiast jednego na dzień), równolegle - co najwyżej
+    max_workers zapytań naraz.
+    """
+    first_day, last_day = _as_date(start_date), _as_date(end_date)
+    with RcePriceStore(cache_dir) as store:
+        known_days = store.fetched_days(first_day, last_day)
+        missing_days = []
+        current = max(first_day, DATA_START_DATE.date())
+        while current <= last_day:
+            if current.isoformat() not in known_days:
+                missing_days.append(current.isoformat())
+            current += timedelta(days=1)
+
+        fetched = _fetch_days_concurrently(missing_days, base_url, max_workers)
+        for date_str, daily_data in fetched.items():
             if daily_data is None:
                 # Pobieranie się nie powiodło (błąd sieci/API) - nie zapisujemy
                 # do cache, aby kolejne uruchomienie mogło spróbować ponownie.
                 print(
                     f"Nie udało się pobrać cen RCE dla {date_str}; dzień zostanie pominięty w tym uruchomieniu."
                 )
-            else:
-                # Udane zapytanie, nawet jeśli nie ma jeszcze opublikowanych cen.
-                with open(cache_path, "w") as f:
-                    json.dump(daily_data, f)
-
-        if daily_data:
-            df = pd.DataFrame(daily_data)
-            if not df.empty and "dtime" in df.columns and "rce_pln" in df.columns:
-                df["dtime"] = df["dtime"].str.replace("a", "").str.replace("b", "")
-                df["dtime"] = pd.to_datetime(df["dtime"])
-                hourly_prices = (
-                    df.set_index("dtime")["rce_pln"].resample("h").mean() / 1000
-                )
-                for ts, price in hourly_prices.items():
-                    all_prices[ts] = price
+        # Udane zapytania zapisujemy, nawet jeśli nie ma jeszcze opublikowanych cen.
+        store.store_days(
+            (date_str, daily_data)
+            for date_str, daily_data in fetched.items()
+            if daily_data is not None
+        )
+        return store.hourly_prices(first_day, last_day + timedelta(days=1))
+
+
+def get_hourly_rce_prices(
+    start_date: datetime,
+    end_date: datetime,
+    cache_dir: Path,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    base_url: str = API_BASE_URL,
+) -> Dict[datetime, float]:
+    """
+    Pobiera, cachuje i przetwarza ceny RCE, zwracając słownik cen godzinowych.
+    Słownikowa nakładka na get_hourly_rce_price_arrays.
+    """
+    hours, prices = get_hourly_rce_price_arrays(
+        start_date, end_date, cache_dir, max_workers=max_workers, base_url=base_url
+    )
+    return dict(zip(hours.astype("datetime64[us]").tolist(), prices.tolist()))
 
-        current_date += timedelta(days=1)
 
-    return all_prices
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
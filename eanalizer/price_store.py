@@ -0,0 +1,194 @@
+# eanalizer/price_store.py
+"""
+Magazyn cen RCE w jednej bazie SQLite (cache_dir/rce_prices.sqlite).
+
+Ceny zapisywane są już znormalizowane (zł/kWh): kwadransowe w tabeli
+quarter_prices i uśrednione godzinowe w tabeli hourly_prices, indeksowane
+liczbą minut/godzin od epoki (czas lokalny, bez strefy). Tabela fetched_days
+zapamiętuje dni pobrane z API - także te, dla których PSE nie opublikowało
+jeszcze cen. Dawny cache (jeden plik <data>.json na dzień) jest przy
+otwarciu magazynu automatycznie importowany, a pliki usuwane.
+"""
+
+import json
+import re
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+STORE_FILE_NAME = "rce_prices.sqlite"
+
+_LEGACY_JSON_RE = re.compile(r"^\d{4}-\d{2}-\d{2}\.json$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetched_days (
+    business_date TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS quarter_prices (
+    minute INTEGER PRIMARY KEY,
+    business_date TEXT NOT NULL,
+    price REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hourly_prices (
+    hour INTEGER PRIMARY KEY,
+    business_date TEXT NOT NULL,
+    price REAL NOT NULL
+);
+"""
+
+
+def normalize_daily_records(
+    records: List[Dict],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Zamienia surowe rekordy API jednego dnia na ceny w zł/kWh: zwraca
+    (minuty, ceny kwadransowe, godziny, ceny godzinowe). Znaczniki czasu to
+    datetime64[m]/datetime64[h]; przyrostki "a"/"b" (zmiana czasu) są
+    pomijane, a zdublowane kwadranse uśredniane. Cena godziny to średnia
+    rekordów, których dtime po obcięciu do pełnej godziny na nią wypada.
+    """
+    dtimes, prices = [], []
+    for record in records:
+        dtime = record.get("dtime")
+        price = record.get("rce_pln")
+        if dtime is None or price is None:
+            continue
+        dtimes.append(str(dtime).replace("a", "").replace("b", "").replace(" ", "T"))
+        prices.append(float(price) / 1000)
+    if not dtimes:
+        empty = np.empty(0)
+        return (
+            np.empty(0, dtype="datetime64[m]"),
+            empty,
+            np.empty(0, dtype="datetime64[h]"),
+            empty,
+        )
+
+    minutes = np.array(dtimes, dtype="datetime64[m]")
+    prices = np.array(prices)
+    unique_minutes, inverse = np.unique(minutes, return_inverse=True)
+    quarter = np.bincount(inverse, weights=prices) / np.bincount(inverse)
+
+    hours = minutes.astype("datetime64[h]")
+    unique_hours, inverse = np.unique(hours, return_inverse=True)
+    hourly = np.bincount(inverse, weights=prices) / np.bincount(inverse)
+    return unique_minutes, quarter, unique_hours, hourly
+
+
+class RcePriceStore:
+    """Dostęp do bazy cen RCE; używany jako menedżer kontekstu."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / STORE_FILE_NAME
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(_SCHEMA)
+        self._migrate_legacy_json()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def fetched_days(self, start: date, end: date) -> Set[str]:
+        """Dni (RRRR-MM-DD) z zakresu [start, end], które są już w magazynie."""
+        rows = self._conn.execute(
+            "SELECT business_date FROM fetched_days"
+            " WHERE business_date BETWEEN ? AND ?",
+            (start.isoformat(), end.isoformat()),
+        )
+        return {row[0] for row in rows}
+
+    def store_days(self, days: Iterable[Tuple[str, List[Dict]]]):
+        """
+        Zapisuje pobrane dni (business_date, surowe rekordy API) w jednej
+        transakcji. Godziny i kwadranse wypadające w innej dobie niż
+        business_date (np. kwadrans kończący się o północy) nie nadpisują
+        cen zapisanych przez dzień, do którego należą.
+        """
+        with self._conn:
+            for business_date, records in days:
+                minutes, quarter, hours, hourly = normalize_daily_records(records)
+                own_day = np.datetime64(business_date, "D")
+                self._insert(
+                    "quarter_prices", "minute", business_date, minutes, quarter, own_day
+                )
+                self._insert(
+                    "hourly_prices", "hour", business_date, hours, hourly, own_day
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO fetched_days VALUES (?)", (business_date,)
+                )
+
+    def _insert(self, table, key, business_date, times, prices, own_day):
+        in_own_day = times.astype("datetime64[D]") == own_day
+        keys = times.astype(np.int64).tolist()
+        values = prices.tolist()
+        for replace, mask in (("REPLACE", in_own_day), ("IGNORE", ~in_own_day)):
+            self._conn.executemany(
+                f"INSERT OR {replace} INTO {table} ({key}, business_date, price)"
+                " VALUES (?, ?, ?)",
+                [
+                    (k, business_date, v)
+                    for k, v, selected in zip(keys, values, mask.tolist())
+                    if selected
+                ],
+            )
+
+    def hourly_prices(
+        self, start: datetime, end: datetime
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ceny godzinowe z przedziału [start, end) jako para tablic:
+        godziny (datetime64[h], rosnąco) i ceny w zł/kWh.
+        """
+        return self._select("hourly_prices", "hour", "h", start, end)
+
+    def quarter_prices(
+        self, start: datetime, end: datetime
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Ceny kwadransowe z przedziału [start, end) - datetime64[m] i zł/kWh."""
+        return self._select("quarter_prices", "minute", "m", start, end)
+
+    def _select(self, table, key, unit, start, end):
+        lo = np.datetime64(start, unit).astype(np.int64)
+        hi = np.datetime64(end, unit).astype(np.int64)
+        rows = self._conn.execute(
+            f"SELECT {key}, price FROM {table} WHERE {key} >= ? AND {key} < ?"
+            f" ORDER BY {key}",
+            (int(lo), int(hi)),
+        ).fetchall()
+        keys = np.fromiter((row[0] for row in rows), np.int64, len(rows))
+        prices = np.fromiter((row[1] for row in rows), np.float64, len(rows))
+        return keys.astype(f"datetime64[{unit}]"), prices
+
+    def _migrate_legacy_json(self):
+        """Importuje pliki <RRRR-MM-DD>.json z dawnego cache i je usuwa."""
+        legacy_files = sorted(
+            path
+            for path in self.cache_dir.iterdir()
+            if path.is_file() and _LEGACY_JSON_RE.match(path.name)
+        )
+        if not legacy_files:
+            return
+        days = []
+        for path in legacy_files:
+            try:
+                with open(path, "r") as f:
+                    days.append((path.stem, json.load(f) or []))
+            except (OSError, ValueError) as e:
+                print(f"Ostrzeżenie: Pominięto uszkodzony plik cache RCE {path}: {e}")
+        self.store_days(days)
+        for path in legacy_files:
+            path.unlink(missing_ok=True)
+        print(
+            f"Przeniesiono {len(days)} dni cen RCE z plików JSON do {self.path.name}."
+        )
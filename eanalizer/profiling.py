@@ -0,0 +1,170 @@
+# eanalizer/profiling.py
+"""
+Pomiar czasu etapów przebiegu programu (--profil / EANALIZER_PROFIL).
+
+Kod oznacza etapy blokiem `with profiling.stage("nazwa", records=n):`;
+gdy profilowanie jest wyłączone, stage() zwraca współdzielony pusty obiekt
+i nie mierzy niczego. Po włączeniu (enable()) czasy, liczba wywołań i
+przetworzonych rekordów sumowane są per nazwa etapu, a raport wypisywany
+na stderr albo zapisywany jako JSON.
+
+Moduł korzysta wyłącznie z biblioteki standardowej - jest importowany przy
+starcie CLI.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+PROFILE_ENV_VAR = "EANALIZER_PROFIL"
+# Wartości --profil / EANALIZER_PROFIL oznaczające raport na stderr (inne to ścieżka JSON).
+STDERR_TARGETS = ("-", "1", "stderr", "true", "tak")
+DISABLED_VALUES = ("", "0", "false", "nie")
+
+
+class _NullStage:
+    """Etap przy wyłączonym profilowaniu - przypisanie records jest ignorowane."""
+
+    records = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _StageTimer:
+    def __init__(self, profiler: "Profiler", name: str, records: Optional[int]):
+        self._profiler = profiler
+        self.name = name
+        # Liczbę rekordów można też ustawić wewnątrz bloku, gdy znana jest dopiero po etapie.
+        self.records = records
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler._record(
+            self.name, time.perf_counter() - self._start, self.records
+        )
+        return False
+
+
+class Profiler:
+    """Sumuje czasy etapów (w kolejności pierwszego wystąpienia)."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, records: Optional[int] = None) -> _StageTimer:
+        return _StageTimer(self, name, records)
+
+    def _record(self, name: str, elapsed: float, records: Optional[int]):
+        with self._lock:
+            entry = self._stages.setdefault(
+                name, {"czas_s": 0.0, "wywolania": 0, "rekordy": None}
+            )
+            entry["czas_s"] += elapsed
+            entry["wywolania"] += 1
+            if records is not None:
+                entry["rekordy"] = (entry["rekordy"] or 0) + int(records)
+
+    def report(self) -> Dict[str, Any]:
+        """Raport: całkowity czas oraz lista etapów z rekordami na sekundę."""
+        with self._lock:
+            stages = [
+                {
+                    "nazwa": name,
+                    **entry,
+                    "rekordy_na_s": (
+                        entry["rekordy"] / entry["czas_s"]
+                        if entry["rekordy"] is not None and entry["czas_s"] > 0
+                        else None
+                    ),
+                }
+                for name, entry in self._stages.items()
+            ]
+        return {
+            "calkowity_czas_s": time.perf_counter() - self._started,
+            "etapy": stages,
+        }
+
+    def format_report(self) -> str:
+        report = self.report()
+        width = max([len(s["nazwa"]) for s in report["etapy"]] + [len("Etap")])
+        lines = [
+            "--- Profil czasu wykonania ---",
+            f"{'Etap':<{width}}  {'czas [s]':>9}  {'wywołania':>9}  "
+            f"{'rekordy':>9}  {'rekordy/s':>11}",
+        ]
+        for s in report["etapy"]:
+            rekordy = "" if s["rekordy"] is None else str(s["rekordy"])
+            na_s = "" if s["rekordy_na_s"] is None else f"{s['rekordy_na_s']:.0f}"
+            lines.append(
+                f"{s['nazwa']:<{width}}  {s['czas_s']:>9.4f}  {s['wywolania']:>9}  "
+                f"{rekordy:>9}  {na_s:>11}"
+            )
+        lines.append(f"Całkowity czas: {report['calkowity_czas_s']:.4f} s")
+        return "\n".join(lines)
+
+    def emit(self, target: str):
+        """Wypisuje raport na stderr (target z STDERR_TARGETS) albo zapisuje go do pliku JSON."""
+        if target.lower() in STDERR_TARGETS:
+            print(self.format_report(), file=sys.stderr)
+            return
+        try:
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, indent=2, ensure_ascii=False)
+            print(
+                f"Zapisano profil czasu wykonania do pliku: {target}", file=sys.stderr
+            )
+        except OSError as e:
+            print(f"Błąd zapisu profilu do pliku {target}: {e}", file=sys.stderr)
+
+
+_active: Optional[Profiler] = None
+
+
+def profile_target(cli_value: Optional[str]) -> Optional[str]:
+    """
+    Cel raportu: wartość --profil, a bez niej zmienna EANALIZER_PROFIL.
+    None oznacza wyłączone profilowanie.
+    """
+    value = cli_value
+    if value is None:
+        value = os.environ.get(PROFILE_ENV_VAR)
+    if value is None or value.strip().lower() in DISABLED_VALUES:
+        return None
+    return value.strip()
+
+
+def enable() -> Profiler:
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def stage(name: str, records: Optional[int] = None):
+    """Blok mierzonego etapu; bez włączonego profilowania nie robi nic."""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name, records)
@@ -0,0 +1,124 @@
+# eanalizer/result_cache.py
+"""
+Pamięć podręczna wyników analiz (cache_dir/results.sqlite).
+
+Podsumowania run_full_analysis i compare_tariffs zapisywane są jako JSON
+pod kluczem łączącym odcisk danych wejściowych (skrót kolumn szeregu),
+skrót pliku taryf oraz parametry analizy. Ponowne uruchomienie tego samego
+raportu nie wykonuje więc ani symulacji, ani wyceny. Liczba wpisów jest
+ograniczona; po przekroczeniu limitu usuwane są wpisy najdawniej użyte (LRU).
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Optional
+
+from .models import EnergySeries
+
+RESULT_CACHE_FILE_NAME = "results.sqlite"
+# Zwiększane przy każdej zmianie sposobu liczenia wyników - unieważnia stary cache.
+RESULT_CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 256
+
+# last_used to licznik logiczny (kolejne użycia), a nie czas zegarowy - kolejność
+# LRU jest jednoznaczna także dla użyć w tej samej milisekundzie.
+_NEXT_USE = "(SELECT COALESCE(MAX(last_used), 0) + 1 FROM results)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+"""
+
+
+def data_fingerprint(data: EnergySeries) -> str:
+    """Skrót znaczników czasu i kolumn przed bilansowaniem - wejścia wszystkich analiz."""
+    digest = hashlib.sha256()
+    for column in (data.timestamp, data.pobor_przed, data.oddanie_przed):
+        digest.update(column.tobytes())
+    return digest.hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def open_result_cache(cache_dir: Path) -> Optional["ResultCache"]:
+    """Otwiera cache wyników; przy błędzie wypisuje ostrzeżenie i zwraca None."""
+    try:
+        return ResultCache(cache_dir)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Ostrzeżenie: Nie udało się otworzyć pamięci podręcznej wyników: {e}")
+        return None
+
+
+class ResultCache:
+    """Trwały cache wyników z limitem wpisów i usuwaniem najdawniej użytych."""
+
+    def __init__(self, cache_dir: Path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / RESULT_CACHE_FILE_NAME
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(self.path, timeout=10)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def make_key(kind: str, data: EnergySeries, tariffs_file: Path, **params) -> str:
+        """
+        Klucz wyniku: rodzaj analizy, odcisk danych, skrót pliku taryf i
+        parametry (muszą dać się zapisać w JSON).
+        """
+        payload = {
+            "version": RESULT_CACHE_VERSION,
+            "kind": kind,
+            "data": data_fingerprint(data),
+            "tariffs": file_hash(tariffs_file),
+            "params": params,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Zapisany wynik (odświeżając czas jego użycia) albo None."""
+        row = self._conn.execute(
+            "SELECT value FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._conn:
+            self._conn.execute(
+                f"UPDATE results SET last_used = {_NEXT_USE} WHERE key = ?", (key,)
+            )
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        """Zapisuje wynik i usuwa najdawniej użyte wpisy ponad limit."""
+        with self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO results VALUES (?, ?, {_NEXT_USE})",
+                (key, json.dumps(value)),
+            )
+            self._conn.execute(
+                "DELETE FROM results WHERE key NOT IN ("
+                " SELECT key FROM results ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
@@ -0,0 +1,303 @@
+# eanalizer/scenarios.py
+"""
+Wsadowe uruchamianie wielu scenariuszy (taryfa, zakres dat, pojemność i
+sprawność magazynu, net-metering) na jednym wczytaniu danych.
+
+Plik scenariuszy (JSON albo YAML - ten drugi wymaga opcjonalnej biblioteki
+PyYAML, `pip install eanalizer[yaml]`) to lista scenariuszy albo obiekt
+{"domyslne": {...}, "scenariusze": [...]}. Pole scenariusza podane jako
+lista rozwijane jest w iloczyn kartezjański, np. {"taryfa": ["G11", "G12w"],
+"magazyn": [0, 5, 10]} to sześć scenariuszy.
+
+Scenariusze o tym samym zakresie dat i sprawności magazynu liczone są
+jednym przebiegiem symulacji dla wszystkich pojemności naraz
+(simulate_storage_sweep), a każda taryfa i współczynnik net-meteringu
+wyceniane są już tylko z 48 koszyków (typ dnia, godzina).
+"""
+
+import itertools
+import json
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .core import (
+    _first_hour_of_bins,
+    _num_months,
+    _settle_summary,
+    _zone_stats_from_bins,
+    resolve_predefined_period,
+    select_date_range,
+)
+from .models import EnergySeries
+from .periods import PREDEFINED_PERIODS
+from .simulation import simulate_storage_sweep
+from .tariffs import NUM_DAY_HOUR_BINS, TariffManager
+
+try:
+    import yaml
+except ImportError:  # PyYAML jest opcjonalny - patrz docstring modułu
+    yaml = None
+
+RESULT_COLUMNS = [
+    "nazwa",
+    "taryfa",
+    "data_start",
+    "data_koniec",
+    "rekordy",
+    "magazyn_kwh",
+    "sprawnosc",
+    "netmetering",
+    "pobor_z_sieci_kwh",
+    "oddanie_do_sieci_kwh",
+    "koszt_energii_zl",
+    "oplaty_stale_zl",
+    "calkowity_koszt_zl",
+    "oszczednosc_energii_kwh",
+    "niewykorzystany_kredyt_kwh",
+]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Jedna kombinacja parametrów analizy (pola jak flagi CLI)."""
+
+    nazwa: str
+    taryfa: str = "G11"
+    data_start: Optional[str] = None
+    data_koniec: Optional[str] = None
+    okres: Optional[str] = None
+    ostatnie_dni: Optional[int] = None
+    magazyn: float = 0.0
+    sprawnosc: float = 0.9
+    netmetering: Optional[float] = None
+
+
+_SCENARIO_FIELDS = [field.name for field in fields(Scenario)]
+
+
+def _make_scenario(values: Dict[str, Any]) -> Scenario:
+    try:
+        scenario = Scenario(
+            nazwa=str(values["nazwa"]),
+            taryfa=str(values.get("taryfa", "G11")),
+            data_start=values.get("data_start"),
+            data_koniec=values.get("data_koniec"),
+            okres=values.get("okres"),
+            ostatnie_dni=(
+                int(values["ostatnie_dni"])
+                if values.get("ostatnie_dni") is not None
+                else None
+            ),
+            magazyn=float(values.get("magazyn") or 0.0),
+            sprawnosc=float(values.get("sprawnosc", 0.9)),
+            netmetering=(
+                float(values["netmetering"])
+                if values.get("netmetering") is not None
+                else None
+            ),
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError(
+            f"Scenariusz '{values.get('nazwa')}': niepoprawna wartość ({e})."
+        )
+    if scenario.okres is not None and scenario.okres not in PREDEFINED_PERIODS:
+        raise ValueError(
+            f"Scenariusz '{scenario.nazwa}': nieznany okres '{scenario.okres}'."
+        )
+    if (scenario.okres or scenario.ostatnie_dni is not None) and (
+        scenario.data_start or scenario.data_koniec
+    ):
+        raise ValueError(
+            f"Scenariusz '{scenario.nazwa}': pola okres/ostatnie_dni nie mogą być "
+            "używane razem z data_start/data_koniec."
+        )
+    if scenario.magazyn < 0 or not 0 < scenario.sprawnosc <= 1:
+        raise ValueError(
+            f"Scenariusz '{scenario.nazwa}': wymagane magazyn >= 0 i "
+            "0 < sprawnosc <= 1."
+        )
+    return scenario
+
+
+def expand_scenarios(
+    entries: List[Dict[str, Any]], defaults: Optional[Dict[str, Any]] = None
+) -> List[Scenario]:
+    """
+    Zamienia wpisy pliku scenariuszy na listę Scenario. Pola-listy są
+    rozwijane w iloczyn kartezjański, a do nazwy rozwiniętego scenariusza
+    dopisywane są wartości tych pól, np. "dom [taryfa=G12w, magazyn=10]".
+    """
+    scenarios = []
+    for number, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Scenariusz nr {number} musi być obiektem.")
+        values = {**(defaults or {}), **entry}
+        unknown = sorted(set(values) - set(_SCENARIO_FIELDS))
+        if unknown:
+            raise ValueError(
+                f"Scenariusz nr {number}: nieznane pola {', '.join(unknown)}."
+            )
+        base_name = str(values.pop("nazwa", f"scenariusz {number}"))
+        varying = [key for key, value in values.items() if isinstance(value, list)]
+        for combination in itertools.product(*(values[key] for key in varying)):
+            chosen = {**values, **dict(zip(varying, combination))}
+            name = base_name
+            if varying:
+                name += (
+                    " ["
+                    + ", ".join(f"{k}={v}" for k, v in zip(varying, combination))
+                    + "]"
+                )
+            scenarios.append(_make_scenario({**chosen, "nazwa": name}))
+    return scenarios
+
+
+def load_scenarios(path) -> List[Scenario]:
+    """Wczytuje plik scenariuszy JSON (.json) albo YAML (.yaml/.yml)."""
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            if yaml is None:
+                raise ValueError(
+                    "Pliki YAML wymagają biblioteki PyYAML "
+                    "(pip install eanalizer[yaml])."
+                )
+            content = yaml.safe_load(f)
+        else:
+            content = json.load(f)
+    defaults = None
+    if isinstance(content, dict):
+        defaults = content.get("domyslne")
+        content = content.get("scenariusze")
+    if not isinstance(content, list) or not content:
+        raise ValueError(
+            f"Plik {path} nie zawiera listy scenariuszy "
+            "(lista albo obiekt z polem 'scenariusze')."
+        )
+    return expand_scenarios(content, defaults)
+
+
+def _resolve_range(
+    data: EnergySeries, scenario: Scenario
+) -> Tuple[Optional[str], Optional[str]]:
+    if scenario.okres or scenario.ostatnie_dni is not None:
+        return resolve_predefined_period(
+            data, okres=scenario.okres, ostatnie_dni=scenario.ostatnie_dni
+        )
+    return scenario.data_start, scenario.data_koniec
+
+
+def run_scenarios(
+    data: EnergySeries, tariff_manager: TariffManager, scenarios: List[Scenario]
+) -> pd.DataFrame:
+    """
+    Liczy wszystkie scenariusze na jednym szeregu danych i zwraca tabelę z
+    jednym wierszem na scenariusz (kolumny RESULT_COLUMNS, w kolejności
+    scenariuszy). Scenariusz bez danych w zakresie dat ma rekordy = 0 i
+    puste wyniki.
+    """
+    data = EnergySeries.from_data(data)
+    resolved = []
+    for scenario in scenarios:
+        taryfa = tariff_manager.resolve_tariff_name(scenario.taryfa)
+        if taryfa is None:
+            raise ValueError(
+                f"Scenariusz '{scenario.nazwa}': nieznana taryfa '{scenario.taryfa}'."
+            )
+        resolved.append(replace(scenario, taryfa=taryfa))
+    scenarios = resolved
+
+    groups: Dict[Tuple, List[int]] = {}
+    for index, scenario in enumerate(scenarios):
+        key = (*_resolve_range(data, scenario), scenario.sprawnosc)
+        groups.setdefault(key, []).append(index)
+
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(scenarios)
+    for (data_start, data_koniec, sprawnosc), indices in groups.items():
+        selected = select_date_range(data, data_start, data_koniec)
+        if not len(selected):
+            for index in indices:
+                rows[index] = {**asdict(scenarios[index]), "rekordy": 0}
+            continue
+
+        bins = tariff_manager.day_hour_bins(selected.timestamp)
+        capacities = np.unique([scenarios[index].magazyn for index in indices])
+        sweep = simulate_storage_sweep(
+            selected.pobor_przed,
+            selected.oddanie_przed,
+            capacities,
+            sprawnosc,
+            bins=bins,
+            num_bins=NUM_DAY_HOUR_BINS,
+        )
+        first_hour_of_bin = _first_hour_of_bins(bins)
+        num_months = _num_months(selected)
+        oryginalny_pobor = float(selected.pobor_przed.sum())
+        first, last = selected.time_range()
+
+        for index in indices:
+            scenario = scenarios[index]
+            k = int(np.searchsorted(capacities, scenario.magazyn))
+            summary = _settle_summary(
+                _zone_stats_from_bins(
+                    tariff_manager.compile_tariff(scenario.taryfa),
+                    sweep.pobor_z_sieci[:, k],
+                    sweep.oddanie_do_sieci[:, k],
+                    first_hour_of_bin,
+                ),
+                tariff_manager,
+                scenario.taryfa,
+                num_months,
+                oryginalny_pobor,
+                scenario.netmetering,
+            )
+            strefy = summary["strefy"].values()
+            rows[index] = {
+                **asdict(scenario),
+                "data_start": first.date().isoformat(),
+                "data_koniec": last.date().isoformat(),
+                "rekordy": len(selected),
+                "pobor_z_sieci_kwh": sum(z["pobor_z_sieci"] for z in strefy),
+                "oddanie_do_sieci_kwh": sum(z["oddanie_do_sieci"] for z in strefy),
+                "koszt_energii_zl": summary["calkowity_koszt"]
+                - summary["oplaty_stale"],
+                "oplaty_stale_zl": summary["oplaty_stale"],
+                "calkowity_koszt_zl": summary["calkowity_koszt"],
+                "oszczednosc_energii_kwh": summary["oszczednosc"],
+                "niewykorzystany_kredyt_kwh": summary.get(
+                    "niewykorzystany_kredyt_koncowy"
+                ),
+            }
+
+    df = pd.DataFrame(rows).rename(columns={"magazyn": "magazyn_kwh"})
+    return df.reindex(columns=RESULT_COLUMNS)
+
+
+def export_scenario_results(df: pd.DataFrame, file_path: str):
+    """Zapisuje tabelę wyników do pliku JSON (.json) albo CSV (każde inne rozszerzenie)."""
+    try:
+        if Path(file_path).suffix.lower() == ".json":
+            df.to_json(file_path, orient="records", force_ascii=False, indent=2)
+        else:
+            df.to_csv(file_path, index=False, decimal=",", sep=";", float_format="%.3f")
+        print(f"\nPomyślnie wyeksportowano wyniki scenariuszy do pliku: {file_path}")
+    except Exception as e:
+        print(f"\nBłąd podczas eksportowania wyników scenariuszy: {e}")
+
+
+def print_scenario_results(df: pd.DataFrame):
+    """Wypisuje tabelę wyników scenariuszy."""
+    print(f"\n--- Wyniki scenariuszy ({len(df)}) ---")
+    columns = [
+        "nazwa",
+        "data_start",
+        "data_koniec",
+        "calkowity_koszt_zl",
+        "oplaty_stale_zl",
+        "oszczednosc_energii_kwh",
+    ]
+    print(df[columns].to_string(index=False, float_format=lambda v: f"{v:.2f}"))
@@ -0,0 +1,362 @@
+# eanalizer/sensitivity.py
+"""
+Wrażliwość kosztu na ceny taryfy (--zmiany-cen, --ceny-kandydujace) bez
+ponownej symulacji magazynu.
+
+Po jednym przebiegu run_full_analysis przepływy z siecią są znane, a koszt
+jest liniowy względem cen stref: dla wektora cen
+
+    p = [energy_price strefy 1..Z, dist_price strefy 1..Z, dist_fee]
+
+koszt to p @ q, gdzie q = [energia do opłacenia w strefach (dwukrotnie, dla
+ceny energii i dystrybucji), liczba miesięcy]. Macierz q budowana jest raz
+(kolumna na wariant: z magazynem i bez niego), a tysiące wektorów cen
+wyceniane są jednym mnożeniem macierzy.
+
+Z net-meteringiem energia do opłacenia zależy od kolejności stref według
+ceny (kredyt przechodzi ze stref droższych do tańszych, jak w
+_settle_summary), ale dla ustalonej kolejności nadal jest stała - wektory
+cen grupowane są więc według kolejności stref, a każda grupa to jedno
+mnożenie macierzy.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .core import (
+    EnergyDataLike,
+    _first_hour_of_bins,
+    _num_months,
+    _zone_stats_from_bins,
+    run_full_analysis,
+)
+from .models import EnergySeries
+from .tariffs import NUM_DAY_HOUR_BINS, TariffManager
+
+SENSITIVITY_COLUMNS = [
+    "scenariusz",
+    "calkowity_koszt_zl",
+    "zmiana_kosztu_zl",
+    "zmiana_kosztu_proc",
+    "koszt_bez_magazynu_zl",
+    "oszczednosc_magazynu_zl",
+]
+BASE_SCENARIO = "ceny bazowe"
+# Liczba scenariuszy wypisywanych przez print_price_sensitivity.
+MAX_PRINTED_SCENARIOS = 20
+
+_COMPONENTS = {"energia": "energy", "dystrybucja": "dist"}
+_CHANGE_PATTERN = re.compile(
+    r"^(?P<target>[^=.]+)(?:\.(?P<component>[^=]+))?=(?P<value>[+-]?\d+(?:\.\d+)?)(?P<percent>%?)$"
+)
+
+
+@dataclass
+class PriceScenarios:
+    """Wektory cen do wyceny: nazwy i ceny stref (N x Z) oraz opłata stała (N)."""
+
+    names: List[str]
+    energy_prices: np.ndarray
+    dist_prices: np.ndarray
+    fees: np.ndarray
+
+
+class PriceSensitivity:
+    """
+    Macierz energii w strefach jednej taryfy, zbudowana raz z przepływów
+    run_full_analysis (z magazynem i bez niego), do wyceny wielu wektorów
+    cen. Strefy ułożone są w kolejności pierwszego wystąpienia w danych, jak
+    w _zone_stats_from_bins; strefy taryfy nieobecne w danych mają zerową
+    energię.
+    """
+
+    def __init__(
+        self,
+        data: EnergyDataLike,
+        tariff_manager: TariffManager,
+        tariff: str,
+        capacity: float = 0.0,
+        net_metering_ratio: Optional[float] = None,
+        storage_efficiency: float = 1.0,
+    ):
+        data = EnergySeries.from_data(data)
+        if not len(data):
+            raise ValueError("Brak danych do analizy wrażliwości cen.")
+        self.tariff = tariff
+        self.net_metering_ratio = net_metering_ratio
+        self.num_months = _num_months(data)
+
+        compiled = tariff_manager.compile_tariff(tariff)
+        bins = tariff_manager.day_hour_bins(data.timestamp)
+        first_hour_of_bin = _first_hour_of_bins(bins)
+        configurations = [capacity, 0.0] if capacity > 0 else [0.0]
+        zone_flows = []
+        for config_capacity in configurations:
+            _, simulation_df = run_full_analysis(
+                data,
+                config_capacity,
+                tariff_manager,
+                tariff,
+                storage_efficiency=storage_efficiency,
+            )
+            zone_flows.append(
+                _zone_stats_from_bins(
+                    compiled,
+                    np.bincount(
+                        bins,
+                        weights=simulation_df["pobor_z_sieci"].to_numpy(),
+                        minlength=NUM_DAY_HOUR_BINS,
+                    ),
+                    np.bincount(
+                        bins,
+                        weights=simulation_df["oddanie_do_sieci"].to_numpy(),
+                        minlength=NUM_DAY_HOUR_BINS,
+                    ),
+                    first_hour_of_bin,
+                )
+            )
+
+        self.zone_names = list(zone_flows[0]) + [
+            zone for zone in compiled.zone_names if zone not in zone_flows[0]
+        ]
+        zone_of_bin = compiled.zone_table.ravel()
+        first_bin = [
+            int(np.flatnonzero(zone_of_bin == compiled.zone_names.index(zone))[0])
+            for zone in self.zone_names
+        ]
+        self.base_energy = compiled.energy_table.ravel()[first_bin]
+        self.base_dist = compiled.dist_table.ravel()[first_bin]
+        self.base_fee = float(tariff_manager.get_fixed_fee(tariff))
+
+        # Energia pobrana/oddana w strefach: wiersz = strefa, kolumna = wariant
+        def matrix(key):
+            return np.array(
+                [
+                    [flows.get(zone, {}).get(key, 0.0) for flows in zone_flows]
+                    for zone in self.zone_names
+                ]
+            )
+
+        self.pobor = matrix("pobor_z_sieci")
+        self.oddanie = matrix("oddanie_do_sieci")
+        self.has_reference = capacity > 0
+
+    def base_scenarios(self, count: int = 1) -> PriceScenarios:
+        """count kopii bazowego wektora cen taryfy."""
+        return PriceScenarios(
+            names=[BASE_SCENARIO] * count,
+            energy_prices=np.tile(self.base_energy, (count, 1)),
+            dist_prices=np.tile(self.base_dist, (count, 1)),
+            fees=np.full(count, self.base_fee),
+        )
+
+    def zone_index(self, zone: str) -> int:
+        lookup = {name.lower(): i for i, name in enumerate(self.zone_names)}
+        try:
+            return lookup[zone.strip().lower()]
+        except KeyError:
+            raise ValueError(
+                f"Taryfa {self.tariff.upper()} nie ma strefy '{zone}' "
+                f"(dostępne: {', '.join(self.zone_names)})."
+            )
+
+    def _quantities(self, order: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Macierz q (2Z+1 x liczba wariantów): energia do opłacenia w strefach
+        dla danej kolejności stref (od najdroższej) i liczba miesięcy.
+        """
+        billed = self.pobor
+        if self.net_metering_ratio is not None:
+            billed = np.empty_like(self.pobor)
+            credit = np.zeros(self.pobor.shape[1])
+            for zone in order:
+                available = self.oddanie[zone] * self.net_metering_ratio + credit
+                billed[zone] = np.maximum(0.0, self.pobor[zone] - available)
+                credit = np.maximum(0.0, available - self.pobor[zone])
+        months = np.full((1, billed.shape[1]), float(self.num_months))
+        return np.vstack([billed, billed, months])
+
+    def evaluate(self, scenarios: PriceScenarios) -> np.ndarray:
+        """Koszt całkowity (N x liczba wariantów) dla wszystkich wektorów cen."""
+        prices = np.hstack(
+            [scenarios.energy_prices, scenarios.dist_prices, scenarios.fees[:, None]]
+        )
+        if self.net_metering_ratio is None:
+            return prices @ self._quantities(None)
+        # Kolejność jak w _settle_summary: malejąco po cenie, remisy bez zmian
+        orders = np.argsort(
+            -(scenarios.energy_prices + scenarios.dist_prices), axis=1, kind="stable"
+        )
+        unique_orders, group = np.unique(orders, axis=0, return_inverse=True)
+        group = group.ravel()
+        costs = np.empty((len(prices), self.pobor.shape[1]))
+        for g, order in enumerate(unique_orders):
+            members = group == g
+            costs[members] = prices[members] @ self._quantities(order)
+        return costs
+
+
+def _apply_change(current: np.ndarray, value: float, relative: bool) -> np.ndarray:
+    return current * (1 + value / 100) if relative else np.full_like(current, value)
+
+
+def parse_price_changes(
+    specs: Sequence[str], sensitivity: PriceSensitivity
+) -> PriceScenarios:
+    """
+    Buduje scenariusze z opisów zmian cen, po jednym scenariuszu na opis.
+    Opis to lista zmian rozdzielonych przecinkami, każda w postaci
+    CEL[.SKLADNIK]=ZMIANA, gdzie CEL to nazwa strefy, '*' (wszystkie strefy)
+    albo 'oplata' (opłata stała), SKLADNIK to 'energia' lub 'dystrybucja'
+    (domyślnie oba), a ZMIANA to zmiana procentowa (+15%) albo nowa cena.
+    Np. "szczytowa=+15%", "*.dystrybucja=-5%,oplata=60".
+    """
+    scenarios = sensitivity.base_scenarios(len(specs))
+    scenarios.names = list(specs)
+    for i, spec in enumerate(specs):
+        for change in spec.split(","):
+            match = _CHANGE_PATTERN.match(change.strip())
+            if match is None:
+                raise ValueError(
+                    f"Niepoprawna zmiana ceny '{change.strip()}' w scenariuszu "
+                    f"'{spec}' (oczekiwano np. szczytowa=+15% lub "
+                    "pozaszczytowa.energia=0.45)."
+                )
+            target = match["target"].strip()
+            value, relative = float(match["value"]), bool(match["percent"])
+            if target.lower() == "oplata":
+                if match["component"]:
+                    raise ValueError(
+                        f"Opłata stała nie ma składników (scenariusz '{spec}')."
+                    )
+                scenarios.fees[i] = _apply_change(
+                    scenarios.fees[i : i + 1], value, relative
+                )[0]
+                continue
+            component = (match["component"] or "").strip().lower()
+            if component and component not in _COMPONENTS:
+                raise ValueError(
+                    f"Nieznany składnik ceny '{match['component']}' w scenariuszu "
+                    f"'{spec}' (dostępne: energia, dystrybucja)."
+                )
+            zones = slice(None) if target == "*" else [sensitivity.zone_index(target)]
+            for name in [_COMPONENTS[component]] if component else ["energy", "dist"]:
+                prices = getattr(scenarios, f"{name}_prices")
+                prices[i, zones] = _apply_change(prices[i, zones], value, relative)
+    return scenarios
+
+
+def load_price_candidates(
+    file_path: str, sensitivity: PriceSensitivity
+) -> PriceScenarios:
+    """
+    Wczytuje kandydujące ceny z pliku CSV w formacie config/tariffs.csv:
+    kolumny scenariusz, zone_name oraz energy_price i/lub dist_price,
+    opcjonalnie dist_fee i tariff (wiersze innych taryf są pomijane). Strefy
+    i wartości nieobecne w scenariuszu zachowują ceny bazowe.
+    """
+    df = pd.read_csv(file_path)
+    missing = {"scenariusz", "zone_name"} - set(df.columns)
+    if missing:
+        raise ValueError(f"Brak kolumn: {', '.join(sorted(missing))}.")
+    if "tariff" in df.columns:
+        df = df[df["tariff"].astype(str).str.lower() == sensitivity.tariff.lower()]
+    codes, names = pd.factorize(df["scenariusz"].astype(str))
+    scenarios = sensitivity.base_scenarios(len(names))
+    scenarios.names = names.tolist()
+
+    zones = np.array(
+        [sensitivity.zone_index(str(zone)) for zone in df["zone_name"].unique()],
+        dtype=np.intp,
+    )
+    zone_codes = zones[pd.factorize(df["zone_name"])[0]]
+    for column, prices in (
+        ("energy_price", scenarios.energy_prices),
+        ("dist_price", scenarios.dist_prices),
+    ):
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors="raise").to_numpy()
+            present = ~np.isnan(values)
+            prices[codes[present], zone_codes[present]] = values[present]
+    if "dist_fee" in df.columns:
+        values = pd.to_numeric(df["dist_fee"], errors="raise").to_numpy()
+        present = ~np.isnan(values)
+        scenarios.fees[codes[present]] = values[present]
+    return scenarios
+
+
+def run_price_sensitivity(
+    sensitivity: PriceSensitivity, scenarios: PriceScenarios
+) -> pd.DataFrame:
+    """
+    Tabela (SENSITIVITY_COLUMNS): pierwszy wiersz to ceny bazowe, kolejne to
+    scenariusze; zmiana kosztu liczona jest względem cen bazowych, a
+    oszczędność magazynu względem tej samej wyceny bez magazynu.
+    """
+    base = sensitivity.base_scenarios()
+    costs = sensitivity.evaluate(
+        PriceScenarios(
+            names=base.names + scenarios.names,
+            energy_prices=np.vstack([base.energy_prices, scenarios.energy_prices]),
+            dist_prices=np.vstack([base.dist_prices, scenarios.dist_prices]),
+            fees=np.concatenate([base.fees, scenarios.fees]),
+        )
+    )
+    koszt = costs[:, 0]
+    koszt_bez_magazynu = costs[:, 1] if sensitivity.has_reference else koszt
+    zmiana = koszt - koszt[0]
+    return pd.DataFrame(
+        {
+            "scenariusz": base.names + scenarios.names,
+            "calkowity_koszt_zl": koszt,
+            "zmiana_kosztu_zl": zmiana,
+            "zmiana_kosztu_proc": 100 * zmiana / koszt[0] if koszt[0] else 0.0,
+            "koszt_bez_magazynu_zl": koszt_bez_magazynu,
+            "oszczednosc_magazynu_zl": koszt_bez_magazynu - koszt,
+        },
+        columns=SENSITIVITY_COLUMNS,
+    )
+
+
+def print_price_sensitivity(
+    df: pd.DataFrame,
+    tariff: str,
+    capacity: float,
+    net_metering_ratio: Optional[float],
+):
+    """Wypisuje tabelę run_price_sensitivity (do MAX_PRINTED_SCENARIOS wierszy)."""
+    print(f"\n--- Wrażliwość kosztu na ceny (taryfa {tariff.upper()}) ---")
+    if capacity > 0:
+        print(f"Magazyn fizyczny: {capacity} kWh")
+    if net_metering_ratio is not None:
+        print(f"Uwzględniono net-metering ze współczynnikiem {net_metering_ratio}")
+    header = f"{'Scenariusz':<36} {'Koszt [zł]':>12} {'Zmiana [zł]':>12} {'Zmiana':>8}"
+    if capacity > 0:
+        header += f" {'Oszczędność magazynu [zł]':>26}"
+    print(header)
+    for row in df.head(MAX_PRINTED_SCENARIOS + 1).itertuples():
+        line = (
+            f"{row.scenariusz[:36]:<36} {row.calkowity_koszt_zl:>12.2f} "
+            f"{row.zmiana_kosztu_zl:>+12.2f} {row.zmiana_kosztu_proc:>+7.1f}%"
+        )
+        if capacity > 0:
+            line += f" {row.oszczednosc_magazynu_zl:>26.2f}"
+        print(line)
+    if len(df) > MAX_PRINTED_SCENARIOS + 1:
+        print(f"... oraz {len(df) - MAX_PRINTED_SCENARIOS - 1} kolejnych scenariuszy")
+        scenarios = df.iloc[1:]
+        cheapest = scenarios.loc[scenarios["calkowity_koszt_zl"].idxmin()]
+        dearest = scenarios.loc[scenarios["calkowity_koszt_zl"].idxmax()]
+        print(
+            f"Najniższy koszt: {cheapest['scenariusz']} "
+            f"({cheapest['calkowity_koszt_zl']:.2f} zł)"
+        )
+        print(
+            f"Najwyższy koszt: {dearest['scenariusz']} "
+            f"({dearest['calkowity_koszt_zl']:.2f} zł)"
+        )
+    print("---------------------------------------------")
@@ -0,0 +1,356 @@
+# eanalizer/server.py
+"""
+Tryb serwera: długo działający proces trzymający w pamięci wczytane dane
+pomiarowe i TariffManager (święta, skompilowane taryfy), który odpowiada na
+zapytania analityczne w formacie JSON przez lokalne HTTP (127.0.0.1).
+
+Zapytania:
+    GET  /status   - stan danych (liczba plików i rekordów, zakres, przeładowania)
+    POST /analiza  - obiekt JSON z parametrami analizy (patrz run_request)
+
+Katalog danych (lub lista plików) i plik taryf są co `poll_interval` sekund
+sprawdzane przez stat(); zmiana rozmiaru, czasu modyfikacji albo zestawu
+plików powoduje ponowne wczytanie danych w tle.
+"""
+
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .core import (
+    compare_tariffs,
+    resolve_predefined_period,
+    run_capacity_sweep,
+    run_full_analysis,
+    select_date_range,
+)
+from .data_loader import load_from_enea_files
+from .models import EnergySeries
+from .periods import PREDEFINED_PERIODS
+from .tariffs import TariffManager
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_STORAGE_EFFICIENCY = 0.9
+
+REQUEST_MODES = ("analiza", "porownanie", "zakres")
+
+
+def _optional_float(request: Dict[str, Any], key: str) -> Optional[float]:
+    value = request.get(key)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Pole '{key}' musi być liczbą.")
+
+
+def run_request(
+    data: EnergySeries, tariff_manager: TariffManager, request: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Wykonuje jedno zapytanie analityczne na wczytanych danych. Pola zapytania
+    (wszystkie opcjonalne):
+
+        tryb         - "analiza" (domyślnie), "porownanie" albo "zakres"
+        taryfa       - taryfa dla trybów "analiza"/"zakres" (domyślnie G11)
+        taryfy       - lista taryf dla trybu "porownanie" (domyślnie wszystkie)
+        data_start, data_koniec - zakres dat RRRR-MM-DD
+        okres, ostatnie_dni     - jak --okres/--ostatnie-dni w CLI
+        magazyn      - pojemność magazynu fizycznego w kWh (domyślnie 0)
+        magazyny     - lista pojemności dla trybu "zakres"
+        sprawnosc    - sprawność magazynu (domyślnie 0.9)
+        netmetering  - współczynnik net-meteringu (null - bez net-meteringu)
+
+    Zwraca słownik gotowy do serializacji JSON; błędne parametry zgłaszane
+    są jako ValueError.
+    """
+    if not isinstance(request, dict):
+        raise ValueError("Zapytanie musi być obiektem JSON.")
+    tryb = request.get("tryb", "analiza")
+    if tryb not in REQUEST_MODES:
+        raise ValueError(
+            f"Nieznany tryb '{tryb}'. Dostępne: {', '.join(REQUEST_MODES)}."
+        )
+
+    data_start, data_koniec = request.get("data_start"), request.get("data_koniec")
+    okres, ostatnie_dni = request.get("okres"), request.get("ostatnie_dni")
+    if okres is not None or ostatnie_dni is not None:
+        if data_start or data_koniec:
+            raise ValueError(
+                "Pola okres/ostatnie_dni nie mogą być używane razem z "
+                "data_start/data_koniec."
+            )
+        if okres is not None and okres not in PREDEFINED_PERIODS:
+            raise ValueError(f"Nieznany okres: {okres}")
+        if ostatnie_dni is not None and (
+            not isinstance(ostatnie_dni, int) or ostatnie_dni <= 0
+        ):
+            raise ValueError("Pole ostatnie_dni musi być liczbą całkowitą dodatnią.")
+        data_start, data_koniec = resolve_predefined_period(
+            data, okres=okres, ostatnie_dni=ostatnie_dni
+        )
+    selected = select_date_range(data, data_start, data_koniec)
+    if not len(selected):
+        raise ValueError("Brak danych w podanym zakresie dat.")
+
+    taryfa = request.get("taryfa", "G11")
+    if tryb != "porownanie":
+        resolved = tariff_manager.resolve_tariff_name(taryfa)
+        if resolved is None:
+            raise ValueError(f"Nieznana taryfa '{taryfa}'.")
+        taryfa = resolved
+    capacity = _optional_float(request, "magazyn") or 0.0
+    storage_efficiency = _optional_float(request, "sprawnosc")
+    if storage_efficiency is None:
+        storage_efficiency = DEFAULT_STORAGE_EFFICIENCY
+    net_metering_ratio = _optional_float(request, "netmetering")
+
+    if tryb == "analiza":
+        wynik, _ = run_full_analysis(
+            selected,
+            capacity,
+            tariff_manager,
+            taryfa,
+            net_metering_ratio=net_metering_ratio,
+            storage_efficiency=storage_efficiency,
+        )
+    elif tryb == "porownanie":
+        taryfy = request.get("taryfy")
+        if taryfy is not None:
+            if not isinstance(taryfy, list):
+                raise ValueError("Pole 'taryfy' musi być listą nazw taryf.")
+            resolved = [tariff_manager.resolve_tariff_name(t) for t in taryfy]
+            unknown = [str(t) for t, r in zip(taryfy, resolved) if r is None]
+            if unknown:
+                raise ValueError(f"Nieznane taryfy: {', '.join(unknown)}.")
+            taryfy = resolved
+        wynik = compare_tariffs(
+            selected,
+            tariff_manager,
+            capacity,
+            net_metering_ratio=net_metering_ratio,
+            storage_efficiency=storage_efficiency,
+            tariffs=taryfy,
+        )
+    else:
+        magazyny = request.get("magazyny")
+        if not isinstance(magazyny, list) or not magazyny:
+            raise ValueError("Tryb 'zakres' wymaga niepustej listy 'magazyny'.")
+        try:
+            capacities = [float(c) for c in magazyny]
+        except (TypeError, ValueError):
+            raise ValueError("Pole 'magazyny' musi być listą liczb.")
+        wynik = run_capacity_sweep(
+            selected,
+            capacities,
+            tariff_manager,
+            taryfa,
+            net_metering_ratio=net_metering_ratio,
+            storage_efficiency=storage_efficiency,
+        ).to_dict(orient="records")
+
+    first, last = selected.time_range()
+    return {
+        "tryb": tryb,
+        "data_start": first.date().isoformat(),
+        "data_koniec": last.date().isoformat(),
+        "rekordy": len(selected),
+        "wynik": wynik,
+    }
+
+
+class AnalysisWorkspace:
+    """
+    Dane pomiarowe i TariffManager trzymane w pamięci między zapytaniami.
+
+    `sources` to katalog z plikami CSV (nowe pliki są zauważane) albo lista
+    konkretnych plików. refresh() porównuje sygnaturę plików (nazwa, rozmiar,
+    czas modyfikacji) z ostatnio wczytaną i w razie zmiany wczytuje dane
+    ponownie; snapshot() zwraca bieżącą parę (dane, TariffManager) bez
+    dotykania dysku.
+    """
+
+    def __init__(
+        self,
+        sources,
+        tariffs_file: Path,
+        cache_dir: Optional[Path] = None,
+    ):
+        if isinstance(sources, (str, Path)):
+            self.data_dir: Optional[Path] = Path(sources)
+            self.files: Sequence[str] = ()
+        else:
+            self.data_dir = None
+            self.files = [str(path) for path in sources]
+        self.tariffs_file = Path(tariffs_file)
+        self.cache_dir = cache_dir
+        self.reloads = 0
+        self.file_count = 0
+        self.loaded_at: Optional[datetime] = None
+        self._signature = None
+        self._snapshot: Tuple[EnergySeries, Optional[TariffManager]] = (
+            EnergySeries.empty(),
+            None,
+        )
+        self._lock = threading.Lock()
+
+    def _data_files(self) -> List[str]:
+        if self.data_dir is not None:
+            return sorted(glob.glob(os.path.join(self.data_dir, "*.csv")))
+        return list(self.files)
+
+    def _current_signature(self, files: List[str]):
+        signature = []
+        for path in files + [str(self.tariffs_file)]:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def refresh(self) -> bool:
+        """Wczytuje dane ponownie, jeśli pliki się zmieniły. Zwraca True po przeładowaniu."""
+        with self._lock:
+            files = self._data_files()
+            signature = self._current_signature(files)
+            if signature == self._signature:
+                return False
+            data = load_from_enea_files(files, cache_dir=self.cache_dir)
+            tariff_manager = None
+            if len(data):
+                first, last = data.time_range()
+                tariff_manager = TariffManager(
+                    str(self.tariffs_file), years=range(first.year, last.year + 1)
+                )
+            self._snapshot = (data, tariff_manager)
+            self._signature = signature
+            self.file_count = len(files)
+            self.reloads += 1
+            self.loaded_at = datetime.now()
+            return True
+
+    def snapshot(self) -> Tuple[EnergySeries, Optional[TariffManager]]:
+        return self._snapshot
+
+    def status(self) -> Dict[str, Any]:
+        data, _ = self._snapshot
+        status = {
+            "pliki": self.file_count,
+            "rekordy": len(data),
+            "przeladowania": self.reloads,
+            "wczytano": self.loaded_at.isoformat() if self.loaded_at else None,
+            "data_start": None,
+            "data_koniec": None,
+        }
+        if len(data):
+            first, last = data.time_range()
+            status["data_start"] = first.date().isoformat()
+            status["data_koniec"] = last.date().isoformat()
+        return status
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        data, tariff_manager = self.snapshot()
+        if tariff_manager is None:
+            raise ValueError("Brak wczytanych danych do analizy.")
+        return run_request(data, tariff_manager, request)
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    """Serwer HTTP odpowiadający na zapytania JSON na podstawie AnalysisWorkspace."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        workspace: AnalysisWorkspace,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        super().__init__((host, port), _RequestHandler)
+        self.workspace = workspace
+        self.poll_interval = poll_interval
+        self._stop_watching = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+
+    def _watch(self):
+        while not self._stop_watching.wait(self.poll_interval):
+            try:
+                if self.workspace.refresh():
+                    print("Wykryto zmiany w plikach danych - dane wczytano ponownie.")
+            except Exception as e:
+                print(f"Błąd podczas ponownego wczytywania danych: {e}")
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        self.workspace.refresh()
+        self._watcher.start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._stop_watching.set()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: AnalysisServer
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/status":
+            self._send_json(200, self.server.workspace.status())
+        else:
+            self._send_json(404, {"blad": f"Nieznana ścieżka: {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/analiza":
+            self._send_json(404, {"blad": f"Nieznana ścieżka: {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            self._send_json(200, self.server.workspace.handle(request))
+        except ValueError as e:
+            self._send_json(400, {"blad": str(e)})
+        except Exception as e:
+            self._send_json(500, {"blad": f"Błąd wewnętrzny: {e}"})
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_analysis_server(
+    sources,
+    tariffs_file: Path,
+    cache_dir: Optional[Path] = None,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+):
+    """Uruchamia serwer analiz i obsługuje zapytania do przerwania (Ctrl+C)."""
+    workspace = AnalysisWorkspace(sources, tariffs_file, cache_dir=cache_dir)
+    with AnalysisServer(workspace, host, port, poll_interval) as server:
+        bound_host, bound_port = server.server_address[:2]
+        print(
+            f"Serwer analiz nasłuchuje na http://{bound_host}:{bound_port} "
+            "(GET /status, POST /analiza). Ctrl+C kończy pracę."
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nZatrzymano serwer analiz.")
@@ -0,0 +1,215 @@
+# eanalizer/settlement.py
+"""
+Miesięczne rozliczenie net-meteringu z wygasaniem kredytu
+(--rozliczenie-miesieczne).
+
+run_full_analysis rozlicza net-metering raz dla całego okresu. Tutaj każdy
+miesiąc ma własne rozliczenie: energia oddana w danym miesiącu (razy
+współczynnik) tworzy partię kredytu, którą można wykorzystać w tym samym
+miesiącu i przez CREDIT_VALIDITY_MONTHS kolejnych miesięcy. Kredyt zużywany
+jest od najstarszej partii (FIFO), a niewykorzystana reszta partii wygasa.
+W obrębie miesiąca strefy rozliczane są jak w _settle_summary - od
+najdroższej, z przenoszeniem kredytu do tańszych. Kredyt z poprzednich
+miesięcy trafia najpierw do najdroższej strefy.
+
+Księga kredytu to dwie sumy narastające, utworzony i zdjęty (wykorzystany
+lub wygasły) kredyt, oraz kolejka (deque) partii. Partia zapamiętuje
+miesiąc i sumę narastającą utworzonego kredytu na swoim końcu. Zużycie
+przesuwa tylko sumę zdjętego kredytu, a reszta najstarszej partii to
+różnica sum, więc każda partia jest dodawana i usuwana z kolejki raz.
+Przepływy godzinowe sumowane są w koszykach (miesiąc, typ dnia, godzina)
+jednym bincount, więc całość jest O(n) także dla wielu lat danych.
+"""
+
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .core import EnergyDataLike, _first_hour_of_bins, _zone_stats_from_bins
+from .models import EnergySeries
+from .simulation import simulate_storage
+from .tariffs import NUM_DAY_HOUR_BINS, TariffManager
+
+# Liczba miesięcy po miesiącu powstania, przez które kredyt można wykorzystać.
+CREDIT_VALIDITY_MONTHS = 12
+
+STATEMENT_COLUMNS = [
+    "miesiac",
+    "pobor_z_sieci_kwh",
+    "oddanie_do_sieci_kwh",
+    "kredyt_z_poprzednich_kwh",
+    "kredyt_wytworzony_kwh",
+    "kredyt_wykorzystany_kwh",
+    "kredyt_wygasly_kwh",
+    "kredyt_na_koniec_kwh",
+    "energia_do_oplacenia_kwh",
+    "koszt_energii_zl",
+    "oplata_stala_zl",
+    "koszt_zl",
+]
+
+
+def settle_monthly(
+    timestamps: np.ndarray,
+    pobor_z_sieci: np.ndarray,
+    oddanie_do_sieci: np.ndarray,
+    tariff_manager: TariffManager,
+    tariff: str,
+    net_metering_ratio: Optional[float] = None,
+    credit_validity_months: int = CREDIT_VALIDITY_MONTHS,
+) -> pd.DataFrame:
+    """
+    Wyciąg miesiąc po miesiącu (STATEMENT_COLUMNS) dla godzinowych
+    przepływów z siecią. Bez net-meteringu (None) kredyt nie powstaje, a
+    koszt to cena strefy razy pobór. Miesiące bez danych są pomijane w
+    wyciągu, ale liczą się do wygasania kredytu.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+    if not len(timestamps):
+        return pd.DataFrame(columns=STATEMENT_COLUMNS)
+    months = timestamps.astype("datetime64[M]")
+    first_month = months.min()
+    month_index = (months - first_month).astype(np.intp)
+    num_months = int(month_index.max()) + 1
+
+    bins = tariff_manager.day_hour_bins(timestamps)
+    keys = month_index * NUM_DAY_HOUR_BINS + bins
+    size = num_months * NUM_DAY_HOUR_BINS
+    pobor_bins = np.bincount(keys, weights=pobor_z_sieci, minlength=size).reshape(
+        num_months, NUM_DAY_HOUR_BINS
+    )
+    oddanie_bins = np.bincount(keys, weights=oddanie_do_sieci, minlength=size).reshape(
+        num_months, NUM_DAY_HOUR_BINS
+    )
+    present = np.bincount(month_index, minlength=num_months) > 0
+
+    compiled = tariff_manager.compile_tariff(tariff)
+    first_hour_of_bin = _first_hour_of_bins(bins)
+    fixed_fee = float(tariff_manager.get_fixed_fee(tariff))
+
+    # Partie kredytu: (miesiąc powstania, suma narastająca kredytu na końcu partii)
+    lots: Deque[Tuple[int, float]] = deque()
+    created = removed = 0.0
+    rows = []
+    for month in np.flatnonzero(present).tolist():
+        expired = 0.0
+        while lots and lots[0][0] + credit_validity_months < month:
+            _, lot_end = lots.popleft()
+            if lot_end > removed:
+                expired += lot_end - removed
+                removed = lot_end
+        carried = created - removed
+
+        strefy = _zone_stats_from_bins(
+            compiled, pobor_bins[month], oddanie_bins[month], first_hour_of_bin
+        )
+        new_credit = billed = energy_cost = 0.0
+        rollover = carried
+        if net_metering_ratio is None:
+            billed = sum(zone["pobor_z_sieci"] for zone in strefy.values())
+            energy_cost = sum(zone["koszt_poboru"] for zone in strefy.values())
+        else:
+            for zone in sorted(strefy.values(), key=lambda z: z["price"], reverse=True):
+                zone_credit = zone["oddanie_do_sieci"] * net_metering_ratio
+                available = zone_credit + rollover
+                zone_billed = max(0.0, zone["pobor_z_sieci"] - available)
+                billed += zone_billed
+                energy_cost += zone_billed * zone["price"]
+                new_credit += zone_credit
+                rollover = max(0.0, available - zone["pobor_z_sieci"])
+            if new_credit > 0:
+                created += new_credit
+                lots.append((month, created))
+            # Zużycie zdejmuje kredyt od najstarszej partii (FIFO)
+            removed = created - rollover
+            while lots and lots[0][1] <= removed:
+                lots.popleft()
+
+        rows.append(
+            {
+                "miesiac": str(first_month + month),
+                "pobor_z_sieci_kwh": sum(
+                    zone["pobor_z_sieci"] for zone in strefy.values()
+                ),
+                "oddanie_do_sieci_kwh": sum(
+                    zone["oddanie_do_sieci"] for zone in strefy.values()
+                ),
+                "kredyt_z_poprzednich_kwh": carried,
+                "kredyt_wytworzony_kwh": new_credit,
+                "kredyt_wykorzystany_kwh": carried + new_credit - rollover,
+                "kredyt_wygasly_kwh": expired,
+                "kredyt_na_koniec_kwh": rollover,
+                "energia_do_oplacenia_kwh": billed,
+                "koszt_energii_zl": energy_cost,
+                "oplata_stala_zl": fixed_fee,
+                "koszt_zl": energy_cost + fixed_fee,
+            }
+        )
+    return pd.DataFrame(rows, columns=STATEMENT_COLUMNS)
+
+
+def run_monthly_settlement(
+    data: EnergyDataLike,
+    capacity: float,
+    tariff_manager: TariffManager,
+    tariff: str,
+    net_metering_ratio: Optional[float] = None,
+    storage_efficiency: float = 1.0,
+    credit_validity_months: int = CREDIT_VALIDITY_MONTHS,
+) -> pd.DataFrame:
+    """Symuluje magazyn jak run_full_analysis i rozlicza wynik miesiąc po miesiącu."""
+    data = EnergySeries.from_data(data)
+    if not len(data):
+        return pd.DataFrame(columns=STATEMENT_COLUMNS)
+    flows = simulate_storage(
+        data.pobor_przed, data.oddanie_przed, capacity, storage_efficiency
+    )
+    return settle_monthly(
+        data.timestamp,
+        flows.pobor_z_sieci,
+        flows.oddanie_do_sieci,
+        tariff_manager,
+        tariff,
+        net_metering_ratio,
+        credit_validity_months,
+    )
+
+
+def print_monthly_statement(
+    statement: pd.DataFrame, tariff: str, net_metering_ratio: Optional[float]
+):
+    """Wypisuje wyciąg z settle_monthly wraz z sumą dla całego okresu."""
+    if statement.empty:
+        print("Brak danych do rozliczenia miesięcznego.")
+        return
+    print(f"\n--- Rozliczenie miesięczne (taryfa {tariff.upper()}) ---")
+    if net_metering_ratio is not None:
+        print(
+            f"Net-metering ze współczynnikiem {net_metering_ratio}, kredyt ważny "
+            f"{CREDIT_VALIDITY_MONTHS} miesięcy (FIFO)"
+        )
+    print(
+        f"{'Miesiąc':<8} {'Pobór':>10} {'Oddanie':>10} {'Kredyt':>10} "
+        f"{'Nowy':>10} {'Wykorz.':>10} {'Wygasł':>10} {'Saldo':>10} "
+        f"{'Do opłac.':>10} {'Koszt':>10}"
+    )
+    print(f"{'':<8} {'[kWh]':>10} " + f"{'[kWh]':>10} " * 7 + f"{'[zł]':>10}")
+    for row in statement.itertuples():
+        print(
+            f"{row.miesiac:<8} {row.pobor_z_sieci_kwh:>10.3f} "
+            f"{row.oddanie_do_sieci_kwh:>10.3f} {row.kredyt_z_poprzednich_kwh:>10.3f} "
+            f"{row.kredyt_wytworzony_kwh:>10.3f} {row.kredyt_wykorzystany_kwh:>10.3f} "
+            f"{row.kredyt_wygasly_kwh:>10.3f} {row.kredyt_na_koniec_kwh:>10.3f} "
+            f"{row.energia_do_oplacenia_kwh:>10.3f} {row.koszt_zl:>10.2f}"
+        )
+    print("---------------------------------------------")
+    print(f"SUMARYCZNY KOSZT: {statement['koszt_zl'].sum():.2f} zł")
+    if net_metering_ratio is not None:
+        print(f"Kredyt wygasły: {statement['kredyt_wygasly_kwh'].sum():.3f} kWh")
+        print(
+            "Kredyt na koniec okresu: "
+            f"{statement['kredyt_na_koniec_kwh'].iloc[-1]:.3f} kWh"
+        )
+    print("---------------------------------------------")
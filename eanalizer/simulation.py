@@ -0,0 +1,243 @@
+# eanalizer/simulation.py
+"""
+Kernel symulacji fizycznego magazynu energii operujący na tablicach NumPy.
+
+Pętla godzinowa zapisuje wyniki do prealokowanych tablic wyjściowych zamiast
+tworzyć obiekt SimulationResult dla każdej godziny. Jeśli zainstalowana jest
+biblioteka numba (opcjonalna zależność, `pip install eanalizer[fast]`),
+kernel jest kompilowany JIT; w przeciwnym razie ta sama funkcja wykonywana
+jest w czystym Pythonie na listach, co wciąż jest wielokrotnie szybsze od
+pętli po obiektach EnergyData.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba jest opcjonalna - patrz docstring modułu
+    numba = None
+
+
+@dataclass
+class StorageFlows:
+    """Godzinowe przepływy energii wyznaczone przez symulację magazynu."""
+
+    pobor_z_sieci: np.ndarray
+    oddanie_do_sieci: np.ndarray
+    pobor_z_magazynu: np.ndarray
+    oddanie_do_magazynu: np.ndarray
+    stan_magazynu: np.ndarray
+
+
+def _storage_kernel(
+    pobor_przed,
+    oddanie_przed,
+    capacity,
+    efficiency,
+    pobor_z_sieci,
+    oddanie_do_sieci,
+    pobor_z_magazynu,
+    oddanie_do_magazynu,
+    stan_magazynu,
+):
+    """
+    Rekurencja stanu magazynu, godzina po godzinie. Sprawność uwzględniana
+    jest przy ładowaniu, rozładowanie odbywa się 1:1. Wyniki zapisywane są
+    do przekazanych (prealokowanych, wyzerowanych) tablic wyjściowych.
+    """
+    stan = 0.0
+    for i in range(len(pobor_przed)):
+        pp = pobor_przed[i]
+        op = oddanie_przed[i]
+        if op > pp:
+            nadwyzka = op - pp
+            if efficiency > 0:
+                potrzebna_nadwyzka_brutto = (capacity - stan) / efficiency
+            else:
+                potrzebna_nadwyzka_brutto = np.inf
+            ladowanie = min(nadwyzka, potrzebna_nadwyzka_brutto)
+            stan += ladowanie * efficiency
+            oddanie_do_magazynu[i] = ladowanie
+            oddanie_do_sieci[i] = nadwyzka - ladowanie
+        elif pp > op:
+            niedobor = pp - op
+            rozladowanie = min(niedobor, stan)
+            stan -= rozladowanie
+            pobor_z_magazynu[i] = rozladowanie
+            pobor_z_sieci[i] = niedobor - rozladowanie
+        stan_magazynu[i] = stan
+
+
+_jit_storage_kernel = (
+    numba.njit(cache=True)(_storage_kernel) if numba is not None else None
+)
+
+
+def simulate_storage(
+    pobor_przed: np.ndarray,
+    oddanie_przed: np.ndarray,
+    capacity: float,
+    storage_efficiency: float = 1.0,
+) -> StorageFlows:
+    """
+    Symuluje fizyczny magazyn o podanej pojemności i sprawności dla tablic
+    godzinowego poboru i oddania (przed bilansowaniem).
+    Pojemność 0 oznacza samo bilansowanie godzinowe, liczone wektorowo.
+    """
+    pobor_przed = np.ascontiguousarray(pobor_przed, dtype=np.float64)
+    oddanie_przed = np.ascontiguousarray(oddanie_przed, dtype=np.float64)
+    n = len(pobor_przed)
+
+    if capacity == 0 and storage_efficiency > 0:
+        bilans = pobor_przed - oddanie_przed
+        return StorageFlows(
+            pobor_z_sieci=np.maximum(bilans, 0.0),
+            oddanie_do_sieci=np.maximum(-bilans, 0.0),
+            pobor_z_magazynu=np.zeros(n),
+            oddanie_do_magazynu=np.zeros(n),
+            stan_magazynu=np.zeros(n),
+        )
+
+    if _jit_storage_kernel is not None:
+        outputs = [np.zeros(n) for _ in range(5)]
+        _jit_storage_kernel(
+            pobor_przed,
+            oddanie_przed,
+            float(capacity),
+            float(storage_efficiency),
+            *outputs,
+        )
+        return StorageFlows(*outputs)
+
+    # Czysty Python: indeksowanie list jest dużo tańsze niż tablic NumPy.
+    outputs = [[0.0] * n for _ in range(5)]
+    _storage_kernel(
+        pobor_przed.tolist(),
+        oddanie_przed.tolist(),
+        float(capacity),
+        float(storage_efficiency),
+        *outputs,
+    )
+    return StorageFlows(*(np.array(output, dtype=np.float64) for output in outputs))
+
+
+@dataclass
+class StorageSweep:
+    """
+    Wyniki symulacji wielu pojemności naraz, zsumowane w koszykach godzin.
+
+    pobor_z_sieci[b, k] i oddanie_do_sieci[b, k] to energia pobrana z sieci
+    i oddana do sieci w godzinach koszyka b przy pojemności capacities[k].
+    """
+
+    capacities: np.ndarray
+    pobor_z_sieci: np.ndarray
+    oddanie_do_sieci: np.ndarray
+
+
+def _sweep_kernel(
+    pobor_przed,
+    oddanie_przed,
+    bins,
+    capacities,
+    efficiency,
+    pobor_z_sieci,
+    oddanie_do_sieci,
+):
+    """Ta sama rekurencja co _storage_kernel, dla wszystkich pojemności naraz."""
+    num_capacities = len(capacities)
+    stan = np.zeros(num_capacities)
+    for i in range(len(pobor_przed)):
+        pp = pobor_przed[i]
+        op = oddanie_przed[i]
+        b = bins[i]
+        if op > pp:
+            nadwyzka = op - pp
+            for k in range(num_capacities):
+                if efficiency > 0:
+                    ladowanie = min(nadwyzka, (capacities[k] - stan[k]) / efficiency)
+                else:
+                    ladowanie = nadwyzka
+                stan[k] += ladowanie * efficiency
+                oddanie_do_sieci[b, k] += nadwyzka - ladowanie
+        elif pp > op:
+            niedobor = pp - op
+            for k in range(num_capacities):
+                rozladowanie = min(niedobor, stan[k])
+                stan[k] -= rozladowanie
+                pobor_z_sieci[b, k] += niedobor - rozladowanie
+
+
+_jit_sweep_kernel = numba.njit(cache=True)(_sweep_kernel) if numba is not None else None
+
+
+def _sweep_python(
+    pobor_przed,
+    oddanie_przed,
+    bins,
+    capacities,
+    efficiency,
+    pobor_z_sieci,
+    oddanie_do_sieci,
+):
+    """
+    Wariant bez numba: pętla po godzinach, a w każdej godzinie jedna operacja
+    wektorowa aktualizująca stan magazynu dla wszystkich pojemności.
+    """
+    stan = np.zeros(len(capacities))
+    for pp, op, b in zip(pobor_przed.tolist(), oddanie_przed.tolist(), bins.tolist()):
+        if op > pp:
+            nadwyzka = op - pp
+            if efficiency > 0:
+                ladowanie = np.minimum(nadwyzka, (capacities - stan) / efficiency)
+            else:
+                ladowanie = np.full(len(capacities), nadwyzka)
+            stan += ladowanie * efficiency
+            oddanie_do_sieci[b] += nadwyzka - ladowanie
+        elif pp > op:
+            niedobor = pp - op
+            rozladowanie = np.minimum(niedobor, stan)
+            stan -= rozladowanie
+            pobor_z_sieci[b] += niedobor - rozladowanie
+
+
+def simulate_storage_sweep(
+    pobor_przed: np.ndarray,
+    oddanie_przed: np.ndarray,
+    capacities,
+    storage_efficiency: float = 1.0,
+    bins: Optional[np.ndarray] = None,
+    num_bins: int = 1,
+) -> StorageSweep:
+    """
+    Symuluje magazyn dla całego wektora pojemności w jednym przebiegu po
+    danych - każda godzina aktualizuje stan wszystkich pojemności naraz.
+
+    Zamiast pełnych godzinowych przebiegów (godziny x pojemności) zwracane są
+    sumy poboru/oddania w koszykach: bins[i] to koszyk godziny i (np. indeks
+    (typ dnia, godzina) z TariffManager.day_hour_bins), num_bins - ich liczba.
+    Bez bins wszystkie godziny trafiają do jednego koszyka.
+    """
+    pobor_przed = np.ascontiguousarray(pobor_przed, dtype=np.float64)
+    oddanie_przed = np.ascontiguousarray(oddanie_przed, dtype=np.float64)
+    capacities = np.ascontiguousarray(capacities, dtype=np.float64)
+    if bins is None:
+        bins = np.zeros(len(pobor_przed), dtype=np.intp)
+    bins = np.ascontiguousarray(bins, dtype=np.intp)
+
+    pobor_z_sieci = np.zeros((num_bins, len(capacities)))
+    oddanie_do_sieci = np.zeros((num_bins, len(capacities)))
+    kernel = _jit_sweep_kernel if _jit_sweep_kernel is not None else _sweep_python
+    kernel(
+        pobor_przed,
+        oddanie_przed,
+        bins,
+        capacities,
+        float(storage_efficiency),
+        pobor_z_sieci,
+        oddanie_do_sieci,
+    )
+    return StorageSweep(capacities, pobor_z_sieci, oddanie_do_sieci)
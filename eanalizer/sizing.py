@@ -0,0 +1,307 @@
+# eanalizer/sizing.py
+"""
+Dobór pojemności magazynu przez przeszukiwanie symulacji (--optymalizuj-magazyn).
+
+W przeciwieństwie do heurystyki calculate_optimal_capacity każdy punkt jest
+pełną symulacją magazynu rozliczoną tak samo jak w run_full_analysis. Cel
+to jedno z dwóch:
+
+- minimalny koszt łączny: koszt energii i opłat stałych plus roczny koszt
+  magazynu (zł za kWh pojemności na rok) za okres objęty danymi - siatka
+  zgrubna liczona jednym przebiegiem simulate_storage_sweep, a następnie
+  metoda złotego podziału wokół najlepszego punktu siatki;
+- najmniejsza pojemność osiągająca docelową samowystarczalność - bisekcja
+  (samowystarczalność nie maleje wraz z pojemnością).
+
+Wyniki symulacji są zapamiętywane per pojemność, więc kolejne iteracje
+liczą tylko nowe punkty; całe przeszukiwanie to kilkanaście-kilkadziesiąt
+symulacji.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .core import (
+    EnergyDataLike,
+    _first_hour_of_bins,
+    _num_months,
+    _settle_summary,
+    _zone_stats_from_bins,
+)
+from .models import EnergySeries
+from .simulation import simulate_storage, simulate_storage_sweep
+from .tariffs import NUM_DAY_HOUR_BINS, TariffManager
+
+# Dokładność wyniku (szerokość końcowego przedziału) w kWh.
+DEFAULT_TOLERANCE_KWH = 0.05
+# Liczba punktów siatki zgrubnej w trybie minimalizacji kosztu.
+GRID_POINTS = 9
+_INV_GOLDEN = (math.sqrt(5) - 1) / 2
+
+GOAL_COST = "koszt"
+GOAL_SELF_SUFFICIENCY = "samowystarczalnosc"
+
+
+@dataclass
+class SizingResult:
+    """Wynik doboru pojemności wraz ze wszystkimi policzonymi punktami."""
+
+    cel: str
+    pojemnosc_kwh: float
+    osiagnieto_cel: bool
+    najlepszy: Dict[str, float]
+    punkty: pd.DataFrame
+    symulacje: int
+
+
+class CapacityEvaluator:
+    """
+    Koszt i samowystarczalność dla zadanych pojemności. Każda pojemność
+    symulowana jest tylko raz; kilka nowych pojemności naraz liczonych jest
+    jednym przebiegiem simulate_storage_sweep.
+
+    Samowystarczalność to procent poboru przed bilansowaniem, którego nie
+    trzeba pobrać z sieci dzięki bilansowaniu godzinowemu i magazynowi.
+    """
+
+    def __init__(
+        self,
+        data: EnergySeries,
+        tariff_manager: TariffManager,
+        tariff: str,
+        net_metering_ratio: Optional[float] = None,
+        storage_efficiency: float = 1.0,
+        storage_price: float = 0.0,
+    ):
+        self.data = data
+        self.tariff_manager = tariff_manager
+        self.tariff = tariff
+        self.net_metering_ratio = net_metering_ratio
+        self.storage_efficiency = storage_efficiency
+        self.storage_price = storage_price
+        self.bins = tariff_manager.day_hour_bins(data.timestamp)
+        self.compiled = tariff_manager.compile_tariff(tariff)
+        self.first_hour_of_bin = _first_hour_of_bins(self.bins)
+        self.num_months = _num_months(data)
+        self.oryginalny_pobor = float(data.pobor_przed.sum())
+        self.simulations = 0
+        self._points: Dict[float, Dict[str, float]] = {}
+
+    def _point(
+        self, capacity: float, pobor_bins: np.ndarray, oddanie_bins: np.ndarray
+    ) -> Dict[str, float]:
+        summary = _settle_summary(
+            _zone_stats_from_bins(
+                self.compiled, pobor_bins, oddanie_bins, self.first_hour_of_bin
+            ),
+            self.tariff_manager,
+            self.tariff,
+            self.num_months,
+            self.oryginalny_pobor,
+            self.net_metering_ratio,
+        )
+        pobor_z_sieci = float(pobor_bins.sum())
+        koszt_magazynu = self.storage_price * capacity * self.num_months / 12
+        return {
+            "pojemnosc_kwh": capacity,
+            "pobor_z_sieci_kwh": pobor_z_sieci,
+            "samowystarczalnosc_proc": (
+                max(0.0, 100.0 * (1.0 - pobor_z_sieci / self.oryginalny_pobor))
+                if self.oryginalny_pobor > 0
+                else 100.0
+            ),
+            "koszt_energii_zl": summary["calkowity_koszt"],
+            "koszt_magazynu_zl": koszt_magazynu,
+            "koszt_laczny_zl": summary["calkowity_koszt"] + koszt_magazynu,
+        }
+
+    def evaluate(self, capacities) -> List[Dict[str, float]]:
+        """Punkty (słowniki z kosztem i samowystarczalnością) dla pojemności."""
+        capacities = [round(float(c), 9) for c in capacities]
+        missing = sorted({c for c in capacities if c not in self._points})
+        if len(missing) == 1:
+            # Pojedynczy punkt: szybszy kernel jednej pojemności + sumy w koszykach
+            flows = simulate_storage(
+                self.data.pobor_przed,
+                self.data.oddanie_przed,
+                missing[0],
+                self.storage_efficiency,
+            )
+            self._points[missing[0]] = self._point(
+                missing[0],
+                np.bincount(
+                    self.bins, weights=flows.pobor_z_sieci, minlength=NUM_DAY_HOUR_BINS
+                ),
+                np.bincount(
+                    self.bins,
+                    weights=flows.oddanie_do_sieci,
+                    minlength=NUM_DAY_HOUR_BINS,
+                ),
+            )
+        elif missing:
+            sweep = simulate_storage_sweep(
+                self.data.pobor_przed,
+                self.data.oddanie_przed,
+                missing,
+                self.storage_efficiency,
+                bins=self.bins,
+                num_bins=NUM_DAY_HOUR_BINS,
+            )
+            for k, capacity in enumerate(missing):
+                self._points[capacity] = self._point(
+                    capacity, sweep.pobor_z_sieci[:, k], sweep.oddanie_do_sieci[:, k]
+                )
+        self.simulations += len(missing)
+        return [self._points[c] for c in capacities]
+
+    def cost(self, capacity: float) -> float:
+        return self.evaluate([capacity])[0]["koszt_laczny_zl"]
+
+    def points(self) -> pd.DataFrame:
+        """Wszystkie policzone punkty, posortowane po pojemności."""
+        return pd.DataFrame(
+            [self._points[c] for c in sorted(self._points)]
+        ).reset_index(drop=True)
+
+
+def default_max_capacity(data: EnergySeries) -> float:
+    """
+    Górna granica przeszukiwania: największy dzienny pobór przed
+    bilansowaniem - większego magazynu nie da się rozładować w ciągu doby.
+    """
+    _, day_index = np.unique(
+        data.timestamp.astype("datetime64[D]"), return_inverse=True
+    )
+    return float(np.bincount(day_index, weights=data.pobor_przed).max())
+
+
+def _golden_section(evaluator: CapacityEvaluator, lo: float, hi: float, tol: float):
+    """Minimum kosztu w [lo, hi]; każda iteracja liczy jeden nowy punkt."""
+    x1 = hi - _INV_GOLDEN * (hi - lo)
+    x2 = lo + _INV_GOLDEN * (hi - lo)
+    f1, f2 = evaluator.cost(x1), evaluator.cost(x2)
+    while hi - lo > tol:
+        if f1 <= f2:
+            hi, x2, f2 = x2, x1, f1
+            x1 = hi - _INV_GOLDEN * (hi - lo)
+            f1 = evaluator.cost(x1)
+        else:
+            lo, x1, f1 = x1, x2, f2
+            x2 = lo + _INV_GOLDEN * (hi - lo)
+            f2 = evaluator.cost(x2)
+
+
+def optimize_storage_capacity(
+    data: EnergyDataLike,
+    tariff_manager: TariffManager,
+    tariff: str,
+    net_metering_ratio: Optional[float] = None,
+    storage_efficiency: float = 1.0,
+    storage_price: float = 0.0,
+    target_self_sufficiency: Optional[float] = None,
+    max_capacity: Optional[float] = None,
+    tolerance: float = DEFAULT_TOLERANCE_KWH,
+) -> Optional[SizingResult]:
+    """
+    Dobiera pojemność magazynu w przedziale [0, max_capacity] (domyślnie
+    default_max_capacity). Bez target_self_sufficiency minimalizuje koszt
+    łączny (storage_price w zł za kWh na rok), a z nim szuka najmniejszej
+    pojemności, dla której samowystarczalność osiąga podany procent.
+    """
+    data = EnergySeries.from_data(data)
+    if not len(data):
+        return None
+    if max_capacity is None:
+        max_capacity = default_max_capacity(data)
+    if max_capacity < 0 or tolerance <= 0:
+        raise ValueError("Niepoprawny zakres przeszukiwania pojemności.")
+    evaluator = CapacityEvaluator(
+        data,
+        tariff_manager,
+        tariff,
+        net_metering_ratio,
+        storage_efficiency,
+        storage_price,
+    )
+
+    if target_self_sufficiency is not None:
+        lo_point, hi_point = evaluator.evaluate([0.0, max_capacity])
+        if lo_point["samowystarczalnosc_proc"] >= target_self_sufficiency:
+            best, reached = lo_point, True
+        elif hi_point["samowystarczalnosc_proc"] < target_self_sufficiency:
+            best, reached = hi_point, False
+        else:
+            lo, hi, best, reached = 0.0, max_capacity, hi_point, True
+            while hi - lo > tolerance:
+                mid = (lo + hi) / 2
+                point = evaluator.evaluate([mid])[0]
+                if point["samowystarczalnosc_proc"] >= target_self_sufficiency:
+                    hi, best = mid, point
+                else:
+                    lo = mid
+        goal = GOAL_SELF_SUFFICIENCY
+    else:
+        grid = np.linspace(0.0, max_capacity, GRID_POINTS)
+        costs = [p["koszt_laczny_zl"] for p in evaluator.evaluate(grid)]
+        k = int(np.argmin(costs))
+        lo, hi = grid[max(k - 1, 0)], grid[min(k + 1, len(grid) - 1)]
+        if hi > lo:
+            _golden_section(evaluator, lo, hi, tolerance)
+        points = evaluator.points()
+        # Najniższy koszt; przy remisie (np. bez ceny magazynu) mniejsza pojemność
+        best = points.loc[points["koszt_laczny_zl"].round(6).idxmin()].to_dict()
+        reached = True
+        goal = GOAL_COST
+
+    return SizingResult(
+        cel=goal,
+        pojemnosc_kwh=float(best["pojemnosc_kwh"]),
+        osiagnieto_cel=reached,
+        najlepszy={key: float(value) for key, value in best.items()},
+        punkty=evaluator.points(),
+        symulacje=evaluator.simulations,
+    )
+
+
+def print_sizing_result(
+    result: Optional[SizingResult],
+    tariff: str,
+    storage_efficiency: float,
+    net_metering_ratio: Optional[float],
+    storage_price: float = 0.0,
+    target_self_sufficiency: Optional[float] = None,
+):
+    """Wypisuje wynik optimize_storage_capacity."""
+    if result is None:
+        print("Brak danych do doboru pojemności magazynu.")
+        return
+    best: Dict[str, Any] = result.najlepszy
+    print(
+        f"\n--- Dobór pojemności magazynu (taryfa {tariff.upper()}, "
+        f"sprawność {int(storage_efficiency * 100)}%) ---"
+    )
+    if net_metering_ratio is not None:
+        print(f"Uwzględniono net-metering ze współczynnikiem {net_metering_ratio}")
+    if result.cel == GOAL_SELF_SUFFICIENCY:
+        print(f"Cel: samowystarczalność co najmniej {target_self_sufficiency:.1f}%")
+        if not result.osiagnieto_cel:
+            print(
+                "Cel nieosiągalny w przeszukiwanym zakresie - podano największą "
+                "sprawdzoną pojemność."
+            )
+    else:
+        print(
+            f"Cel: minimalny koszt łączny (magazyn {storage_price:.2f} zł/kWh rocznie)"
+        )
+    print(f"Pojemność: {result.pojemnosc_kwh:.2f} kWh")
+    print(f"Samowystarczalność: {best['samowystarczalnosc_proc']:.1f}%")
+    print(f"Pobór z sieci: {best['pobor_z_sieci_kwh']:.3f} kWh")
+    print(f"Koszt energii i opłat stałych: {best['koszt_energii_zl']:.2f} zł")
+    print(f"Koszt magazynu za okres danych: {best['koszt_magazynu_zl']:.2f} zł")
+    print(f"Koszt łączny: {best['koszt_laczny_zl']:.2f} zł")
+    print(f"Liczba symulacji: {result.symulacje}")
+    print("---------------------------------------------")
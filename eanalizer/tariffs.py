@@ -1,42 +1,163 @@
 import pandas as pd
+import numpy as np
 import holidays
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+
+# Indeksy typów dnia w skompilowanej tablicy stref (wiersze tablicy).
+DAY_TYPE_WEEKDAY = 0
+DAY_TYPE_WEEKEND = 1
+HOURS_PER_DAY = 24
+# Liczba koszyków (typ dnia, godzina) - płaski indeks day_type * 24 + hour.
+NUM_DAY_HOUR_BINS = 2 * HOURS_PER_DAY
+
+# Identyfikator "brak strefy" - godzina nieobjęta żadną regułą taryfy.
+NO_ZONE = -1
+
+
+@dataclass
+class CompiledTariff:
+    """
+    Taryfa skompilowana do gęstej tablicy (typ dnia x godzina).
+
+    zone_table[day_type, hour] zawiera identyfikator strefy (indeks w
+    zone_names) lub NO_ZONE, a energy_table/dist_table - odpowiadające mu ceny.
+    """
+
+    name: str
+    zone_names: List[str]
+    zone_table: np.ndarray
+    energy_table: np.ndarray
+    dist_table: np.ndarray
 
 
 class TariffManager:
     def __init__(self, config_path: str, years: range):
         self.tariffs_df = pd.read_csv(config_path)
         self.holidays = holidays.Poland(years=years)
+        self._compiled: Dict[str, CompiledTariff] = {}
+
+    def compile_tariff(self, tariff: str) -> CompiledTariff:
+        """
+        Kompiluje reguły taryfy do tablicy (typ dnia x godzina) ze strefami i
+        cenami. Wynik jest zapamiętywany, więc każda taryfa kompilowana jest
+        tylko raz na cały czas życia managera.
+        """
+        key = tariff.lower()
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+
+        rules = self.tariffs_df[self.tariffs_df["tariff"].str.lower() == key]
+        zone_names: List[str] = []
+        zone_table = np.full((2, HOURS_PER_DAY), NO_ZONE, dtype=np.int16)
+        energy_table = np.zeros((2, HOURS_PER_DAY))
+        dist_table = np.zeros((2, HOURS_PER_DAY))
+
+        uses_all = not rules.empty and "all" in rules["day_type"].unique()
+        day_types = {
+            DAY_TYPE_WEEKDAY: "all" if uses_all else "weekday",
+            DAY_TYPE_WEEKEND: "all" if uses_all else "weekend",
+        }
+        for row_index, day_type in day_types.items():
+            applicable_rules = rules[rules["day_type"] == day_type]
+            for hour in range(HOURS_PER_DAY):
+                for rule in applicable_rules.itertuples():
+                    start = rule.start_hour
+                    end = rule.end_hour
+                    # Standard case: e.g., 8 <= 10 < 16
+                    # Overnight case: e.g., 22 <= 23 < 24 or 0 <= 0 < 6
+                    if (start < end and start <= hour < end) or (
+                        start > end and (hour >= start or hour < end)
+                    ):
+                        if rule.zone_name not in zone_names:
+                            zone_names.append(rule.zone_name)
+                        zone_table[row_index, hour] = zone_names.index(rule.zone_name)
+                        energy_table[row_index, hour] = rule.energy_price
+                        dist_table[row_index, hour] = rule.dist_price
+                        break
+
+        compiled = CompiledTariff(
+            name=tariff,
+            zone_names=zone_names,
+            zone_table=zone_table,
+            energy_table=energy_table,
+            dist_table=dist_table,
+        )
+        self._compiled[key] = compiled
+        return compiled
+
+    def _is_free_day(self, day) -> bool:
+        return day.weekday() >= 5 or day in self.holidays
+
+    def day_type_indices(self, timestamps) -> np.ndarray:
+        """
+        Zwraca tablicę typów dnia (DAY_TYPE_WEEKDAY/DAY_TYPE_WEEKEND) dla
+        tablicy znaczników czasu. Święta sprawdzane są raz na unikalny dzień,
+        a nie raz na godzinę.
+        """
+        days = np.asarray(timestamps, dtype="datetime64[ns]").astype("datetime64[D]")
+        if days.size == 0:
+            return np.zeros(0, dtype=np.int8)
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        free = np.fromiter(
+            (self._is_free_day(day) for day in unique_days.astype(object)),
+            dtype=bool,
+            count=len(unique_days),
+        )
+        return np.where(free[inverse], DAY_TYPE_WEEKEND, DAY_TYPE_WEEKDAY).astype(
+            np.int8
+        )
+
+    def day_hour_bins(self, timestamps) -> np.ndarray:
+        """
+        Zwraca płaski indeks koszyka (typ dnia * 24 + godzina) dla każdego
+        znacznika czasu - indeks do spłaszczonych tablic CompiledTariff.
+        Koszyki nie zależą od taryfy, więc można je policzyć raz dla danych.
+        """
+        ts = np.asarray(timestamps, dtype="datetime64[ns]")
+        hours = (ts.astype("datetime64[h]") - ts.astype("datetime64[D]")).astype(
+            np.intp
+        )
+        return self.day_type_indices(ts).astype(np.intp) * HOURS_PER_DAY + hours
+
+    def get_zones_and_prices(
+        self, timestamps, tariff: str
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Wektorowa wersja get_zone_and_price dla całej tablicy znaczników czasu.
+
+        Zwraca trzy tablice: identyfikatory stref (indeksy w
+        compile_tariff(tariff).zone_names, NO_ZONE dla godzin bez strefy),
+        ceny za energię i ceny za dystrybucję.
+        """
+        compiled = self.compile_tariff(tariff)
+        bins = self.day_hour_bins(timestamps)
+        return (
+            compiled.zone_table.ravel()[bins],
+            compiled.energy_table.ravel()[bins],
+            compiled.dist_table.ravel()[bins],
+        )
 
     def get_zone_and_price(
         self, timestamp: datetime, tariff: str
     ) -> Optional[Tuple[str, float, float]]:
         """Zwraca nazwę strefy, cenę za energię i cenę za dystrybucję dla podanego znacznika czasu i taryfy."""
+        compiled = self.compile_tariff(tariff)
         day_type = (
-            "weekend"
-            if timestamp.weekday() >= 5 or timestamp in self.holidays
-            else "weekday"
+            DAY_TYPE_WEEKEND if self._is_free_day(timestamp) else DAY_TYPE_WEEKDAY
         )
         hour = timestamp.hour
 
-        rules = self.tariffs_df[self.tariffs_df["tariff"].str.lower() == tariff.lower()]
-        if not rules.empty and "all" in rules["day_type"].unique():
-            day_type = "all"
-
-        applicable_rules = rules[rules["day_type"] == day_type]
-
-        for _, rule in applicable_rules.iterrows():
-            start = rule["start_hour"]
-            end = rule["end_hour"]
-            # Standard case: e.g., 8 <= 10 < 16
-            if start < end and start <= hour < end:
-                return rule["zone_name"], rule["energy_price"], rule["dist_price"]
-            # Overnight case: e.g., 22 <= 23 < 24 or 0 <= 0 < 6
-            elif start > end and (hour >= start or hour < end):
-                return rule["zone_name"], rule["energy_price"], rule["dist_price"]
-
-        return None, 0.0, 0.0
+        zone_id = compiled.zone_table[day_type, hour]
+        if zone_id == NO_ZONE:
+            return None, 0.0, 0.0
+        return (
+            compiled.zone_names[zone_id],
+            float(compiled.energy_table[day_type, hour]),
+            float(compiled.dist_table[day_type, hour]),
+        )
 
     def get_fixed_fee(self, tariff: str) -> float:
         """Zwraca stałą opłatę miesięczną dla danej taryfy."""
@@ -45,6 +166,14 @@ class TariffManager:
             return rules.iloc[0]["dist_fee"]
         return 0.0
 
+    def resolve_tariff_name(self, tariff: str) -> Optional[str]:
+        """
+        Zwraca nazwę taryfy w pisowni z pliku taryf, bez względu na wielkość
+        liter (jak --taryfa w CLI), albo None dla nieznanej taryfy.
+        """
+        names = {name.upper(): name for name in self.get_all_tariffs()}
+        return names.get(str(tariff).upper())
+
     def get_all_tariffs(self) -> List[str]:
         """Zwraca listę wszystkich dostępnych taryf."""
         return self.tariffs_df["tariff"].unique().tolist()
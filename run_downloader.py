@@ -1,5 +1,8 @@
 # run_downloader.py
+import multiprocessing
+
 from eanalizer.downloader_cli import main
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
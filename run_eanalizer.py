@@ -1,5 +1,8 @@
 # run_eanalizer.py
+import multiprocessing
+
 from eanalizer.cli import main
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
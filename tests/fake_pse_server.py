@@ -0,0 +1,125 @@
+"""
+Lokalny serwer HTTP udający API RCE PSE - pozwala testować pobieranie cen
+prawdziwym klientem HTTP (pula połączeń, limity czasu, ponowienia,
+stronicowanie) bez dostępu do sieci.
+"""
+
+import json
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+_FILTER_RE = re.compile(r"business_date\+(eq|ge|le)\+'(\d{4}-\d{2}-\d{2})'")
+_SKIP_RE = re.compile(r"&\$skip=(\d+)")
+
+
+class FakePseServer:
+    """
+    Serwer odpowiada rekordami z `days` (data -> lista rekordów "value")
+    dla dni z zakresu filtra business_date (eq albo ge/le), uzupełniając
+    pole business_date jak prawdziwe API. Odpowiedzi dłuższe niż page_size
+    rekordów są dzielone na strony połączone polem nextLink.
+    `failures[data]` to liczba początkowych zapytań o zakres zaczynający się
+    od tej daty, na które serwer odpowie statusem `failure_status`.
+    """
+
+    def __init__(
+        self, days=None, failures=None, failure_status=503, delay=0.0, page_size=None
+    ):
+        self.days = dict(days or {})
+        self.failures = dict(failures or {})
+        self.failure_status = failure_status
+        self.delay = delay
+        self.page_size = page_size
+        # (początek, koniec) zakresu każdego zapytania, także o kolejne strony.
+        self.requested_ranges = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/api/rce-pln"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def _records(self, start, end):
+        records = []
+        day = date.fromisoformat(start)
+        while day <= date.fromisoformat(end):
+            for record in self.days.get(day.isoformat(), []):
+                records.append({"business_date": day.isoformat(), **record})
+            day += timedelta(days=1)
+        return records
+
+    def _respond(self, path, start, end):
+        with self._lock:
+            self.requested_ranges.append((start, end))
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            remaining_failures = self.failures.get(start, 0)
+            if remaining_failures:
+                self.failures[start] = remaining_failures - 1
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if remaining_failures:
+                return self.failure_status, {"error": "niedostępne"}
+            records = self._records(start, end)
+            if self.page_size is None:
+                return 200, {"value": records}
+            match = _SKIP_RE.search(path)
+            skip = int(match.group(1)) if match else 0
+            payload = {"value": records[skip : skip + self.page_size]}
+            if skip + self.page_size < len(records):
+                host, port = self._httpd.server_address
+                next_path = _SKIP_RE.sub("", path) + f"&$skip={skip + self.page_size}"
+                payload["nextLink"] = f"http://{host}:{port}{next_path}"
+            return 200, payload
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                filters = dict(_FILTER_RE.findall(unquote(self.path)))
+                start = filters.get("eq", filters.get("ge"))
+                end = filters.get("eq", filters.get("le"))
+                if start is None or end is None:
+                    status, payload = 400, {"error": "brak filtra business_date"}
+                else:
+                    status, payload = server._respond(self.path, start, end)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,3 +1,5 @@
+import json
+import pstats
 import shutil
 import sys
 import tempfile
@@ -6,13 +8,17 @@ from io import StringIO
 from pathlib import Path
 from unittest.mock import patch
 
+import numpy as np
+
 from eanalizer.cli import main
 from eanalizer.config import AppConfig
+from eanalizer.core import run_full_analysis as run_full_analysis_impl
+from eanalizer.data_loader import load_from_enea_files
 
 
 def _run_cli(argv, app_config, rce_prices=None):
     """Uruchamia main() CLI z podanymi argumentami, mockując load_config i
-    get_hourly_rce_prices (by nie wykonywać realnych zapytań sieciowych do PSE),
+    get_hourly_rce_price_arrays (by nie wykonywać realnych zapytań sieciowych do PSE),
     oraz wymuszając identycznościową funkcję i18n `_`, by asercje na tekstach
     komunikatów nie zależały od lokalnych ustawień systemowych (locale)."""
     original_argv = sys.argv
@@ -20,8 +26,13 @@ def _run_cli(argv, app_config, rce_prices=None):
     original_stdout = sys.stdout
     sys.stdout = captured = StringIO()
     try:
+        rce_prices = rce_prices or {}
+        price_arrays = (
+            np.array(list(rce_prices), dtype="datetime64[h]"),
+            np.array(list(rce_prices.values()), dtype=np.float64),
+        )
         with patch("eanalizer.cli.load_config", return_value=app_config), patch(
-            "eanalizer.cli.get_hourly_rce_prices", return_value=rce_prices or {}
+            "eanalizer.cli.get_hourly_rce_price_arrays", return_value=price_arrays
         ), patch("eanalizer.cli._", new=lambda s: s):
             main()
     finally:
@@ -185,6 +196,291 @@ class TestCli(unittest.TestCase):
             output,
         )
 
+    def test_capacity_range_prints_table_and_exports_csv(self):
+        export_path = self.tmp_dir / "zakres.csv"
+        output = _run_cli(
+            [
+                "--katalog",
+                str(self.data_dir),
+                "--taryfa",
+                "G12",
+                "--magazyn-zakres",
+                "0:2:0.5",
+                "--eksport-zakresu",
+                str(export_path),
+            ],
+            self.app_config,
+        )
+        self.assertIn("w zależności od pojemności magazynu", output)
+        for capacity in ["0.00", "0.50", "1.00", "1.50", "2.00"]:
+            self.assertIn(capacity, output)
+        lines = export_path.read_text(encoding="utf-8").strip().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith("pojemnosc_kwh;"))
+
+    def test_capacity_range_conflicts_with_single_capacity(self):
+        with self.assertRaises(SystemExit):
+            _run_cli(
+                [
+                    "--katalog",
+                    str(self.data_dir),
+                    "--magazyn-zakres",
+                    "0:10:1",
+                    "--magazyn-fizyczny",
+                    "5",
+                ],
+                self.app_config,
+            )
+
+    def test_capacity_range_rejects_invalid_spec(self):
+        original_stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            with self.assertRaises(SystemExit):
+                _run_cli(
+                    ["--katalog", str(self.data_dir), "--magazyn-zakres", "5:1:1"],
+                    self.app_config,
+                )
+        finally:
+            sys.stderr = original_stderr
+
+    def test_cost_grid_exports_long_table(self):
+        grid_path = self.tmp_dir / "siatka.csv"
+        output = _run_cli(
+            [
+                "--katalog",
+                str(self.data_dir),
+                "--siatka-kosztow",
+                str(grid_path),
+                "--magazyn-zakres",
+                "0:2:1",
+                "--sprawnosci",
+                "0.8",
+                "0.9",
+                "--wspolczynniki-netmetering",
+                "0",
+                "0.8",
+                "--procesy",
+                "1",
+            ],
+            self.app_config,
+        )
+        self.assertIn("siatkę kosztów (24 wierszy)", output)
+        lines = grid_path.read_text(encoding="utf-8").strip().splitlines()
+        self.assertTrue(lines[0].startswith("taryfa;netmetering;sprawnosc;"))
+        self.assertEqual(len(lines), 1 + 3 * 2 * 2 * 2)
+
+    def test_cost_grid_axis_flags_require_grid_mode(self):
+        original_stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            with self.assertRaises(SystemExit):
+                _run_cli(
+                    ["--katalog", str(self.data_dir), "--sprawnosci", "0.9"],
+                    self.app_config,
+                )
+            with self.assertRaises(SystemExit):
+                _run_cli(
+                    ["--katalog", str(self.data_dir), "--siatka-kosztow", "x.csv"],
+                    self.app_config,
+                )
+        finally:
+            sys.stderr = original_stderr
+
+    def test_price_changes_print_and_export_table(self):
+        export_path = self.tmp_dir / "wrazliwosc.csv"
+        output = _run_cli(
+            [
+                "--katalog",
+                str(self.data_dir),
+                "--taryfa",
+                "G12",
+                "--zmiany-cen",
+                "dzienna=+15%",
+                "oplata=0",
+                "--eksport-wrazliwosci",
+                str(export_path),
+            ],
+            self.app_config,
+        )
+        self.assertIn("Wrażliwość kosztu na ceny (taryfa G12)", output)
+        self.assertIn("dzienna=+15%", output)
+        lines = export_path.read_text(encoding="utf-8").strip().splitlines()
+        self.assertTrue(lines[0].startswith("scenariusz;calkowity_koszt_zl;"))
+        self.assertEqual(len(lines), 4)
+
+    def test_price_changes_report_unknown_zone(self):
+        output = _run_cli(
+            ["--katalog", str(self.data_dir), "--zmiany-cen", "szczytowa=+15%"],
+            self.app_config,
+        )
+        self.assertIn("Błąd scenariuszy cen:", output)
+
+    def test_monthly_settlement_prints_and_exports_statement(self):
+        export_path = self.tmp_dir / "rozliczenie.csv"
+        output = _run_cli(
+            [
+                "--katalog",
+                str(self.data_dir),
+                "--z-netmetering",
+                "--rozliczenie-miesieczne",
+                "--eksport-rozliczenia",
+                str(export_path),
+            ],
+            self.app_config,
+        )
+        self.assertIn("Rozliczenie miesięczne (taryfa G11)", output)
+        self.assertIn("kredyt ważny 12 miesięcy", output)
+        lines = export_path.read_text(encoding="utf-8").strip().splitlines()
+        self.assertTrue(lines[0].startswith("miesiac;pobor_z_sieci_kwh;"))
+        self.assertEqual(lines[1].split(";")[0], "2024-05")
+
+    def test_optimize_storage_prints_capacity_and_exports_points(self):
+        export_path = self.tmp_dir / "dobor.csv"
+        output = _run_cli(
+            [
+                "--katalog",
+                str(self.data_dir),
+                "--taryfa",
+                "G12",
+                "--optymalizuj-magazyn",
+                "--cena-magazynu",
+                "50",
+                "--eksport-zakresu",
+                str(export_path),
+            ],
+            self.app_config,
+        )
+        self.assertIn("Dobór pojemności magazynu", output)
+        self.assertIn("Koszt łączny:", output)
+        lines = export_path.read_text(encoding="utf-8").strip().splitlines()
+        self.assertTrue(lines[0].startswith("pojemnosc_kwh;"))
+        self.assertGreater(len(lines), 2)
+
+    def test_optimize_storage_flags_require_optimize_mode(self):
+        original_stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            with self.assertRaises(SystemExit):
+                _run_cli(
+                    ["--katalog", str(self.data_dir), "--cena-magazynu", "50"],
+                    self.app_config,
+                )
+            with self.assertRaises(SystemExit):
+                _run_cli(
+                    [
+                        "--katalog",
+                        str(self.data_dir),
+                        "--optymalizuj-magazyn",
+                        "--magazyn-fizyczny",
+                        "5",
+                    ],
+                    self.app_config,
+                )
+        finally:
+            sys.stderr = original_stderr
+
+    def test_scenarios_run_on_single_load_and_export_json(self):
+        scenarios_path = self.tmp_dir / "scenariusze.json"
+        scenarios_path.write_text(
+            '[{"nazwa": "dom", "taryfa": ["G11", "G12"], "magazyn": [0, 5]}]',
+            encoding="utf-8",
+        )
+        export_path = self.tmp_dir / "wyniki.json"
+        with patch(
+            "eanalizer.cli.load_from_enea_files",
+            wraps=load_from_enea_files,
+        ) as load_files:
+            output = _run_cli(
+                [
+                    "--katalog",
+                    str(self.data_dir),
+                    "--scenariusze",
+                    str(scenarios_path),
+                    "--eksport-scenariuszy",
+                    str(export_path),
+                ],
+                self.app_config,
+            )
+        load_files.assert_called_once()
+        self.assertIn("Wyniki scenariuszy (4)", output)
+        rows = json.loads(export_path.read_text(encoding="utf-8"))
+        self.assertEqual(
+            [row["nazwa"] for row in rows],
+            [
+                "dom [taryfa=G11, magazyn=0]",
+                "dom [taryfa=G11, magazyn=5]",
+                "dom [taryfa=G12, magazyn=0]",
+                "dom [taryfa=G12, magazyn=5]",
+            ],
+        )
+
+    def test_repeated_analysis_reuses_cached_summary(self):
+        argv = ["--katalog", str(self.data_dir), "--taryfa", "G12", "--z-netmetering"]
+        first = _run_cli(argv, self.app_config)
+        with patch("eanalizer.cli.run_full_analysis") as run_full_analysis:
+            second = _run_cli(argv, self.app_config)
+        run_full_analysis.assert_not_called()
+        self.assertIn("wynik z pamięci podręcznej", second)
+        summary = first[first.index("Analiza zużycia") :]
+        self.assertIn(summary, second)
+
+        with patch(
+            "eanalizer.cli.run_full_analysis", wraps=run_full_analysis_impl
+        ) as run_full_analysis:
+            _run_cli(argv + ["--bez-cache"], self.app_config)
+        run_full_analysis.assert_called_once()
+
+    def test_profile_reports_stages_to_json_and_dumps_cprofile(self):
+        profile_path = self.tmp_dir / "profil.json"
+        cprofile_path = self.tmp_dir / "profil.prof"
+        original_stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            _run_cli(
+                [
+                    "--katalog",
+                    str(self.data_dir),
+                    "--data-start",
+                    "2024-05-01",
+                    "--profil",
+                    str(profile_path),
+                    "--profil-cprofile",
+                    str(cprofile_path),
+                ],
+                self.app_config,
+            )
+        finally:
+            sys.stderr = original_stderr
+        stages = {
+            stage["nazwa"]: stage
+            for stage in json.loads(profile_path.read_text(encoding="utf-8"))["etapy"]
+        }
+        self.assertEqual(stages["wczytywanie: test_data.csv"]["rekordy"], 5)
+        for name in (
+            "sortowanie",
+            "filtrowanie",
+            "brakujace godziny",
+            "taryfy (TariffManager)",
+            "symulacja",
+            "agregacja dzienna",
+        ):
+            self.assertIn(name, stages)
+        self.assertGreater(len(pstats.Stats(str(cprofile_path)).stats), 0)
+
+    def test_server_mode_starts_server_for_data_dir(self):
+        with patch("eanalizer.cli.run_analysis_server") as run_server:
+            _run_cli(
+                ["--katalog", str(self.data_dir), "--serwer", "--port", "9000"],
+                self.app_config,
+            )
+        run_server.assert_called_once_with(
+            str(self.data_dir),
+            self.app_config.tariffs_file,
+            cache_dir=self.cache_dir,
+            port=9000,
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,27 +1,36 @@
 import unittest
-import os
-import json
 import tempfile
 import shutil
 from pathlib import Path
-from unittest.mock import patch, MagicMock
-from datetime import datetime
+from unittest.mock import Mock, patch
+from datetime import date, datetime
 
 from eanalizer.data_loader import load_from_enea_csv
+from eanalizer import price_fetcher
 from eanalizer.price_fetcher import get_hourly_rce_prices
+from eanalizer.price_store import RcePriceStore
 import pandas as pd
 from eanalizer.core import (
     run_rce_analysis,
+    calculate_rce_costs,
     run_full_analysis,
     run_tariff_comparison,
     print_analysis_summary,
+    aggregate_daily_data,
     calculate_optimal_capacity,
     find_missing_hours,
     resolve_predefined_period,
+    run_capacity_sweep,
+    compare_tariffs,
 )
+import numpy as np
+import requests
+
+from eanalizer import core
 from eanalizer.tariffs import TariffManager
 from eanalizer.models import EnergyData
 from eanalizer.config import AppConfig
+from tests.fake_pse_server import FakePseServer
 
 # Przykładowa odpowiedź JSON z API PSE dla jednego dnia
 FAKE_API_RESPONSE = {
@@ -85,28 +94,25 @@ class TestCoreFunctionality(unittest.TestCase):
         self.assertEqual(len(self.test_data), 5)
         self.assertEqual(self.test_data[0].pobor_przed, 1.0)
 
-    @patch("urllib.request.urlopen")
-    def test_rce_fetching_and_analysis(self, mock_urlopen):
+    def test_rce_fetching_and_analysis(self):
         """Testuje cały proces pobierania, cachowania i analizy cen RCE."""
-        mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.read.return_value = json.dumps(FAKE_API_RESPONSE).encode()
-        mock_urlopen.return_value.__enter__.return_value = mock_response
-
         test_date_str = "2024-07-01"
-        cache_file = self.test_config.cache_dir / f"{test_date_str}.json"
-
-        if os.path.exists(cache_file):
-            os.remove(cache_file)
-
-        prices = get_hourly_rce_prices(
-            datetime(2024, 7, 1),
-            datetime(2024, 7, 1),
-            cache_dir=self.test_config.cache_dir,
-        )
+        cache_dir = Path(tempfile.mkdtemp(dir=self.test_base_dir))
+
+        with FakePseServer(days={test_date_str: FAKE_API_RESPONSE["value"]}) as server:
+            prices = get_hourly_rce_prices(
+                datetime(2024, 7, 1),
+                datetime(2024, 7, 1),
+                cache_dir=cache_dir,
+                base_url=server.base_url,
+            )
 
-        mock_urlopen.assert_called_once()
-        self.assertTrue(os.path.exists(cache_file))
+        self.assertEqual(server.requested_ranges, [(test_date_str, test_date_str)])
+        with RcePriceStore(cache_dir) as store:
+            self.assertEqual(
+                store.fetched_days(date(2024, 7, 1), date(2024, 7, 1)),
+                {test_date_str},
+            )
         self.assertAlmostEqual(prices[datetime(2024, 7, 1, 0, 0)], 0.4)
         self.assertAlmostEqual(prices[datetime(2024, 7, 1, 1, 0)], 0.7)
 
@@ -127,51 +133,222 @@ class TestCoreFunctionality(unittest.TestCase):
         self.assertIn("SUMARYCZNY KOSZT energii pobranej: 0.40 zł", output)
         self.assertIn("SUMARYCZNY PRZYCHÓD z energii oddanej: 1.75 zł", output)
 
-    @patch("urllib.request.urlopen")
-    def test_rce_fetch_failure_is_not_cached(self, mock_urlopen):
+    @patch.object(price_fetcher, "RETRY_BACKOFF", 0)
+    def test_rce_fetch_failure_is_not_cached(self):
         """
         Testuje, że nieudane pobranie cen RCE (błąd sieci/API) nie jest trwale
         zapisywane w cache jako pusty wynik - kolejne uruchomienie musi
         spróbować pobrać dane ponownie, zamiast na stałe zakładać ich brak.
         """
         test_date_str = "2024-08-01"
-        cache_file = self.test_config.cache_dir / f"{test_date_str}.json"
-        if cache_file.exists():
-            cache_file.unlink()
-
-        mock_urlopen.side_effect = ConnectionError("Connection error")
-        prices = get_hourly_rce_prices(
-            datetime(2024, 8, 1),
-            datetime(2024, 8, 1),
-            cache_dir=self.test_config.cache_dir,
-        )
-        self.assertEqual(prices, {})
-        self.assertFalse(cache_file.exists())
-
-        # Kolejne uruchomienie (np. po odzyskaniu łączności) musi ponownie
-        # spróbować pobrać dane, a nie polegać na trwale "zatrutym" cache.
-        mock_urlopen.side_effect = None
-        mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.read.return_value = json.dumps(
-            {
-                "value": [
-                    {"dtime": "2024-08-01 00:15:00", "rce_pln": 400.0},
-                    {"dtime": "2024-08-01 00:30:00", "rce_pln": 400.0},
-                ]
-            }
-        ).encode()
-        mock_urlopen.return_value.__enter__.return_value = mock_response
-
-        prices = get_hourly_rce_prices(
-            datetime(2024, 8, 1),
-            datetime(2024, 8, 1),
-            cache_dir=self.test_config.cache_dir,
+        cache_dir = Path(tempfile.mkdtemp(dir=self.test_base_dir))
+
+        day_records = [
+            {"dtime": "2024-08-01 00:15:00", "rce_pln": 400.0},
+            {"dtime": "2024-08-01 00:30:00", "rce_pln": 400.0},
+        ]
+        # Serwer odpowiada błędem dłużej, niż trwają ponowienia.
+        with FakePseServer(
+            days={test_date_str: day_records}, failures={test_date_str: 100}
+        ) as server:
+            prices = get_hourly_rce_prices(
+                datetime(2024, 8, 1),
+                datetime(2024, 8, 1),
+                cache_dir=cache_dir,
+                base_url=server.base_url,
+            )
+            self.assertEqual(prices, {})
+            with RcePriceStore(cache_dir) as store:
+                self.assertEqual(
+                    store.fetched_days(date(2024, 8, 1), date(2024, 8, 1)), set()
+                )
+            self.assertEqual(
+                len(server.requested_ranges), price_fetcher.REQUEST_RETRIES + 1
+            )
+
+            # Kolejne uruchomienie (np. po odzyskaniu łączności) musi ponownie
+            # spróbować pobrać dane, a nie polegać na trwale "zatrutym" cache.
+            server.failures.clear()
+            prices = get_hourly_rce_prices(
+                datetime(2024, 8, 1),
+                datetime(2024, 8, 1),
+                cache_dir=cache_dir,
+                base_url=server.base_url,
+            )
+        self.assertEqual(
+            len(server.requested_ranges), price_fetcher.REQUEST_RETRIES + 2
         )
-        self.assertEqual(mock_urlopen.call_count, 2)
-        self.assertTrue(cache_file.exists())
         self.assertIn(datetime(2024, 8, 1, 0, 0), prices)
 
+    @patch.object(price_fetcher, "RETRY_BACKOFF", 0)
+    def test_rce_fetch_retries_transient_errors(self):
+        """Przejściowy błąd serwera (503) jest ponawiany, a dzień trafia do cache."""
+        test_date_str = "2024-08-05"
+        with FakePseServer(
+            days={test_date_str: [{"dtime": "2024-08-05 10:15:00", "rce_pln": 500.0}]},
+            failures={test_date_str: 2},
+        ) as server:
+            prices = get_hourly_rce_prices(
+                datetime(2024, 8, 5),
+                datetime(2024, 8, 5),
+                cache_dir=Path(tempfile.mkdtemp(dir=self.test_base_dir)),
+                base_url=server.base_url,
+            )
+        self.assertEqual(server.requested_ranges, [(test_date_str, test_date_str)] * 3)
+        self.assertAlmostEqual(prices[datetime(2024, 8, 5, 10, 0)], 0.5)
+
+    def test_rce_fetch_other_request_errors_fail_only_the_range(self):
+        """Inne błędy requests (np. ChunkedEncodingError) nie przerywają analizy."""
+        for error in (
+            requests.exceptions.ChunkedEncodingError("urwana odpowiedź"),
+            requests.exceptions.TooManyRedirects("pętla przekierowań"),
+        ):
+            with self.subTest(error=type(error).__name__):
+                session = Mock()
+                session.get.side_effect = error
+                with patch("sys.stdout"):
+                    result = price_fetcher._fetch_range_rce_from_api(
+                        session, ["2024-08-01"], base_url="http://localhost"
+                    )
+                self.assertIsNone(result)
+                self.assertEqual(session.get.call_count, 1)
+
+    @patch.object(price_fetcher, "RANGE_MAX_DAYS", 1)
+    def test_rce_fetch_is_concurrent_and_bounded(self):
+        """
+        Brakujące dni pobierane są równolegle, ale nigdy więcej niż max_workers
+        zapytań naraz; dni już obecne w cache nie są pobierane ponownie.
+        """
+        cache_dir = Path(tempfile.mkdtemp(dir=self.test_base_dir))
+        with RcePriceStore(cache_dir) as store:
+            store.store_days(
+                [("2024-09-01", [{"dtime": "2024-09-01 00:15:00", "rce_pln": 100.0}])]
+            )
+
+        with FakePseServer(delay=0.05) as server:
+            get_hourly_rce_prices(
+                datetime(2024, 9, 1),
+                datetime(2024, 9, 12),
+                cache_dir=cache_dir,
+                max_workers=3,
+                base_url=server.base_url,
+            )
+        self.assertEqual(len(server.requested_ranges), 11)
+        self.assertNotIn(("2024-09-01", "2024-09-01"), server.requested_ranges)
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertLessEqual(server.max_in_flight, 3)
+        with RcePriceStore(cache_dir) as store:
+            self.assertEqual(
+                len(store.fetched_days(date(2024, 9, 1), date(2024, 9, 12))), 12
+            )
+
+    def test_rce_backfill_uses_range_queries_with_paging(self):
+        """
+        Luki w cache pobierane są zakresami dat (ge/le) z obsługą stronicowania,
+        a wynik trafia z powrotem do cache dzień po dniu.
+        """
+        cache_dir = Path(tempfile.mkdtemp(dir=self.test_base_dir))
+        # 2024-10-03 jest już w cache - dzieli brakujące dni na dwa zakresy.
+        with RcePriceStore(cache_dir) as store:
+            store.store_days([("2024-10-03", [])])
+        days = {
+            f"2024-10-{day:02d}": [
+                {"dtime": f"2024-10-{day:02d} {hour:02d}:15:00", "rce_pln": 100.0 * day}
+                for hour in range(3)
+            ]
+            for day in range(1, 7)
+        }
+        # Ostatni kwadrans doby należy do business_date poprzedniego dnia.
+        days["2024-10-05"].append({"dtime": "2024-10-06 00:00:00", "rce_pln": 500.0})
+
+        with FakePseServer(days=days, page_size=4) as server:
+            prices = get_hourly_rce_prices(
+                datetime(2024, 10, 1),
+                datetime(2024, 10, 6),
+                cache_dir=cache_dir,
+                base_url=server.base_url,
+            )
+        self.assertEqual(
+            sorted(set(server.requested_ranges)),
+            [("2024-10-01", "2024-10-02"), ("2024-10-04", "2024-10-06")],
+        )
+        # 6 rekordów w pierwszym zakresie i 10 w drugim - po 4 na stronę.
+        self.assertEqual(len(server.requested_ranges), 2 + 3)
+        with RcePriceStore(cache_dir) as store:
+            minutes, _ = store.quarter_prices(
+                datetime(2024, 10, 1), datetime(2024, 10, 7)
+            )
+        self.assertEqual(len(minutes), 5 * 3 + 1)
+        self.assertAlmostEqual(prices[datetime(2024, 10, 4, 1, 0)], 0.4)
+        # Godzina 00:00 należy do 2024-10-06 - kwadrans z poprzedniej doby
+        # (business_date 2024-10-05) jej nie nadpisuje.
+        self.assertAlmostEqual(prices[datetime(2024, 10, 6, 0, 0)], 0.6)
+        self.assertNotIn(datetime(2024, 10, 3, 1, 0), prices)
+
+    def test_rce_analysis_reports_gaps_as_intervals_with_breakdown(self):
+        """
+        Godziny bez ceny RCE raportowane są jako zwarte przedziały (jedno
+        ostrzeżenie zamiast linii na godzinę), a wynik zawiera rozbicie
+        dzienne i miesięczne.
+        """
+        hours = [datetime(2024, 7, 1, h) for h in range(6)] + [
+            datetime(2024, 8, 1, h) for h in range(2)
+        ]
+        data = [
+            EnergyData(
+                timestamp=ts, pobor_przed=0, oddanie_przed=0, pobor=1.0, oddanie=2.0
+            )
+            for ts in hours
+        ]
+        prices = {
+            datetime(2024, 7, 1, 0): 0.5,
+            datetime(2024, 7, 1, 3): 0.2,
+            datetime(2024, 7, 1, 4): float("nan"),
+            datetime(2024, 8, 1, 0): 0.4,
+        }
+        price_arrays = (
+            np.array(list(prices), dtype="datetime64[h]"),
+            np.array(list(prices.values())),
+        )
+
+        result = calculate_rce_costs(data, price_arrays)
+        self.assertAlmostEqual(result["calkowity_koszt"], 1.1)
+        self.assertAlmostEqual(result["calkowity_przychod"], 2.2)
+        self.assertEqual(result["godziny_bez_ceny"], 5)
+        self.assertEqual(
+            result["brakujace_okresy"],
+            [
+                (datetime(2024, 7, 1, 1), datetime(2024, 7, 1, 2)),
+                (datetime(2024, 7, 1, 4), datetime(2024, 7, 1, 5)),
+                (datetime(2024, 8, 1, 1), datetime(2024, 8, 1, 1)),
+            ],
+        )
+        self.assertEqual(
+            result["miesieczne"]["miesiac"].tolist(), ["2024-07", "2024-08"]
+        )
+        self.assertEqual(result["miesieczne"]["koszt_zl"].round(6).tolist(), [0.7, 0.4])
+        self.assertEqual(len(result["dzienne"]), 2)
+        self.assertEqual(result["dzienne"]["pobor_kwh"].tolist(), [6.0, 2.0])
+
+        # Słownik cen daje ten sam wynik co tablice.
+        self.assertEqual(
+            calculate_rce_costs(data, prices)["brakujace_okresy"],
+            result["brakujace_okresy"],
+        )
+
+        import sys
+        from io import StringIO
+
+        original_stdout = sys.stdout
+        sys.stdout = captured_output = StringIO()
+        run_rce_analysis(data, price_arrays)
+        sys.stdout = original_stdout
+        output = captured_output.getvalue()
+        self.assertEqual(output.count("Ostrzeżenie"), 1)
+        self.assertIn("od 2024-07-01 01:00 do 2024-07-01 02:00 (2 godz.)", output)
+        self.assertIn("  - 2024-08-01 01:00", output)
+        self.assertIn("2024-08", output)
+
     def test_net_metering_cascade_logic(self):
         """Testuje kaskadową logikę rozliczeń net-metering między strefami."""
         test_data = [self.test_data[3], self.test_data[2]]
@@ -264,6 +441,34 @@ class TestCoreFunctionality(unittest.TestCase):
         # in the high-price zone that could be shifted.
         self.assertIn("Pojemność wymagana dla arbitrażu taryfowego: 5.000 kWh", output)
 
+    def test_optimal_capacity_reports_percentiles_of_daily_requirement(self):
+        """P50/P90/P100 liczone są z dziennych sum poboru w dniach z nadprodukcją."""
+        test_data = [
+            EnergyData(datetime(2024, 5, day, hour), 1.0, 30.0, pobor, 30.0)
+            for day, pobor in zip(range(1, 6), [1.0, 2.0, 3.0, 4.0, 10.0])
+            for hour in (10, 11)
+        ]
+        daily_df = aggregate_daily_data(test_data)
+
+        import sys
+        from io import StringIO
+
+        original_stdout = sys.stdout
+        sys.stdout = StringIO()
+        result = calculate_optimal_capacity(
+            test_data, daily_df, self.tariff_manager, "G12w"
+        )
+        sys.stdout = original_stdout
+
+        self.assertEqual(result["nadprodukcja"]["dni"], 5)
+        self.assertAlmostEqual(result["nadprodukcja"]["p50"], 6.0)
+        self.assertAlmostEqual(result["nadprodukcja"]["p90"], 15.2)
+        self.assertAlmostEqual(result["nadprodukcja"]["p100"], 20.0)
+        # Strefa szczytowa G12w tylko 2 maja (1 i 3 maja to święta, 4-5 weekend)
+        self.assertEqual(result["arbitraz"]["dni"], 1)
+        self.assertAlmostEqual(result["arbitraz"]["p100"], 2.0)
+        self.assertAlmostEqual(result["optymalna"]["p50"], 6.0)
+
     def test_find_missing_hours_annotates_dst_spring_gap(self):
         """
         Brak godziny w dniu zmiany czasu na letni (ostatnia niedziela marca) powinien
@@ -455,3 +660,75 @@ class TestCoreFunctionality(unittest.TestCase):
             f"(energia: {expected_energy:>9.2f} zł, opłaty stałe: {expected_fixed:>8.2f} zł)",
             output,
         )
+
+    def test_compare_tariffs_simulates_once_and_matches_full_analysis(self):
+        """
+        Porównanie taryf symuluje magazyn tylko raz, a podsumowanie każdej
+        taryfy jest identyczne z osobnym wywołaniem run_full_analysis.
+        """
+        expected = {
+            tariff: run_full_analysis(
+                self.test_data, 5, self.tariff_manager, tariff, 0.8, 0.9
+            )[0]
+            for tariff in self.tariff_manager.get_all_tariffs()
+        }
+        with patch(
+            "eanalizer.core.simulate_storage", wraps=core.simulate_storage
+        ) as mock_simulate:
+            summaries = compare_tariffs(
+                self.test_data, self.tariff_manager, 5, 0.8, 0.9
+            )
+        self.assertEqual(mock_simulate.call_count, 1)
+        self.assertEqual(list(summaries), list(expected))
+        for tariff, summary in summaries.items():
+            self.assertEqual(list(summary["strefy"]), list(expected[tariff]["strefy"]))
+            self.assertAlmostEqual(
+                summary["calkowity_koszt"], expected[tariff]["calkowity_koszt"]
+            )
+
+    def test_capacity_sweep_matches_single_analyses(self):
+        """
+        Koszt z trybu --magazyn-zakres dla każdej pojemności musi być równy
+        kosztowi z osobnego uruchomienia run_full_analysis z tą pojemnością.
+        """
+        data = [
+            EnergyData(
+                timestamp=datetime(2024, 5, 2 + day, hour),
+                pobor_przed=1.0 if hour < 8 or hour > 18 else 0.2,
+                oddanie_przed=2.5 if 10 <= hour <= 14 else 0.0,
+                pobor=0,
+                oddanie=0,
+            )
+            for day in range(3)
+            for hour in range(24)
+        ]
+        capacities = [0.0, 1.0, 2.5, 5.0]
+        for net_metering_ratio in [None, 0.8]:
+            sweep_df = run_capacity_sweep(
+                data,
+                capacities,
+                self.tariff_manager,
+                "G12w",
+                net_metering_ratio=net_metering_ratio,
+                storage_efficiency=0.9,
+            )
+            self.assertEqual(sweep_df["pojemnosc_kwh"].tolist(), capacities)
+            reference, _ = run_full_analysis(
+                data, 0, self.tariff_manager, "G12w", net_metering_ratio, 0.9
+            )
+            for row in sweep_df.itertuples():
+                summary, _ = run_full_analysis(
+                    data,
+                    row.pojemnosc_kwh,
+                    self.tariff_manager,
+                    "G12w",
+                    net_metering_ratio,
+                    0.9,
+                )
+                self.assertAlmostEqual(
+                    row.calkowity_koszt_zl, summary["calkowity_koszt"]
+                )
+                self.assertAlmostEqual(
+                    row.oszczednosc_zl,
+                    reference["calkowity_koszt"] - summary["calkowity_koszt"],
+                )
@@ -1,7 +1,11 @@
 import unittest
 import os
+import shutil
 import tempfile
-from eanalizer.data_loader import load_from_enea_csv
+from pathlib import Path
+from unittest.mock import patch
+
+from eanalizer.data_loader import CSV_CACHE_SUBDIR, load_from_enea_csv
 
 
 class TestDataLoader(unittest.TestCase):
@@ -29,5 +33,47 @@ class TestDataLoader(unittest.TestCase):
             self.assertGreater(len(results), 0)
 
 
+class TestDataLoaderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.cache_dir = self.tmp_dir / "cache"
+        self.csv_path = self.tmp_dir / "dane.csv"
+        shutil.copy("tests/test_data.csv", self.csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_second_load_uses_cache_without_parsing(self):
+        """Drugie wczytanie niezmienionego pliku nie powinno ponownie parsować CSV."""
+        first = load_from_enea_csv(str(self.csv_path), cache_dir=self.cache_dir)
+        self.assertTrue(any((self.cache_dir / CSV_CACHE_SUBDIR).glob("*.npz")))
+
+        with patch("eanalizer.data_loader._parse_enea_csv") as mock_parse:
+            second = load_from_enea_csv(str(self.csv_path), cache_dir=self.cache_dir)
+        mock_parse.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_modified_file_invalidates_cache(self):
+        """Zmiana zawartości pliku musi spowodować ponowne parsowanie."""
+        load_from_enea_csv(str(self.csv_path), cache_dir=self.cache_dir)
+        with open(self.csv_path, "a", encoding="utf-8") as f:
+            f.write('\n"=""2024-05-05 10:59""";"9,0";"0,0";"9,0";"0,0"\n')
+
+        results = load_from_enea_csv(str(self.csv_path), cache_dir=self.cache_dir)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[-1].pobor_przed, 9.0)
+
+    def test_touched_file_with_same_content_reuses_cache(self):
+        """Sama zmiana czasu modyfikacji (ta sama treść) nie unieważnia cache."""
+        load_from_enea_csv(str(self.csv_path), cache_dir=self.cache_dir)
+        stat = self.csv_path.stat()
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        with patch("eanalizer.data_loader._parse_enea_csv") as mock_parse:
+            results = load_from_enea_csv(str(self.csv_path), cache_dir=self.cache_dir)
+        mock_parse.assert_not_called()
+        self.assertEqual(len(results), 5)
+
+
 if __name__ == "__main__":
     unittest.main()
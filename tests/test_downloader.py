@@ -2,15 +2,23 @@ import shutil
 import sys
 import tempfile
 import unittest
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from io import StringIO
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import requests
 from requests.cookies import RequestsCookieJar
 
+from eanalizer import downloader as downloader_module
+from eanalizer import http_utils
 from eanalizer.config import AppConfig
-from eanalizer.downloader import EneaDownloader
+from eanalizer.downloader import (
+    EneaDownloader,
+    _incremental_periods,
+    _last_complete_hour,
+    _merge_csv_rows,
+)
 
 
 def _capture_stdout(func, *args, **kwargs):
@@ -209,6 +217,7 @@ class TestEneaDownloader(unittest.TestCase):
         self.assertTrue(output_file.is_file())
         self.assertEqual(output_file.read_text(encoding="utf-8"), csv_content)
         mock_session.post.assert_called_once()
+        self.assertIsNotNone(downloader.manifest.get(output_file))
 
     @patch("eanalizer.downloader.requests.Session")
     def test_ensure_authenticated_reuses_saved_session(self, mock_session_class):
@@ -254,6 +263,233 @@ class TestEneaDownloader(unittest.TestCase):
         debug_path = self.config.cache_dir / "enea_cookie_debug.json"
         self.assertTrue(debug_path.is_file())
 
+    @patch("time.sleep", return_value=None)
+    def test_download_year_csv_retries_transient_errors(self, mock_sleep):
+        """Przejściowy błąd połączenia jest ponawiany z odstępem, a plik zapisany."""
+        csv_content = "Data;Wartosc\n2023-01-01 00:00:00;1,0\n"
+        csv_post_resp = MagicMock()
+        csv_post_resp.json.return_value = {"data": csv_content}
+        mock_session = MagicMock()
+        mock_session.post.side_effect = [
+            requests.exceptions.ConnectionError("reset"),
+            csv_post_resp,
+        ]
+
+        downloader = EneaDownloader(self.config, force=True)
+        _capture_stdout(
+            downloader._download_year_csv,
+            mock_session,
+            2023,
+            "POD123",
+            "https://ebok.enea.pl/meter/summaryBalancingChart",
+        )
+
+        self.assertEqual(mock_session.post.call_count, 2)
+        mock_sleep.assert_any_call(downloader_module.RETRY_BACKOFF)
+        output_file = self.config.data_dir / "12345_dane_dobowo_godzinowe_2023.csv"
+        self.assertEqual(output_file.read_text(encoding="utf-8"), csv_content)
+
+    def test_download_year_csv_does_not_retry_client_errors(self):
+        error_response = MagicMock(status_code=403)
+        mock_session = MagicMock()
+        mock_session.post.return_value.raise_for_status.side_effect = (
+            requests.exceptions.HTTPError("403", response=error_response)
+        )
+
+        downloader = EneaDownloader(self.config, force=True)
+        output = _capture_stdout(
+            downloader._download_year_csv,
+            mock_session,
+            2023,
+            "POD123",
+            "https://ebok.enea.pl/meter/summaryBalancingChart",
+        )
+
+        mock_session.post.assert_called_once()
+        self.assertIn(
+            "Błąd podczas pobierania lub zapisywania danych za rok 2023", output
+        )
+
+    @patch("time.sleep", return_value=None)
+    def test_years_are_downloaded_concurrently(self, mock_sleep):
+        """Wszystkie lata z zakresu są pobierane przez pulę wątków na wspólnej sesji."""
+        mock_session = MagicMock()
+        mock_session.__enter__.return_value = mock_session
+        mock_session.get.return_value = MagicMock(
+            text=(
+                "<span>12345</span>"
+                '<a href="/dashboard/select-current-client/'
+                'aabbccdd-1122-3344-5566-778899aabbcc">wybierz</a>'
+                'data-point-of-delivery-id="POD123" '
+                'data-min-date-value="2021" data-max-date-value="2024"'
+            ),
+            url="https://ebok.enea.pl/dashboard",
+        )
+
+        def post(url, data, headers):
+            response = MagicMock()
+            response.json.return_value = {
+                "data": f"Data;Wartosc\n{data['date']}-01-01 00:00:00;1,0\n"
+            }
+            return response
+
+        mock_session.post.side_effect = post
+
+        downloader = EneaDownloader(self.config, force=True, workers=4)
+        downloader._rate_limiter = http_utils.TokenBucket(rate=1000.0, capacity=4)
+        with patch("eanalizer.downloader.requests.Session", return_value=mock_session):
+            _capture_stdout(downloader._run_download_process)
+
+        self.assertEqual(mock_session.post.call_count, 4)
+        for year in range(2021, 2025):
+            output_file = (
+                self.config.data_dir / f"12345_dane_dobowo_godzinowe_{year}.csv"
+            )
+            self.assertIn(f"{year}-01-01", output_file.read_text(encoding="utf-8"))
+
+    def test_token_bucket_limits_request_rate(self):
+        """Po wyczerpaniu serii kolejne żetony wydawane są w tempie `rate` na sekundę."""
+        now = [0.0]
+
+        def fake_sleep(seconds):
+            now[0] += seconds
+
+        bucket = http_utils.TokenBucket(rate=2.0, capacity=2, clock=lambda: now[0])
+        with patch("time.sleep", side_effect=fake_sleep):
+            for _ in range(6):
+                bucket.acquire()
+        # 2 żetony od razu, pozostałe 4 co 0.5 s.
+        self.assertAlmostEqual(now[0], 2.0)
+
+    def test_merge_csv_rows_replaces_overlapping_period(self):
+        header = "Data;Wartosc"
+        existing = "\n".join(
+            [
+                header,
+                '"=""2024-05-01 22:59""";"1,0"',
+                '"=""2024-05-01 23:59""";"---"',
+                '"=""2024-05-02 00:59""";"---"',
+            ]
+        )
+        new = "\n".join(
+            [
+                header,
+                '"=""2024-05-01 23:59""";"2,0"',
+                '"=""2024-05-02 00:59""";"3,0"',
+            ]
+        )
+        merged = _merge_csv_rows(existing, new)
+        self.assertEqual(
+            merged.splitlines(),
+            [
+                header,
+                '"=""2024-05-01 22:59""";"1,0"',
+                '"=""2024-05-01 23:59""";"2,0"',
+                '"=""2024-05-02 00:59""";"3,0"',
+            ],
+        )
+        self.assertEqual(_last_complete_hour(existing), datetime(2024, 5, 1, 22, 59))
+        self.assertEqual(_last_complete_hour(merged), datetime(2024, 5, 2, 0, 59))
+
+    def test_incremental_periods_use_days_for_short_gaps_and_months_otherwise(self):
+        self.assertEqual(
+            _incremental_periods(date(2024, 5, 30), date(2024, 5, 31)),
+            [("day", "2024-05-30"), ("day", "2024-05-31")],
+        )
+        self.assertEqual(
+            _incremental_periods(date(2024, 3, 20), date(2024, 5, 31)),
+            [("month", "2024-03"), ("month", "2024-04"), ("month", "2024-05")],
+        )
+
+    def test_incremental_download_fetches_only_new_days(self):
+        now = datetime.now()
+        yesterday = now - timedelta(days=1)
+        filename = self.config.data_dir / f"12345_dane_dobowo_godzinowe_{now.year}.csv"
+        if yesterday.year != now.year:
+            self.skipTest("Test wymaga, by wczoraj był w bieżącym roku.")
+        filename.write_text(
+            f'Data;Wartosc\n"=""{yesterday:%Y-%m-%d} 00:59""";"1,0"\n',
+            encoding="utf-8",
+        )
+        day_csv = (
+            f'Data;Wartosc\n"=""{yesterday:%Y-%m-%d} 00:59""";"1,0"\n'
+            f'"=""{yesterday:%Y-%m-%d} 01:59""";"2,0"\n'
+        )
+        empty_day_resp = MagicMock()
+        empty_day_resp.json.return_value = {"data": "Data;Wartosc\n"}
+        day_resp = MagicMock()
+        day_resp.json.return_value = {"data": day_csv}
+        mock_session = MagicMock()
+        mock_session.post.side_effect = [day_resp, empty_day_resp]
+
+        downloader = EneaDownloader(self.config, incremental=True)
+        downloader._rate_limiter = http_utils.TokenBucket(rate=1000.0, capacity=4)
+        output = _capture_stdout(
+            downloader._download_year,
+            mock_session,
+            now.year,
+            "POD123",
+            "https://ebok.enea.pl/meter/summaryBalancingChart",
+        )
+
+        self.assertIn("Tryb przyrostowy", output)
+        posted = [call.kwargs["data"] for call in mock_session.post.call_args_list]
+        self.assertEqual(
+            [(d["duration"], d["date"]) for d in posted],
+            [("day", f"{yesterday:%Y-%m-%d}"), ("day", f"{now:%Y-%m-%d}")],
+        )
+        self.assertEqual(filename.read_text(encoding="utf-8"), day_csv)
+
+    def test_incremental_download_with_nul_interleaved_file(self):
+        """Plik z bajtami NUL (format Enei) jest dociągany przyrostowo i scalany."""
+        now = datetime.now()
+        yesterday = now - timedelta(days=1)
+        filename = self.config.data_dir / f"12345_dane_dobowo_godzinowe_{now.year}.csv"
+        if yesterday.year != now.year:
+            self.skipTest("Test wymaga, by wczoraj był w bieżącym roku.")
+        existing = (
+            f'Data;Wartosc\n"=""{yesterday:%Y-%m-%d} 00:59""";"1,0"\n'
+            f'"=""{yesterday:%Y-%m-%d} 01:59""";"---"\n'
+        )
+        # Enea przeplata tekst bajtami NUL
+        filename.write_text("".join(c + "\0" for c in existing), encoding="utf-8")
+        self.assertEqual(
+            _last_complete_hour(filename.read_text(encoding="utf-8")),
+            yesterday.replace(hour=0, minute=59, second=0, microsecond=0),
+        )
+        day_csv = (
+            f'Data;Wartosc\n"=""{yesterday:%Y-%m-%d} 01:59""";"2,0"\n'
+            f'"=""{yesterday:%Y-%m-%d} 02:59""";"3,0"\n'
+        )
+        empty_day_resp = MagicMock()
+        empty_day_resp.json.return_value = {"data": "Data;Wartosc\n"}
+        day_resp = MagicMock()
+        day_resp.json.return_value = {"data": day_csv}
+        mock_session = MagicMock()
+        mock_session.post.side_effect = [day_resp, empty_day_resp]
+
+        downloader = EneaDownloader(self.config, incremental=True)
+        downloader._rate_limiter = http_utils.TokenBucket(rate=1000.0, capacity=4)
+        output = _capture_stdout(
+            downloader._download_year,
+            mock_session,
+            now.year,
+            "POD123",
+            "https://ebok.enea.pl/meter/summaryBalancingChart",
+        )
+
+        self.assertIn("Tryb przyrostowy", output)
+        self.assertEqual(mock_session.post.call_count, 2)
+        self.assertEqual(
+            filename.read_text(encoding="utf-8").splitlines(),
+            [
+                "Data;Wartosc",
+                f'"=""{yesterday:%Y-%m-%d} 00:59""";"1,0"',
+                f'"=""{yesterday:%Y-%m-%d} 01:59""";"2,0"',
+                f'"=""{yesterday:%Y-%m-%d} 02:59""";"3,0"',
+            ],
+        )
+
     def test_report_data_ranges_no_files(self):
         downloader = EneaDownloader(self.config)
         output = _capture_stdout(downloader._report_data_ranges)
@@ -266,7 +502,14 @@ class TestEneaDownloader(unittest.TestCase):
         downloader = EneaDownloader(self.config)
         output = _capture_stdout(downloader._report_data_ranges)
 
-        self.assertIn("12345_dane_dobowo_godzinowe_2024.csv", output)
+        self.assertIn(
+            "12345_dane_dobowo_godzinowe_2024.csv: 2024-05-01 04:00 do 2024-05-04 10:00",
+            output,
+        )
+        # Kolejny raport odpowiada z manifestu, bez parsowania pliku.
+        with patch("eanalizer.manifest.describe_csv") as mock_describe:
+            _capture_stdout(EneaDownloader(self.config)._report_data_ranges)
+        mock_describe.assert_not_called()
 
 
 if __name__ == "__main__":
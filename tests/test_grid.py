@@ -0,0 +1,131 @@
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from eanalizer.core import run_capacity_sweep
+from eanalizer.data_loader import load_from_enea_csv
+from eanalizer import grid
+from eanalizer.grid import GRID_COLUMNS, _split_tasks, evaluate_cost_grid, export_grid
+from eanalizer.tariffs import TariffManager
+
+
+class TestCostGrid(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        tariffs_file = cls.tmp_dir / "tariffs.csv"
+        tariffs_file.write_text(
+            "tariff,zone_name,day_type,start_hour,end_hour,energy_price,dist_price,dist_fee\n"
+            "G11,stala,all,0,24,0.6,0.3,40.0\n"
+            "G12,dzienna,all,6,22,0.7,0.4,46.0\n"
+            "G12,nocna,all,22,6,0.4,0.2,46.0\n",
+            encoding="utf-8",
+        )
+        cls.tariff_manager = TariffManager(str(tariffs_file), years=[2024])
+        with redirect_stdout(StringIO()):
+            cls.data = load_from_enea_csv("tests/test_data.csv")
+        cls.grid_args = dict(
+            capacities=[0.0, 0.5, 1.0, 2.0],
+            efficiencies=[0.8, 0.9],
+            tariffs=["G11", "G12"],
+            net_metering_ratios=[None, 0.8],
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def test_grid_matches_capacity_sweep_for_every_cell(self):
+        """Każda komórka siatki zgadza się z run_capacity_sweep dla tych parametrów."""
+        grid = evaluate_cost_grid(
+            self.data, self.tariff_manager, workers=1, **self.grid_args
+        )
+        self.assertEqual(list(grid.columns), GRID_COLUMNS)
+        self.assertEqual(len(grid), 4 * 2 * 2 * 2)
+        for (tariff, ratio, efficiency), cells in grid.groupby(
+            ["taryfa", "netmetering", "sprawnosc"], dropna=False
+        ):
+            sweep = run_capacity_sweep(
+                self.data,
+                cells["pojemnosc_kwh"],
+                self.tariff_manager,
+                tariff,
+                None if pd.isna(ratio) else ratio,
+                efficiency,
+            )
+            np.testing.assert_allclose(
+                cells["calkowity_koszt_zl"], sweep["calkowity_koszt_zl"]
+            )
+            np.testing.assert_allclose(cells["oszczednosc_zl"], sweep["oszczednosc_zl"])
+
+    def test_process_pool_with_shared_memory_gives_same_table(self):
+        """Wynik z puli procesów (tablice w pamięci współdzielonej) jest identyczny."""
+        serial = evaluate_cost_grid(
+            self.data, self.tariff_manager, workers=1, **self.grid_args
+        )
+        parallel = evaluate_cost_grid(
+            self.data, self.tariff_manager, workers=2, **self.grid_args
+        )
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    def test_split_never_adds_hourly_passes(self):
+        """Bez numba jeden przebieg na sprawność; z numba najwyżej jedno zadanie na proces."""
+        capacities = [0.0, 0.5, 1.0, 2.0, 4.0]
+        for workers in (1, 2, 4, 16):
+            with self.subTest(workers=workers):
+                tasks = _split_tasks(
+                    capacities, [0.8, 0.9], workers, split_capacities=False
+                )
+                self.assertEqual([e for e, _ in tasks], [0.8, 0.9])
+                tasks = _split_tasks(
+                    capacities, [0.8, 0.9], workers, split_capacities=True
+                )
+                self.assertLessEqual(len(tasks), max(workers, 2))
+                self.assertEqual(
+                    sorted(c for _, chunk in tasks for c in chunk),
+                    sorted(capacities * 2),
+                )
+
+    def test_single_efficiency_without_numba_runs_one_pass_in_process(self):
+        """Gdy podział nie zmniejsza liczby przebiegów, pula procesów nie jest tworzona."""
+        with mock.patch(
+            "eanalizer.grid._split_tasks",
+            side_effect=lambda c, e, w: _split_tasks(c, e, w, split_capacities=False),
+        ), mock.patch(
+            "eanalizer.grid.simulate_storage_sweep",
+            wraps=grid.simulate_storage_sweep,
+        ) as sweep, mock.patch(
+            "eanalizer.grid.ProcessPoolExecutor"
+        ) as pool:
+            evaluate_cost_grid(
+                self.data,
+                self.tariff_manager,
+                capacities=[0.0, 0.5, 1.0, 2.0],
+                efficiencies=[0.9],
+                tariffs=["G11"],
+                workers=4,
+            )
+        self.assertEqual(sweep.call_count, 1)
+        pool.assert_not_called()
+
+    def test_export_csv_in_long_format(self):
+        grid = evaluate_cost_grid(
+            self.data, self.tariff_manager, workers=1, **self.grid_args
+        )
+        path = self.tmp_dir / "siatka.csv"
+        with redirect_stdout(StringIO()):
+            export_grid(grid, str(path))
+        exported = pd.read_csv(path, sep=";", decimal=",")
+        self.assertEqual(list(exported.columns), GRID_COLUMNS)
+        self.assertEqual(len(exported), len(grid))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from benchmarks.synthetic_data import generate_profiles, render_enea_csv
+from eanalizer.manifest import MANIFEST_FILE_NAME, DataManifest, describe_csv
+
+
+class TestDataManifest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.csv_file = self.data_dir / "12345_dane_dobowo_godzinowe_2024.csv"
+        shutil.copy("tests/test_data.csv", self.csv_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def test_describe_csv_counts_complete_rows_and_range(self):
+        content = (
+            "Data;Wartosc\n"
+            '"=""2024-05-01 04:59""";"1,0"\n'
+            '"=""2024-05-01 05:59""";"2,0"\n'
+            '"=""2024-05-01 06:59""";"---"\n'
+        )
+        description = describe_csv(content)
+        self.assertEqual(description["rows"], 2)
+        self.assertEqual(description["first"], "2024-05-01T04:00:00")
+        self.assertEqual(description["last"], "2024-05-01T05:00:00")
+        self.assertFalse(description["valid"])
+
+    def test_nul_interleaved_file_matches_plain_text(self):
+        """Plik z bajtami NUL (format Enei) opisany jest tak samo jak czysty tekst."""
+        profiles = generate_profiles(2023)
+        for tail in (0, 5):
+            with self.subTest(unsettled_tail=tail):
+                plain = render_enea_csv(profiles, nul_bytes=False, unsettled_tail=tail)
+                self.csv_file.write_bytes(
+                    render_enea_csv(profiles, nul_bytes=True, unsettled_tail=tail)
+                )
+                entry = DataManifest(self.data_dir).update(self.csv_file)
+                expected = describe_csv(plain.decode("utf-8"))
+                self.assertGreater(expected["rows"], 0)
+                self.assertEqual(expected["valid"], tail == 0)
+                for key in ("rows", "first", "last", "valid"):
+                    self.assertEqual(entry[key], expected[key])
+
+    def test_entry_is_persisted_and_answered_without_reading_file(self):
+        """Po zapisaniu wpisu kolejne zapytania nie czytają ani nie parsują pliku."""
+        entry = DataManifest(self.data_dir).ensure(self.csv_file)
+        self.assertEqual(entry["rows"], 5)
+        self.assertTrue(entry["valid"])
+        self.assertTrue((self.data_dir / MANIFEST_FILE_NAME).is_file())
+
+        reloaded = DataManifest(self.data_dir)
+        with patch("eanalizer.manifest.describe_csv") as mock_describe:
+            self.assertEqual(reloaded.ensure(self.csv_file), entry)
+        mock_describe.assert_not_called()
+
+    def test_modified_file_invalidates_entry(self):
+        manifest = DataManifest(self.data_dir)
+        manifest.ensure(self.csv_file)
+        with open(self.csv_file, "a", encoding="utf-8") as f:
+            f.write('\n"=""2024-05-05 10:59""";"---";"0,0";"0,0";"0,0"')
+        stat = self.csv_file.stat()
+        os.utime(self.csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertIsNone(manifest.get(self.csv_file))
+        entry = manifest.ensure(self.csv_file)
+        self.assertFalse(entry["valid"])
+        self.assertEqual(entry["rows"], 5)
+
+    def test_deleted_files_are_pruned(self):
+        manifest = DataManifest(self.data_dir)
+        manifest.ensure(self.csv_file)
+        other = self.data_dir / "12345_dane_dobowo_godzinowe_2023.csv"
+        shutil.copy("tests/test_data.csv", other)
+        self.csv_file.unlink()
+        manifest.ensure(other)
+        self.assertEqual(list(DataManifest(self.data_dir)._files), [other.name])
+
+
+if __name__ == "__main__":
+    unittest.main()
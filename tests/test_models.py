@@ -0,0 +1,142 @@
+import unittest
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+
+import numpy as np
+
+from eanalizer.core import aggregate_daily_data, filter_data_by_date
+from eanalizer.data_loader import load_from_enea_files
+from eanalizer.models import EnergyData, EnergySeries
+
+
+def _record(ts, pobor_przed=1.0, oddanie_przed=0.0):
+    return EnergyData(
+        timestamp=ts,
+        pobor_przed=pobor_przed,
+        oddanie_przed=oddanie_przed,
+        pobor=max(pobor_przed - oddanie_przed, 0.0),
+        oddanie=max(oddanie_przed - pobor_przed, 0.0),
+    )
+
+
+class TestEnergySeries(unittest.TestCase):
+    def test_round_trip_with_list(self):
+        """Konwersja lista -> EnergySeries -> lista zachowuje wszystkie rekordy."""
+        records = [
+            _record(datetime(2024, 5, 1, 10), 1.5, 0.5),
+            _record(datetime(2024, 5, 1, 11), 0.0, 2.0),
+        ]
+        series = EnergySeries.from_records(records)
+        self.assertEqual(len(series), 2)
+        self.assertEqual(series.timestamp.dtype, np.dtype("datetime64[ns]"))
+        self.assertTrue(series.pobor_przed.flags["C_CONTIGUOUS"])
+        self.assertEqual(series.to_list(), records)
+        self.assertEqual(series, records)
+        self.assertEqual(series[1], records[1])
+        self.assertEqual(series[-1].timestamp, datetime(2024, 5, 1, 11))
+
+    def test_from_data_returns_same_series(self):
+        series = EnergySeries.from_records([_record(datetime(2024, 5, 1, 10))])
+        self.assertIs(EnergySeries.from_data(series), series)
+        self.assertEqual(len(EnergySeries.from_data([])), 0)
+
+    def test_concat_and_sorted(self):
+        a = EnergySeries.from_records([_record(datetime(2024, 5, 2, 10))])
+        b = EnergySeries.from_records(
+            [_record(datetime(2024, 5, 1, 10)), _record(datetime(2024, 5, 3, 10))]
+        )
+        merged = EnergySeries.concat([a, EnergySeries.empty(), b]).sorted()
+        self.assertEqual(
+            [r.timestamp.day for r in merged],
+            [1, 2, 3],
+        )
+        self.assertEqual(
+            merged.time_range(), (datetime(2024, 5, 1, 10), datetime(2024, 5, 3, 10))
+        )
+
+    def test_slicing_returns_series(self):
+        series = EnergySeries.from_records(
+            [_record(datetime(2024, 5, 1, h)) for h in range(5)]
+        )
+        part = series[1:3]
+        self.assertIsInstance(part, EnergySeries)
+        self.assertEqual(len(part), 2)
+        self.assertEqual(part[0].timestamp, datetime(2024, 5, 1, 1))
+
+    def test_between_returns_sorted_view(self):
+        """Zakres dat to wycinek przez searchsorted, współdzielący tablice ze źródłem."""
+        series = EnergySeries.from_records(
+            [_record(datetime(2024, 5, 1, h)) for h in (3, 0, 2, 1, 4)]
+        ).sorted()
+        self.assertTrue(series.is_sorted)
+        part = series.between(
+            np.datetime64("2024-05-01T01", "ns"), np.datetime64("2024-05-01T03", "ns")
+        )
+        self.assertEqual([r.timestamp.hour for r in part], [1, 2])
+        self.assertTrue(np.shares_memory(part.pobor_przed, series.pobor_przed))
+        self.assertTrue(part.is_sorted)
+        self.assertEqual(len(series.between(None, None)), 5)
+        self.assertEqual(
+            len(series.between(np.datetime64("2024-05-02", "ns"), None)), 0
+        )
+        self.assertEqual(
+            part.time_range(), (datetime(2024, 5, 1, 1), datetime(2024, 5, 1, 2))
+        )
+
+    def test_merge_prefers_later_series_for_overlapping_hours(self):
+        """Godziny z kilku plików brane są z ostatniego; powtórzenia w pliku zostają."""
+        yearly = EnergySeries.from_records(
+            [_record(datetime(2024, 5, 1, h), 1.0) for h in (0, 1, 1, 2)]
+        )
+        monthly = EnergySeries.from_records(
+            [_record(datetime(2024, 5, 1, h), 2.0) for h in (2, 3)]
+        )
+        merged = EnergySeries.merge([monthly, yearly, EnergySeries.empty()])
+        self.assertTrue(merged.is_sorted)
+        self.assertEqual(
+            [(r.timestamp.hour, r.pobor_przed) for r in merged],
+            [(0, 1.0), (1, 1.0), (1, 1.0), (2, 1.0), (3, 2.0)],
+        )
+
+    def test_to_frame_columns(self):
+        series = EnergySeries.from_records([_record(datetime(2024, 5, 1, 10))])
+        df = series.to_frame()
+        self.assertEqual(
+            list(df.columns),
+            ["timestamp", "pobor_przed", "oddanie_przed", "pobor", "oddanie"],
+        )
+
+
+class TestCoreWithEnergySeries(unittest.TestCase):
+    def setUp(self):
+        self.series = load_from_enea_files(["tests/test_data.csv"])
+
+    def test_loader_produces_series(self):
+        self.assertIsInstance(self.series, EnergySeries)
+        self.assertEqual(len(self.series), 5)
+
+    def test_overlapping_files_are_not_double_counted(self):
+        with redirect_stdout(StringIO()):
+            twice = load_from_enea_files(["tests/test_data.csv"] * 2)
+        self.assertEqual(twice, self.series)
+
+    def test_aggregate_daily_data_matches_list_input(self):
+        from_series = aggregate_daily_data(self.series)
+        from_list = aggregate_daily_data(self.series.to_list())
+        self.assertTrue(from_series.equals(from_list))
+        first_day = from_series.iloc[0]
+        self.assertEqual(first_day["date"], datetime(2024, 5, 1).date())
+        self.assertAlmostEqual(first_day["pobor_przed"], 3.5)
+        self.assertAlmostEqual(first_day["oddanie"], 2.5)
+
+    def test_filter_data_by_date_returns_series(self):
+        filtered = filter_data_by_date(self.series, "2024-05-02", "2024-05-03")
+        self.assertIsInstance(filtered, EnergySeries)
+        self.assertTrue(
+            all(r.timestamp.day in (2, 3) for r in filtered),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
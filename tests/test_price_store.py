@@ -0,0 +1,79 @@
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+from eanalizer.price_store import STORE_FILE_NAME, RcePriceStore
+
+
+class TestRcePriceStore(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_legacy_json_cache_is_migrated_and_removed(self):
+        """
+        Dawne pliki <data>.json są importowane do bazy przy pierwszym otwarciu
+        magazynu i usuwane; inne pliki JSON w katalogu cache zostają.
+        """
+        with open(self.cache_dir / "2024-07-01.json", "w") as f:
+            json.dump(
+                [
+                    {"dtime": "2024-07-01 00:15:00", "rce_pln": 400.0},
+                    {"dtime": "2024-07-01 00:30:00", "rce_pln": 600.0},
+                ],
+                f,
+            )
+        with open(self.cache_dir / "2024-07-02.json", "w") as f:
+            json.dump([], f)
+        (self.cache_dir / "enea_cookie_debug.json").write_text("{}")
+
+        with RcePriceStore(self.cache_dir) as store:
+            fetched = store.fetched_days(date(2024, 7, 1), date(2024, 7, 31))
+            hours, prices = store.hourly_prices(
+                datetime(2024, 7, 1), datetime(2024, 7, 3)
+            )
+
+        self.assertEqual(fetched, {"2024-07-01", "2024-07-02"})
+        np.testing.assert_array_equal(
+            hours, np.array(["2024-07-01T00"], dtype="datetime64[h]")
+        )
+        np.testing.assert_allclose(prices, [0.5])
+        self.assertFalse((self.cache_dir / "2024-07-01.json").exists())
+        self.assertTrue((self.cache_dir / "enea_cookie_debug.json").exists())
+        self.assertTrue((self.cache_dir / STORE_FILE_NAME).is_file())
+
+    def test_quarter_prices_average_duplicated_dst_records(self):
+        """Kwadranse oznaczone a/b (zmiana czasu) są uśredniane w jednym wpisie."""
+        with RcePriceStore(self.cache_dir) as store:
+            store.store_days(
+                [
+                    (
+                        "2024-10-27",
+                        [
+                            {"dtime": "2024-10-27 02:15:00a", "rce_pln": 100.0},
+                            {"dtime": "2024-10-27 02:15:00b", "rce_pln": 300.0},
+                            {"dtime": "2024-10-27 02:30:00", "rce_pln": 500.0},
+                        ],
+                    )
+                ]
+            )
+            minutes, quarter = store.quarter_prices(
+                datetime(2024, 10, 27), datetime(2024, 10, 28)
+            )
+            hours, hourly = store.hourly_prices(
+                datetime(2024, 10, 27), datetime(2024, 10, 28)
+            )
+        self.assertEqual(len(minutes), 2)
+        np.testing.assert_allclose(quarter, [0.2, 0.5])
+        np.testing.assert_allclose(hourly, [0.3])
+
+
+if __name__ == "__main__":
+    unittest.main()
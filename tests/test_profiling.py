@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from eanalizer import profiling
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        profiling.disable()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_disabled_stages_are_not_recorded(self):
+        """Bez włączonego profilowania stage() zwraca pusty, współdzielony etap."""
+        with profiling.stage("a", records=10) as stage:
+            stage.records = 5
+        self.assertIs(profiling.stage("b"), profiling.stage("c"))
+        self.assertIsNone(profiling.active())
+
+    def test_stages_accumulate_time_calls_and_records(self):
+        """Czas, wywołania i rekordy sumowane są per nazwa etapu."""
+        profiler = profiling.enable()
+        with profiling.stage("wczytywanie", records=100):
+            pass
+        with profiling.stage("wczytywanie") as stage:
+            stage.records = 50
+        with profiling.stage("taryfy"):
+            pass
+        report = profiler.report()
+        self.assertEqual(
+            [(s["nazwa"], s["wywolania"], s["rekordy"]) for s in report["etapy"]],
+            [("wczytywanie", 2, 150), ("taryfy", 1, None)],
+        )
+        self.assertIsNone(report["etapy"][1]["rekordy_na_s"])
+        self.assertIn("wczytywanie", profiler.format_report())
+
+    def test_profile_target_from_flag_or_environment(self):
+        """Cel raportu pochodzi z --profil, a bez flagi ze zmiennej środowiskowej."""
+        with patch.dict(os.environ, {profiling.PROFILE_ENV_VAR: "profil.json"}):
+            self.assertEqual(profiling.profile_target(None), "profil.json")
+            self.assertEqual(profiling.profile_target("-"), "-")
+        with patch.dict(os.environ, {profiling.PROFILE_ENV_VAR: "0"}):
+            self.assertIsNone(profiling.profile_target(None))
+        with patch.dict(os.environ, clear=True):
+            self.assertIsNone(profiling.profile_target(None))
+
+    def test_emit_to_stderr_and_json_file(self):
+        """Raport trafia na stderr albo do pliku JSON."""
+        profiler = profiling.enable()
+        with profiling.stage("symulacja", records=10):
+            pass
+        with patch("sys.stderr", new=StringIO()) as stderr:
+            profiler.emit("-")
+        self.assertIn("symulacja", stderr.getvalue())
+
+        path = self.tmp_dir / "profil.json"
+        with patch("sys.stderr", new=StringIO()):
+            profiler.emit(str(path))
+        report = json.loads(path.read_text(encoding="utf-8"))
+        self.assertEqual(report["etapy"][0]["rekordy"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
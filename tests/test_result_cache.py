@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from eanalizer.data_loader import load_from_enea_csv
+from eanalizer.result_cache import ResultCache, data_fingerprint
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.tariffs_file = self.tmp_dir / "tariffs.csv"
+        self.tariffs_file.write_text(
+            "tariff,zone_name,day_type,start_hour,end_hour,energy_price,dist_price,dist_fee\n"
+            "G11,stala,all,0,24,0.6,0.3,40.0\n",
+            encoding="utf-8",
+        )
+        with redirect_stdout(StringIO()):
+            self.data = load_from_enea_csv("tests/test_data.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_roundtrip_survives_reopening(self):
+        """Zapisany wynik jest dostępny także po ponownym otwarciu cache."""
+        summary = {"strefy": {"stala": {"price": 0.9}}, "calkowity_koszt": 1.0 / 3}
+        with ResultCache(self.tmp_dir) as cache:
+            key = ResultCache.make_key(
+                "analiza", self.data, self.tariffs_file, tariff="G11"
+            )
+            self.assertIsNone(cache.get(key))
+            cache.put(key, summary)
+        with ResultCache(self.tmp_dir) as cache:
+            self.assertEqual(cache.get(key), summary)
+
+    def test_key_depends_on_data_tariffs_and_params(self):
+        """Klucz zmienia się ze zmianą danych, pliku taryf albo parametrów."""
+        base = ResultCache.make_key(
+            "analiza", self.data, self.tariffs_file, tariff="G11"
+        )
+        self.assertEqual(
+            base,
+            ResultCache.make_key("analiza", self.data, self.tariffs_file, tariff="G11"),
+        )
+        self.assertNotEqual(
+            base,
+            ResultCache.make_key("analiza", self.data, self.tariffs_file, tariff="G12"),
+        )
+        self.assertNotEqual(
+            base,
+            ResultCache.make_key(
+                "analiza", self.data[:-1], self.tariffs_file, tariff="G11"
+            ),
+        )
+        self.assertNotEqual(
+            data_fingerprint(self.data), data_fingerprint(self.data[1:])
+        )
+        with open(self.tariffs_file, "a", encoding="utf-8") as f:
+            f.write("G12,dzienna,all,6,22,0.7,0.4,46.0\n")
+        self.assertNotEqual(
+            base,
+            ResultCache.make_key("analiza", self.data, self.tariffs_file, tariff="G11"),
+        )
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Po przekroczeniu limitu usuwany jest wpis najdawniej użyty."""
+        with ResultCache(self.tmp_dir, max_entries=2) as cache:
+            cache.put("a", 1)
+            cache.put("b", 2)
+            self.assertEqual(cache.get("a"), 1)
+            cache.put("c", 3)
+            self.assertEqual(len(cache), 2)
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual(cache.get("a"), 1)
+            self.assertEqual(cache.get("c"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from eanalizer import scenarios as scenarios_module
+from eanalizer.core import run_full_analysis
+from eanalizer.data_loader import load_from_enea_csv
+from eanalizer.scenarios import (
+    Scenario,
+    expand_scenarios,
+    load_scenarios,
+    run_scenarios,
+)
+from eanalizer.tariffs import TariffManager
+
+
+class TestScenarios(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        tariffs_file = cls.tmp_dir / "tariffs.csv"
+        tariffs_file.write_text(
+            "tariff,zone_name,day_type,start_hour,end_hour,energy_price,dist_price,dist_fee\n"
+            "G11,stala,all,0,24,0.6,0.3,40.0\n"
+            "G12,dzienna,all,6,22,0.7,0.4,46.0\n"
+            "G12,nocna,all,22,6,0.4,0.2,46.0\n",
+            encoding="utf-8",
+        )
+        cls.tariff_manager = TariffManager(str(tariffs_file), years=range(2024, 2025))
+        with redirect_stdout(StringIO()):
+            cls.data = load_from_enea_csv("tests/test_data.csv")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def test_list_fields_expand_to_cartesian_product(self):
+        """Pola-listy rozwijane są w iloczyn kartezjański z opisową nazwą."""
+        scenarios = expand_scenarios(
+            [{"nazwa": "dom", "taryfa": ["G11", "G12"], "magazyn": [0, 5]}],
+            defaults={"sprawnosc": 0.8},
+        )
+        self.assertEqual(len(scenarios), 4)
+        self.assertEqual(scenarios[1].nazwa, "dom [taryfa=G11, magazyn=5]")
+        self.assertEqual(scenarios[1].magazyn, 5.0)
+        self.assertTrue(all(s.sprawnosc == 0.8 for s in scenarios))
+
+    def test_invalid_entries_are_rejected(self):
+        """Nieznane pola i sprzeczne parametry zgłaszane są jako ValueError."""
+        for entry in (
+            {"taryfa": "G11", "pojemnosc": 5},
+            {"okres": "ostatnie-30-dni", "data_start": "2024-05-01"},
+            {"okres": "jutro"},
+            {"sprawnosc": 1.5},
+        ):
+            with self.subTest(entry=entry):
+                with self.assertRaises(ValueError):
+                    expand_scenarios([entry])
+        with self.assertRaises(ValueError):
+            run_scenarios(self.data, self.tariff_manager, [Scenario("x", taryfa="X99")])
+
+    def test_results_match_single_analyses(self):
+        """Każdy wiersz tabeli odpowiada pojedynczemu uruchomieniu analizy."""
+        scenarios = expand_scenarios(
+            [
+                {
+                    "nazwa": "s",
+                    "taryfa": ["G11", "G12"],
+                    "magazyn": [0, 2.5],
+                    "netmetering": [None, 0.8],
+                },
+                {
+                    "nazwa": "maj",
+                    "data_start": "2024-05-01",
+                    "data_koniec": "2024-05-02",
+                },
+            ]
+        )
+        results = run_scenarios(self.data, self.tariff_manager, scenarios)
+        self.assertEqual(list(results["nazwa"]), [s.nazwa for s in scenarios])
+
+        for scenario, (_, row) in zip(scenarios, results.iterrows()):
+            data = self.data
+            if scenario.data_koniec:
+                data = data[:4]
+            expected, _ = run_full_analysis(
+                data,
+                scenario.magazyn,
+                self.tariff_manager,
+                scenario.taryfa,
+                net_metering_ratio=scenario.netmetering,
+                storage_efficiency=scenario.sprawnosc,
+            )
+            with self.subTest(scenario=scenario.nazwa):
+                self.assertEqual(row["rekordy"], len(data))
+                self.assertAlmostEqual(
+                    row["calkowity_koszt_zl"], expected["calkowity_koszt"]
+                )
+                self.assertAlmostEqual(
+                    row["oszczednosc_energii_kwh"], expected["oszczednosc"]
+                )
+
+    def test_tariff_name_is_case_insensitive(self):
+        """Taryfa w scenariuszu, jak --taryfa w CLI, nie zależy od wielkości liter."""
+        results = run_scenarios(
+            self.data,
+            self.tariff_manager,
+            [Scenario("mala", taryfa="g12"), Scenario("duza", taryfa="G12")],
+        )
+        self.assertEqual(list(results["taryfa"]), ["G12", "G12"])
+        self.assertAlmostEqual(
+            results["calkowity_koszt_zl"][0], results["calkowity_koszt_zl"][1]
+        )
+
+    def test_one_simulation_per_date_range_and_efficiency(self):
+        """Scenariusze o wspólnym zakresie dat i sprawności dzielą jedną symulację."""
+        scenarios = expand_scenarios(
+            [{"taryfa": ["G11", "G12"], "magazyn": [0, 5, 10], "sprawnosc": [0.9, 1]}]
+        )
+        with patch(
+            "eanalizer.scenarios.simulate_storage_sweep",
+            wraps=scenarios_module.simulate_storage_sweep,
+        ) as sweep:
+            run_scenarios(self.data, self.tariff_manager, scenarios)
+        self.assertEqual(sweep.call_count, 2)
+
+    def test_load_scenarios_from_json_and_yaml(self):
+        """Plik scenariuszy może być w formacie JSON albo YAML, z sekcją domyślną."""
+        json_path = self.tmp_dir / "scenariusze.json"
+        json_path.write_text(
+            json.dumps(
+                {
+                    "domyslne": {"taryfa": "G12"},
+                    "scenariusze": [{"nazwa": "a"}, {"nazwa": "b", "magazyn": 5}],
+                }
+            ),
+            encoding="utf-8",
+        )
+        self.assertEqual(
+            [(s.nazwa, s.taryfa, s.magazyn) for s in load_scenarios(json_path)],
+            [("a", "G12", 0.0), ("b", "G12", 5.0)],
+        )
+
+        yaml_path = self.tmp_dir / "scenariusze.yaml"
+        yaml_path.write_text(
+            "- nazwa: c\n  taryfa: G11\n  magazyn: [0, 10]\n", encoding="utf-8"
+        )
+        if scenarios_module.yaml is None:
+            with self.assertRaises(ValueError):
+                load_scenarios(yaml_path)
+        else:
+            self.assertEqual(len(load_scenarios(yaml_path)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
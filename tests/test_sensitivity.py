@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from eanalizer.core import run_full_analysis
+from eanalizer.sensitivity import (
+    BASE_SCENARIO,
+    PriceSensitivity,
+    load_price_candidates,
+    parse_price_changes,
+    run_price_sensitivity,
+)
+from eanalizer.tariffs import TariffManager
+from tests.test_sizing import _synthetic_series
+
+TARIFFS_HEADER = (
+    "tariff,zone_name,day_type,start_hour,end_hour,energy_price,dist_price,dist_fee\n"
+)
+
+
+def _g12_tariffs(path, day=(0.7, 0.4), night=(0.4, 0.2), fee=46.0):
+    path.write_text(
+        TARIFFS_HEADER
+        + f"G12,dzienna,all,6,22,{day[0]},{day[1]},{fee}\n"
+        + f"G12,nocna,all,22,6,{night[0]},{night[1]},{fee}\n",
+        encoding="utf-8",
+    )
+    return TariffManager(str(path), years=[2024])
+
+
+class TestPriceSensitivity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        cls.tariff_manager = _g12_tariffs(cls.tmp_dir / "tariffs.csv")
+        cls.data = _synthetic_series()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def _full_cost(self, tariff_manager, capacity, ratio):
+        summary, _ = run_full_analysis(
+            self.data, capacity, tariff_manager, "G12", ratio, 0.9
+        )
+        return summary["calkowity_koszt"]
+
+    def test_price_changes_match_full_analysis(self):
+        """Wycena z macierzy stref równa się pełnej analizie ze zmienionymi cenami."""
+        changed = _g12_tariffs(self.tmp_dir / "changed.csv", night=(1.0, 0.2), fee=60.0)
+        for ratio in (None, 0.8):
+            with self.subTest(netmetering=ratio):
+                sensitivity = PriceSensitivity(
+                    self.data, self.tariff_manager, "G12", 5.0, ratio, 0.9
+                )
+                # Noc droższa od dnia - zmienia kolejność stref w net-meteringu
+                df = run_price_sensitivity(
+                    sensitivity,
+                    parse_price_changes(["nocna.energia=1.0,oplata=60"], sensitivity),
+                )
+                self.assertEqual(df["scenariusz"][0], BASE_SCENARIO)
+                self.assertAlmostEqual(
+                    df["calkowity_koszt_zl"][0],
+                    self._full_cost(self.tariff_manager, 5.0, ratio),
+                )
+                self.assertAlmostEqual(
+                    df["koszt_bez_magazynu_zl"][0],
+                    self._full_cost(self.tariff_manager, 0.0, ratio),
+                )
+                self.assertAlmostEqual(
+                    df["calkowity_koszt_zl"][1], self._full_cost(changed, 5.0, ratio)
+                )
+                self.assertAlmostEqual(
+                    df["zmiana_kosztu_zl"][1],
+                    df["calkowity_koszt_zl"][1] - df["calkowity_koszt_zl"][0],
+                )
+
+    def test_percent_change_scales_zone_cost(self):
+        """Bez net-meteringu +10% dla wszystkich stref zwiększa koszt energii o 10%."""
+        sensitivity = PriceSensitivity(self.data, self.tariff_manager, "G12")
+        df = run_price_sensitivity(
+            sensitivity, parse_price_changes(["*=+10%", "oplata=0"], sensitivity)
+        )
+        base, plus10, no_fee = df["calkowity_koszt_zl"]
+        fees = base - no_fee
+        self.assertAlmostEqual(plus10 - fees, 1.1 * (base - fees))
+        self.assertTrue(np.allclose(df["oszczednosc_magazynu_zl"], 0.0))
+
+    def test_candidates_csv_keeps_missing_prices(self):
+        """Ceny nieobecne w pliku kandydatów pozostają bazowe."""
+        candidates = self.tmp_dir / "kandydaci.csv"
+        candidates.write_text(
+            "scenariusz,tariff,zone_name,energy_price,dist_price\n"
+            "tania noc,G12,nocna,0.2,\n"
+            "droższy dzień,G12,dzienna,0.9,0.5\n"
+            "inna taryfa,G11,stala,0.1,0.1\n",
+            encoding="utf-8",
+        )
+        sensitivity = PriceSensitivity(self.data, self.tariff_manager, "G12", 5.0)
+        scenarios = load_price_candidates(str(candidates), sensitivity)
+        self.assertEqual(scenarios.names, ["tania noc", "droższy dzień"])
+        expected = parse_price_changes(
+            ["nocna.energia=0.2", "dzienna.energia=0.9,dzienna.dystrybucja=0.5"],
+            sensitivity,
+        )
+        np.testing.assert_allclose(
+            sensitivity.evaluate(scenarios), sensitivity.evaluate(expected)
+        )
+
+    def test_invalid_changes_raise(self):
+        sensitivity = PriceSensitivity(self.data, self.tariff_manager, "G12")
+        for spec in ("szczytowa=+15%", "nocna=tanio", "nocna.cena=1", "oplata.x=1"):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_price_changes([spec], sensitivity)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from eanalizer.core import compare_tariffs, run_full_analysis
+from eanalizer.data_loader import load_from_enea_csv
+from eanalizer.server import (
+    AnalysisServer,
+    AnalysisWorkspace,
+    run_request,
+    select_date_range,
+)
+from eanalizer.tariffs import TariffManager
+
+TARIFFS_CSV = (
+    "tariff,zone_name,day_type,start_hour,end_hour,energy_price,dist_price,dist_fee\n"
+    "G11,stala,all,0,24,0.6,0.3,40.0\n"
+    "G12,dzienna,all,6,22,0.7,0.4,46.0\n"
+    "G12,nocna,all,22,6,0.4,0.2,46.0\n"
+)
+
+
+class TestRunRequest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        cls.tariffs_file = cls.tmp_dir / "tariffs.csv"
+        cls.tariffs_file.write_text(TARIFFS_CSV, encoding="utf-8")
+        cls.tariff_manager = TariffManager(
+            str(cls.tariffs_file), years=range(2024, 2025)
+        )
+        with redirect_stdout(StringIO()):
+            cls.data = load_from_enea_csv("tests/test_data.csv")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def test_analysis_matches_run_full_analysis(self):
+        """Tryb "analiza" zwraca to samo podsumowanie co run_full_analysis."""
+        response = run_request(
+            self.data,
+            self.tariff_manager,
+            {"taryfa": "G12", "magazyn": 2.0, "sprawnosc": 0.9, "netmetering": 0.8},
+        )
+        expected, _ = run_full_analysis(
+            self.data,
+            2.0,
+            self.tariff_manager,
+            "G12",
+            net_metering_ratio=0.8,
+            storage_efficiency=0.9,
+        )
+        self.assertEqual(response["wynik"], expected)
+        self.assertEqual(response["rekordy"], len(self.data))
+        json.dumps(response)
+
+    def test_comparison_and_sweep_modes(self):
+        """Tryby "porownanie" i "zakres" zwracają wyniki dla każdej taryfy/pojemności."""
+        comparison = run_request(self.data, self.tariff_manager, {"tryb": "porownanie"})
+        self.assertEqual(
+            comparison["wynik"],
+            compare_tariffs(self.data, self.tariff_manager, 0.0, None, 0.9),
+        )
+        sweep = run_request(
+            self.data,
+            self.tariff_manager,
+            {"tryb": "zakres", "taryfa": "G11", "magazyny": [0, 5]},
+        )
+        self.assertEqual([row["pojemnosc_kwh"] for row in sweep["wynik"]], [0.0, 5.0])
+
+    def test_tariff_names_are_case_insensitive(self):
+        """Taryfy w zapytaniu, jak --taryfa w CLI, nie zależą od wielkości liter."""
+        lower = run_request(self.data, self.tariff_manager, {"taryfa": "g12"})
+        upper = run_request(self.data, self.tariff_manager, {"taryfa": "G12"})
+        self.assertEqual(lower["wynik"], upper["wynik"])
+        comparison = run_request(
+            self.data,
+            self.tariff_manager,
+            {"tryb": "porownanie", "taryfy": ["g11", "g12"]},
+        )
+        self.assertEqual(
+            comparison["wynik"],
+            compare_tariffs(
+                self.data, self.tariff_manager, 0.0, None, 0.9, tariffs=["G11", "G12"]
+            ),
+        )
+
+    def test_date_range_is_inclusive(self):
+        """Zakres dat obejmuje oba dni graniczne w całości."""
+        selected = select_date_range(self.data, "2024-05-01", "2024-05-01")
+        self.assertEqual(len(selected), 3)
+        response = run_request(
+            self.data, self.tariff_manager, {"ostatnie_dni": 1, "taryfa": "G11"}
+        )
+        self.assertEqual(response["data_start"], "2024-05-04")
+
+    def test_invalid_requests_raise_value_error(self):
+        """Błędne parametry zgłaszane są jako ValueError z opisem."""
+        for request in (
+            {"taryfa": "X99"},
+            {"tryb": "nieznany"},
+            {"data_start": "2024-13-01"},
+            {"data_start": "2025-01-01"},
+            {"tryb": "zakres"},
+            {"okres": "ostatnie-30-dni", "data_start": "2024-05-01"},
+            {"magazyn": "dużo"},
+            {"tryb": "porownanie", "taryfy": "G11"},
+            {"tryb": "zakres", "magazyny": 5},
+            {"tryb": "zakres", "magazyny": ["dużo"]},
+            {"tryb": "zakres", "magazyny": [None]},
+        ):
+            with self.subTest(request=request):
+                with self.assertRaises(ValueError):
+                    run_request(self.data, self.tariff_manager, request)
+
+
+class TestAnalysisServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.data_dir = self.tmp_dir / "data"
+        self.data_dir.mkdir()
+        self.tariffs_file = self.tmp_dir / "tariffs.csv"
+        self.tariffs_file.write_text(TARIFFS_CSV, encoding="utf-8")
+        shutil.copy("tests/test_data.csv", self.data_dir / "2024.csv")
+        self.workspace = AnalysisWorkspace(self.data_dir, self.tariffs_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_refresh_reloads_only_after_changes(self):
+        """Dane wczytywane są ponownie tylko po zmianie plików w katalogu."""
+        with redirect_stdout(StringIO()):
+            self.assertTrue(self.workspace.refresh())
+            self.assertFalse(self.workspace.refresh())
+            self.assertEqual(self.workspace.status()["rekordy"], 5)
+
+            extra = self.data_dir / "2024-extra.csv"
+            extra.write_text(
+                "Data;Wolumen energii elektrycznej pobranej z sieci przed "
+                "bilansowaniem godzinowym;Wolumen energii elektrycznej oddanej do "
+                "sieci przed bilansowaniem godzinowym;Wolumen energii elektrycznej "
+                "pobranej z sieci po bilansowaniu godzinowym;Wolumen energii "
+                "elektrycznej oddanej do sieci po bilansowaniu godzinowym\n"
+                '"=""2024-05-05 04:59""";"1,0";"0,0";"1,0";"0,0"\n',
+                encoding="utf-8",
+            )
+            self.assertTrue(self.workspace.refresh())
+            self.assertEqual(self.workspace.status()["rekordy"], 6)
+            self.assertEqual(self.workspace.status()["pliki"], 2)
+
+            os.remove(extra)
+            self.assertTrue(self.workspace.refresh())
+        self.assertEqual(self.workspace.status()["rekordy"], 5)
+        self.assertEqual(self.workspace.reloads, 3)
+
+    def test_http_api(self):
+        """Serwer odpowiada na /status i /analiza, a błędy zwraca jako status 400."""
+        server = AnalysisServer(self.workspace, port=0, poll_interval=0.05)
+        thread = threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        with redirect_stdout(StringIO()):
+            thread.start()
+            try:
+                host, port = server.server_address[:2]
+                base_url = f"http://{host}:{port}"
+
+                def post(payload):
+                    request = Request(
+                        f"{base_url}/analiza",
+                        data=json.dumps(payload).encode("utf-8"),
+                        headers={"Content-Type": "application/json"},
+                    )
+                    with urlopen(request, timeout=10) as response:
+                        return json.load(response)
+
+                response = post({"taryfa": "G11", "magazyn": 0})
+                self.assertEqual(response["rekordy"], 5)
+                self.assertIn("calkowity_koszt", response["wynik"])
+
+                with urlopen(f"{base_url}/status", timeout=10) as status:
+                    self.assertEqual(json.load(status)["data_koniec"], "2024-05-04")
+
+                with self.assertRaises(HTTPError) as raised:
+                    post({"taryfa": "X99"})
+                self.assertEqual(raised.exception.code, 400)
+                self.assertIn("X99", json.load(raised.exception)["blad"])
+
+                with self.assertRaises(HTTPError) as raised:
+                    post({"tryb": "zakres", "magazyny": ["dużo"]})
+                self.assertEqual(raised.exception.code, 400)
+                self.assertIn("magazyny", json.load(raised.exception)["blad"])
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
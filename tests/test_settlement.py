@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from eanalizer.core import run_full_analysis
+from eanalizer.settlement import run_monthly_settlement, settle_monthly
+from eanalizer.tariffs import TariffManager
+from tests.test_sizing import _synthetic_series
+
+
+def _days(flows):
+    """Szereg godzinowy z dni {data: (pobór, oddanie)} rozłożonych równo na 24 h."""
+    timestamps, pobor, oddanie = [], [], []
+    for day, (day_pobor, day_oddanie) in sorted(flows.items()):
+        start = np.datetime64(day, "h")
+        timestamps.extend(start + np.arange(24))
+        pobor.extend([day_pobor / 24] * 24)
+        oddanie.extend([day_oddanie / 24] * 24)
+    return np.array(timestamps), np.array(pobor), np.array(oddanie)
+
+
+class TestMonthlySettlement(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        tariffs_file = cls.tmp_dir / "tariffs.csv"
+        tariffs_file.write_text(
+            "tariff,zone_name,day_type,start_hour,end_hour,energy_price,dist_price,dist_fee\n"
+            "G11,stala,all,0,24,0.6,0.4,40.0\n"
+            "G12,dzienna,all,6,22,0.7,0.4,46.0\n"
+            "G12,nocna,all,22,6,0.4,0.2,46.0\n",
+            encoding="utf-8",
+        )
+        cls.tariff_manager = TariffManager(str(tariffs_file), years=[2023, 2024])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def _settle(self, flows):
+        return settle_monthly(*_days(flows), self.tariff_manager, "G11", 0.8)
+
+    def test_single_month_matches_full_analysis(self):
+        """Dla jednego miesiąca wynik jest taki sam jak rozliczenie całego okresu."""
+        data = _synthetic_series(days=30)
+        for ratio in (None, 0.8):
+            with self.subTest(netmetering=ratio):
+                statement = run_monthly_settlement(
+                    data, 5.0, self.tariff_manager, "G12", ratio, 0.9
+                )
+                summary, _ = run_full_analysis(
+                    data, 5.0, self.tariff_manager, "G12", ratio, 0.9
+                )
+                self.assertEqual(statement["miesiac"].tolist(), ["2024-04"])
+                self.assertAlmostEqual(
+                    statement["koszt_zl"].sum(), summary["calkowity_koszt"]
+                )
+
+    def test_credit_expires_after_twelve_months(self):
+        """Kredyt ze stycznia 2023 jest ważny w styczniu 2024, a w lutym już wygasa."""
+        statement = self._settle({"2023-01-10": (0, 10), "2024-01-10": (5, 0)})
+        last = statement.iloc[-1]
+        self.assertAlmostEqual(last["kredyt_z_poprzednich_kwh"], 8.0)
+        self.assertAlmostEqual(last["energia_do_oplacenia_kwh"], 0.0)
+        self.assertAlmostEqual(last["kredyt_na_koniec_kwh"], 3.0)
+
+        statement = self._settle({"2023-01-10": (0, 10), "2024-02-10": (5, 0)})
+        last = statement.iloc[-1]
+        self.assertAlmostEqual(last["kredyt_wygasly_kwh"], 8.0)
+        self.assertAlmostEqual(last["kredyt_z_poprzednich_kwh"], 0.0)
+        self.assertAlmostEqual(last["energia_do_oplacenia_kwh"], 5.0)
+        self.assertAlmostEqual(last["koszt_zl"], 5.0 * 1.0 + 40.0)
+
+    def test_oldest_credit_is_used_first(self):
+        """Zużycie zdejmuje kredyt od najstarszej partii (FIFO)."""
+        flows = {"2023-01-10": (0, 10), "2023-06-10": (0, 10), "2024-02-10": (1, 0)}
+        # Grudzień zużywa całą partię styczniową i część czerwcowej - nic nie wygasa
+        statement = self._settle({**flows, "2023-12-10": (10, 0)})
+        last = statement.iloc[-1]
+        self.assertAlmostEqual(last["kredyt_wygasly_kwh"], 0.0)
+        self.assertAlmostEqual(last["kredyt_z_poprzednich_kwh"], 6.0)
+        # Grudzień zużywa tylko 4 kWh partii styczniowej - reszta wygasa w lutym
+        statement = self._settle({**flows, "2023-12-10": (4, 0)})
+        last = statement.iloc[-1]
+        self.assertAlmostEqual(last["kredyt_wygasly_kwh"], 4.0)
+        self.assertAlmostEqual(last["kredyt_z_poprzednich_kwh"], 8.0)
+        self.assertAlmostEqual(statement["kredyt_wygasly_kwh"].sum(), 4.0)
+
+    def test_statement_without_net_metering_has_no_credit(self):
+        statement = settle_monthly(
+            *_days({"2023-01-10": (2, 10), "2023-02-10": (3, 0)}),
+            self.tariff_manager,
+            "G11",
+        )
+        self.assertEqual(statement["miesiac"].tolist(), ["2023-01", "2023-02"])
+        self.assertTrue((statement["kredyt_na_koniec_kwh"] == 0).all())
+        self.assertAlmostEqual(statement["koszt_energii_zl"].sum(), 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
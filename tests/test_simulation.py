@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from eanalizer import simulation
+from eanalizer.simulation import simulate_storage, simulate_storage_sweep
+
+
+class TestSimulateStorage(unittest.TestCase):
+    def test_charge_and_discharge_with_efficiency(self):
+        """
+        Nadwyżka 4 kWh przy sprawności 0.5 i pojemności 1.5 kWh: do magazynu
+        trafia 3 kWh (1.5 kWh netto), reszta do sieci. Potem niedobór 2 kWh:
+        1.5 kWh z magazynu, 0.5 kWh z sieci.
+        """
+        flows = simulate_storage(
+            np.array([0.0, 2.0, 1.0]),
+            np.array([4.0, 0.0, 1.0]),
+            capacity=1.5,
+            storage_efficiency=0.5,
+        )
+        np.testing.assert_allclose(flows.oddanie_do_magazynu, [3.0, 0.0, 0.0])
+        np.testing.assert_allclose(flows.oddanie_do_sieci, [1.0, 0.0, 0.0])
+        np.testing.assert_allclose(flows.pobor_z_magazynu, [0.0, 1.5, 0.0])
+        np.testing.assert_allclose(flows.pobor_z_sieci, [0.0, 0.5, 0.0])
+        np.testing.assert_allclose(flows.stan_magazynu, [1.5, 0.0, 0.0])
+
+    def test_zero_capacity_is_plain_hourly_balancing(self):
+        pobor_przed = np.array([1.0, 0.5, 2.0])
+        oddanie_przed = np.array([0.0, 3.0, 2.0])
+        flows = simulate_storage(pobor_przed, oddanie_przed, 0.0, 0.9)
+        np.testing.assert_allclose(flows.pobor_z_sieci, [1.0, 0.0, 0.0])
+        np.testing.assert_allclose(flows.oddanie_do_sieci, [0.0, 2.5, 0.0])
+        self.assertFalse(flows.stan_magazynu.any())
+
+    def test_pure_python_fallback_matches_vectorized_zero_capacity(self):
+        """Pętla w czystym Pythonie (bez numba) daje te same wyniki co ścieżka wektorowa."""
+        rng = np.random.default_rng(42)
+        pobor_przed = rng.random(500) * 2
+        oddanie_przed = rng.random(500) * 2
+        expected = simulate_storage(pobor_przed, oddanie_przed, 0.0, 1.0)
+        with patch.object(simulation, "_jit_storage_kernel", None):
+            # Pojemność bliska zeru wymusza przejście przez pętlę kernela.
+            flows = simulate_storage(pobor_przed, oddanie_przed, 1e-12, 1.0)
+        np.testing.assert_allclose(
+            flows.pobor_z_sieci, expected.pobor_z_sieci, atol=1e-9
+        )
+        np.testing.assert_allclose(
+            flows.oddanie_do_sieci, expected.oddanie_do_sieci, atol=1e-9
+        )
+
+    def test_state_of_charge_never_exceeds_capacity(self):
+        rng = np.random.default_rng(7)
+        flows = simulate_storage(rng.random(1000), rng.random(1000) * 3, 5.0, 0.9)
+        self.assertLessEqual(flows.stan_magazynu.max(), 5.0 + 1e-9)
+        self.assertGreaterEqual(flows.stan_magazynu.min(), 0.0)
+
+
+class TestSimulateStorageSweep(unittest.TestCase):
+    def test_sweep_matches_individual_simulations(self):
+        """Jeden przebieg dla wielu pojemności daje te same sumy co osobne symulacje."""
+        rng = np.random.default_rng(3)
+        pobor_przed = rng.random(300) * 2
+        oddanie_przed = rng.random(300) * 2
+        bins = np.arange(300) % 4
+        capacities = [0.0, 0.5, 2.0, 10.0]
+
+        sweep = simulate_storage_sweep(
+            pobor_przed, oddanie_przed, capacities, 0.9, bins=bins, num_bins=4
+        )
+        self.assertEqual(sweep.pobor_z_sieci.shape, (4, 4))
+        for k, capacity in enumerate(capacities):
+            flows = simulate_storage(pobor_przed, oddanie_przed, capacity, 0.9)
+            np.testing.assert_allclose(
+                sweep.pobor_z_sieci[:, k],
+                np.bincount(bins, weights=flows.pobor_z_sieci, minlength=4),
+            )
+            np.testing.assert_allclose(
+                sweep.oddanie_do_sieci[:, k],
+                np.bincount(bins, weights=flows.oddanie_do_sieci, minlength=4),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
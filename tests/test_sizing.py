@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from eanalizer.core import run_capacity_sweep, run_full_analysis
+from eanalizer.models import EnergySeries
+from eanalizer.sizing import optimize_storage_capacity
+from eanalizer.tariffs import TariffManager
+
+
+def _synthetic_series(days=60, seed=7):
+    """Nadwyżka PV w południe i pobór wieczorem, zmienne z dnia na dzień."""
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(
+        np.datetime64("2024-04-01T00", "h"),
+        np.datetime64("2024-04-01T00", "h") + days * 24,
+    )
+    hours = np.arange(len(timestamps)) % 24
+    sun = np.clip(np.sin(np.pi * (hours - 6) / 14), 0, None)
+    pv = sun * rng.uniform(0.5, 2.5, size=days).repeat(24)
+    load = 0.3 + 1.2 * ((hours >= 18) & (hours < 23)) * rng.uniform(
+        0.5, 1.5, len(hours)
+    )
+    return EnergySeries(
+        timestamps,
+        np.maximum(load - pv, 0),
+        np.maximum(pv - load, 0),
+        np.maximum(load - pv, 0),
+        np.maximum(pv - load, 0),
+    )
+
+
+class TestOptimizeStorageCapacity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        tariffs_file = cls.tmp_dir / "tariffs.csv"
+        tariffs_file.write_text(
+            "tariff,zone_name,day_type,start_hour,end_hour,energy_price,dist_price,dist_fee\n"
+            "G12,dzienna,all,6,22,0.7,0.4,46.0\n"
+            "G12,nocna,all,22,6,0.4,0.2,46.0\n",
+            encoding="utf-8",
+        )
+        cls.tariff_manager = TariffManager(str(tariffs_file), years=[2024])
+        cls.data = _synthetic_series()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def test_cost_minimum_matches_dense_sweep(self):
+        """Złoty podział znajduje minimum kosztu łącznego z gęstej siatki pojemności."""
+        result = optimize_storage_capacity(
+            self.data,
+            self.tariff_manager,
+            "G12",
+            storage_efficiency=0.9,
+            storage_price=200.0,
+        )
+        capacities = np.arange(0, result.punkty["pojemnosc_kwh"].max() + 1e-9, 0.02)
+        sweep = run_capacity_sweep(
+            self.data, capacities, self.tariff_manager, "G12", storage_efficiency=0.9
+        )
+        total = sweep["calkowity_koszt_zl"] + 200.0 * capacities * 2 / 12
+        self.assertLessEqual(result.najlepszy["koszt_laczny_zl"], total.min() + 0.05)
+        self.assertLess(result.symulacje, 40)
+
+        summary, _ = run_full_analysis(
+            self.data,
+            result.pojemnosc_kwh,
+            self.tariff_manager,
+            "G12",
+            storage_efficiency=0.9,
+        )
+        self.assertAlmostEqual(
+            result.najlepszy["koszt_energii_zl"], summary["calkowity_koszt"]
+        )
+
+    def test_smallest_capacity_reaching_self_sufficiency(self):
+        """Bisekcja zwraca najmniejszą pojemność spełniającą cel samowystarczalności."""
+        result = optimize_storage_capacity(
+            self.data,
+            self.tariff_manager,
+            "G12",
+            storage_efficiency=0.9,
+            target_self_sufficiency=30.0,
+            tolerance=0.01,
+        )
+        self.assertTrue(result.osiagnieto_cel)
+        self.assertGreaterEqual(result.najlepszy["samowystarczalnosc_proc"], 30.0)
+        below = optimize_storage_capacity(
+            self.data,
+            self.tariff_manager,
+            "G12",
+            storage_efficiency=0.9,
+            max_capacity=result.pojemnosc_kwh - 0.02,
+        ).punkty
+        self.assertLess(below["samowystarczalnosc_proc"].max(), 30.0)
+
+    def test_unreachable_target_reports_largest_capacity(self):
+        result = optimize_storage_capacity(
+            self.data,
+            self.tariff_manager,
+            "G12",
+            target_self_sufficiency=100.0,
+            max_capacity=1.0,
+        )
+        self.assertFalse(result.osiagnieto_cel)
+        self.assertEqual(result.pojemnosc_kwh, 1.0)
+        self.assertEqual(result.symulacje, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Moduły, których wczytanie kosztuje setki milisekund - nie mogą być
+# importowane przy samym starcie CLI ani przy `--help`.
+HEAVY_MODULES = ["pandas", "numpy", "holidays", "requests"]
+
+# Budżet czasu importu eanalizer.cli (sekundy). Domyślnie z dużym zapasem
+# (lekki import trwa kilka-kilkanaście ms, z pandas - kilkaset), by test
+# łapał regresje, a nie wahania obciążenia maszyny CI.
+IMPORT_BUDGET_SECONDS = float(os.environ.get("EANALIZER_IMPORT_BUDGET", "0.15"))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import eanalizer.cli
+elapsed = time.perf_counter() - start
+if sys.argv[1:] == ["--help"]:
+    sys.argv = ["eanalizer", "--help"]
+    try:
+        eanalizer.cli.main()
+    except SystemExit:
+        pass
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"elapsed": elapsed, "heavy": heavy}}), file=sys.stderr)
+""".format(heavy=HEAVY_MODULES)
+
+
+def _probe(*args):
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, *args],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stderr.strip().splitlines()[-1])
+
+
+class TestStartup(unittest.TestCase):
+    def test_cli_import_is_light_and_within_budget(self):
+        probe = _probe()
+        self.assertEqual(probe["heavy"], [])
+        self.assertLess(probe["elapsed"], IMPORT_BUDGET_SECONDS)
+
+    def test_help_does_not_import_analysis_stack(self):
+        probe = _probe("--help")
+        self.assertEqual(probe["heavy"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
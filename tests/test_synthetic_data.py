@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic_data import (
+    generate_profiles,
+    render_enea_csv,
+    write_dataset,
+)
+from eanalizer.data_loader import load_from_enea_csv
+
+
+class TestSyntheticData(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _load(self, path):
+        with redirect_stdout(StringIO()):
+            return load_from_enea_csv(str(path))
+
+    def test_generated_year_loads_with_dst_gap_and_repeat(self):
+        """Rok godzinowy (z bajtami NUL) wczytuje się z luką i powtórzeniem godziny DST."""
+        (path,) = write_dataset(self.tmp_dir, [2024])
+        self.assertIn(b"\x00", path.read_bytes()[:10])
+        data = self._load(path)
+        self.assertEqual(len(data), 366 * 24)
+        hours = data.timestamp.astype("datetime64[h]")
+        self.assertNotIn(np.datetime64("2024-03-31T02", "h"), hours)
+        self.assertEqual(int(np.sum(hours == np.datetime64("2024-10-27T02", "h"))), 2)
+        self.assertTrue(np.all(data.pobor_przed >= 0))
+        self.assertGreater(float(data.oddanie_przed.sum()), 0.0)
+
+    def test_quarter_hours_and_unsettled_tail(self):
+        """Dane kwadransowe sumują się do godzin, a okresy "---" są pomijane."""
+        profiles = generate_profiles(2023, "15min", seed=1)
+        path = self.tmp_dir / "kwadranse.csv"
+        path.write_bytes(render_enea_csv(profiles, "15min", unsettled_tail=4))
+        data = self._load(path)
+        self.assertEqual(len(data), 365 * 96 - 4)
+        self.assertAlmostEqual(
+            float(data.pobor_przed.sum()),
+            float(np.round(profiles["pobor_przed"][:-4], 3).sum()),
+            places=3,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,9 @@ import os
 import unittest
 from datetime import datetime
 
-from eanalizer.tariffs import TariffManager
+import numpy as np
+
+from eanalizer.tariffs import NO_ZONE, TariffManager
 
 TEST_TARIFFS_CSV = "test_tariffs_temp.csv"
 
@@ -94,6 +96,54 @@ class TestTariffManager(unittest.TestCase):
             set(self.tariff_manager.get_all_tariffs()), {"G11", "G12", "G12w"}
         )
 
+    def test_compile_tariff_builds_day_type_hour_table(self):
+        """Skompilowana taryfa G12w ma tablicę 2x24 ze strefą szczytową tylko w dni robocze."""
+        compiled = self.tariff_manager.compile_tariff("G12w")
+        self.assertEqual(compiled.zone_table.shape, (2, 24))
+        szczyt = compiled.zone_names.index("szczytowa")
+        pozaszczyt = compiled.zone_names.index("pozaszczytowa")
+        self.assertEqual(compiled.zone_table[0, 10], szczyt)
+        self.assertEqual(compiled.zone_table[0, 23], pozaszczyt)
+        self.assertTrue((compiled.zone_table[1] == pozaszczyt).all())
+        self.assertAlmostEqual(compiled.energy_table[0, 10], 0.801714)
+        # Kompilacja jest zapamiętywana (niezależnie od wielkości liter).
+        self.assertIs(self.tariff_manager.compile_tariff("g12w"), compiled)
+
+    def test_vectorized_lookup_matches_single_lookup(self):
+        """get_zones_and_prices zwraca to samo co get_zone_and_price dla każdej godziny."""
+        timestamps = [
+            datetime(2025, 4, 2, 10, 0),  # dzień roboczy, szczyt
+            datetime(2025, 4, 2, 23, 0),  # dzień roboczy, pozaszczyt
+            datetime(2025, 4, 6, 10, 0),  # niedziela
+            datetime(2025, 5, 1, 10, 0),  # święto
+            datetime(2025, 5, 2, 5, 0),
+        ]
+        for tariff in ["G11", "G12", "G12w"]:
+            compiled = self.tariff_manager.compile_tariff(tariff)
+            zone_ids, energy, dist = self.tariff_manager.get_zones_and_prices(
+                np.array(timestamps, dtype="datetime64[ns]"), tariff
+            )
+            for i, ts in enumerate(timestamps):
+                zone, e, d = self.tariff_manager.get_zone_and_price(ts, tariff)
+                self.assertEqual(compiled.zone_names[zone_ids[i]], zone)
+                self.assertAlmostEqual(energy[i], e)
+                self.assertAlmostEqual(dist[i], d)
+
+    def test_vectorized_lookup_unknown_tariff(self):
+        """Dla nieistniejącej taryfy wszystkie godziny są poza strefą, z zerowymi cenami."""
+        zone_ids, energy, dist = self.tariff_manager.get_zones_and_prices(
+            [datetime(2025, 4, 2, 10, 0)], "NIEISTNIEJACA"
+        )
+        self.assertEqual(zone_ids[0], NO_ZONE)
+        self.assertEqual(energy[0], 0.0)
+        self.assertEqual(dist[0], 0.0)
+        self.assertEqual(
+            self.tariff_manager.get_zone_and_price(
+                datetime(2025, 4, 2, 10, 0), "NIEISTNIEJACA"
+            ),
+            (None, 0.0, 0.0),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()